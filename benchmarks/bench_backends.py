@@ -0,0 +1,97 @@
+"""Compare the TAC interpreter (scripts.vm) with the Python backend
+(scripts.pycodegen) on a few workloads, with and without -O.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_backends
+"""
+import copy
+import sys
+
+from benchmarks.harness import best_of, format_table
+from scripts import compiler, optimizer, pycodegen, vm
+from scripts.context import CompilationContext
+
+WORKLOADS = {
+    'sum loop': """
+int main() {
+  int s = 0;
+  int i = 0;
+  while (i < 200000) {
+    int k = 3;
+    s = s + i * k - i / 7;
+    i = i + 1;
+  }
+  return s;
+}
+""",
+    'fib': """
+int fib(int n) {
+  if (n < 2) { return n; }
+  return fib(n - 1) + fib(n - 2);
+}
+int main() { return fib(21); }
+""",
+    'primes': """
+int is_prime(int n) {
+  int d = 2;
+  while (d * d < n + 1) {
+    if (n - n / d * d = 0) { return 0; }
+    d = d + 1;
+  }
+  return 1;
+}
+int main() {
+  int count = 0;
+  int n = 2;
+  while (n < 20000) {
+    count = count + is_prime(n);
+    n = n + 1;
+  }
+  return count;
+}
+""",
+    'nested': """
+int main() {
+  int total = 0;
+  int i = 0;
+  while (i < 300) {
+    int j = 0;
+    while (j < 300) {
+      if (i > j) { total = total + i - j; } else { total = total + 1; }
+      j = j + 1;
+    }
+    i = i + 1;
+  }
+  return total;
+}
+""",
+}
+
+
+def main(repeat=3):
+    rows = []
+    for name, source in WORKLOADS.items():
+        result = compiler.compile_source(source, CompilationContext())
+        if not result.ok:
+            print(f"❌ {name}: {result.diagnostics[0]}")
+            return 1
+        for optimized in (False, True):
+            module = copy.deepcopy(result.module)
+            if optimized:
+                optimizer.optimize(module)
+            machine = vm.VM(module)
+            program = pycodegen.compile_module(module)
+            vm_time, vm_run = best_of(machine.run, repeat)
+            py_time, py_run = best_of(program.run, repeat)
+            if vm_run.value != py_run.value:
+                print(f"❌ {name}: vm returned {vm_run.value}, python returned {py_run.value}")
+                return 1
+            rows.append((name + (" -O" if optimized else ""), f"{vm_run.instructions:,}",
+                         f"{vm_time * 1000:.1f}ms", f"{py_time * 1000:.1f}ms", f"{vm_time / py_time:.1f}x"))
+    print(format_table(("workload", "instructions", "vm", "python", "speedup"), rows))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,74 @@
+"""Time scripts.build on a generated multi-module tree: a clean build, a
+rebuild with nothing changed, and rebuilds after editing one module without
+touching its interface, adding a function to it and changing a signature.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_build [--modules 50] [--functions 10]
+
+Module N defines f<N>_<i> and calls one function of module N-1, so a
+signature change in a module is felt by exactly one other module.
+"""
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from benchmarks.harness import format_table
+from benchmarks.program_generator import ProgramShape, generate_program
+from scripts import build
+
+
+def module_source(number, functions):
+    source = generate_program(ProgramShape(functions=functions), seed=number)
+    source = source.replace("int main()", f"int entry{number}()").replace(" f", f" m{number}_f")
+    source = source.replace("(f", f"(m{number}_f").replace("+f", f"+m{number}_f")
+    if number:
+        source += f"int link{number}() {{ return entry{number - 1}(); }}\n"
+    return source
+
+
+def timed(source_dir, build_dir):
+    start = time.perf_counter()
+    results = build.build(source_dir, build_dir)
+    return time.perf_counter() - start, sum(1 for result in results if result.analyzed)
+
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(description="Time incremental multi-module builds.")
+    arg_parser.add_argument("--modules", type=int, default=50)
+    arg_parser.add_argument("--functions", type=int, default=10)
+    args = arg_parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as root:
+        source_dir, build_dir = Path(root) / "src", Path(root) / "build"
+        source_dir.mkdir()
+        for number in range(args.modules):
+            (source_dir / f"m{number:03}.ml").write_text(module_source(number, args.functions))
+        rows = []
+        seconds, count = timed(source_dir, build_dir)
+        if any(not result.ok for result in build.build(source_dir, build_dir)):
+            print("❌ the generated modules do not compile cleanly")
+            return 1
+        rows.append(("clean build", f"{seconds * 1000:.0f}ms", count))
+        seconds, count = timed(source_dir, build_dir)
+        rows.append(("no change", f"{seconds * 1000:.0f}ms", count))
+        edited = source_dir / f"m{args.modules // 2:03}.ml"
+        edited.write_text(edited.read_text() + "// edited\n")
+        seconds, count = timed(source_dir, build_dir)
+        rows.append(("comment edit", f"{seconds * 1000:.0f}ms", count))
+        edited.write_text(edited.read_text() + "int extra() { return 1 + 2; }\n")
+        seconds, count = timed(source_dir, build_dir)
+        rows.append(("new function", f"{seconds * 1000:.0f}ms", count))
+        edited.write_text(edited.read_text().replace(f"int entry{args.modules // 2}()",
+                                                     f"float entry{args.modules // 2}()"))
+        seconds, count = timed(source_dir, build_dir)
+        rows.append(("signature edit", f"{seconds * 1000:.0f}ms", count))
+    print(f"📊 {args.modules} modules of {args.functions} functions")
+    print(format_table(("rebuild", "time", "modules checked"), rows))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
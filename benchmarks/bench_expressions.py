@@ -0,0 +1,98 @@
+"""Compare the shunting-yard expression parser with the old recursive chain.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_expressions
+"""
+import random
+import sys
+import time
+
+from scripts.ast import BinOp, Literal, Name
+from scripts.lexer import tokenize
+from scripts.parser import Parser
+from scripts.token_stream import TOKEN_KINDS, OP, ID, NUMBER, LPAREN, RPAREN
+
+
+class RecursiveParser(Parser):
+    """The parse_expression -> parse_term -> parse_factor -> parse_primary chain."""
+
+    def parse_expression(self):
+        return self.parse_term()
+
+    def parse_term(self):
+        expr = self.parse_factor()
+        while self.peek() == OP and self.value() in ('+', '-'):
+            op = self.match(OP)
+            right = self.parse_factor()
+            expr = BinOp(op, expr, right)
+        return expr
+
+    def parse_factor(self):
+        expr = self.parse_primary()
+        while self.peek() == OP and self.value() in ('*', '/'):
+            op = self.match(OP)
+            right = self.parse_primary()
+            expr = BinOp(op, expr, right)
+        return expr
+
+    def parse_primary(self):
+        tok_type = self.peek()
+        if tok_type == ID:
+            return Name(self.match(ID))
+        elif tok_type == NUMBER:
+            value = self.match(NUMBER)
+            return Literal(value, 'float' if '.' in value else 'int')
+        elif tok_type == LPAREN:
+            self.match(LPAREN)
+            expr = self.parse_expression()
+            self.match(RPAREN)
+            return expr
+        else:
+            self.errors.append(f"❌ Unexpected token: {TOKEN_KINDS[tok_type]} ('{self.value()}')")
+            self.advance()
+            return Literal("0", 'int')
+
+
+def long_expression(rng, length):
+    parts = [rng.choice(['a', 'b', '1', '2.5'])]
+    for _ in range(length - 1):
+        parts.append(rng.choice('+-*/'))
+        parts.append(rng.choice(['a', 'b', '1', '2.5']))
+    return ' '.join(parts)
+
+
+def nested_expression(depth):
+    return '(' * depth + 'a' + ' + b)' * depth
+
+
+def time_parse(parser_cls, tokens, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        try:
+            parser_cls(tokens).parse_expression()
+        except RecursionError:
+            return None
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    rng = random.Random(42)
+    cases = [(f"long x{n}", long_expression(rng, n)) for n in (100, 1000, 10000)]
+    cases += [(f"nested x{n}", nested_expression(n)) for n in (100, 500, 5000)]
+
+    print(f"{'case':<14}{'recursive':>12}{'precedence':>12}{'speedup':>10}")
+    for name, source in cases:
+        tokens = tokenize(source)
+        old = time_parse(RecursiveParser, tokens, 5)
+        new = time_parse(Parser, tokens, 5)
+        if old is None:
+            print(f"{name:<14}{'RecursionError':>12}{new * 1000:>10.2f}ms{'-':>10}")
+        else:
+            print(f"{name:<14}{old * 1000:>10.2f}ms{new * 1000:>10.2f}ms{old / new:>9.2f}x")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
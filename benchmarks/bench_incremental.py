@@ -0,0 +1,52 @@
+"""Simulate typing into a large file: time incremental.Document.edit per
+keystroke against recompiling the whole text.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_incremental [--functions 300] [--keystrokes 20]
+
+Each keystroke inserts one character into a function body in the middle
+of the file, or into a function name (which changes a signature).
+"""
+import argparse
+import sys
+import time
+
+from benchmarks.harness import best_of, format_table
+from benchmarks.program_generator import ProgramShape, generate_program
+from scripts.compiler import compile_source
+from scripts.context import CompilationContext
+from scripts.incremental import Document
+
+
+def type_into(document, offset, keystrokes):
+    """Type `keystrokes` characters at `offset`; return seconds per keystroke."""
+    start = time.perf_counter()
+    for index in range(keystrokes):
+        document.edit(offset + index, 0, "x")
+    return (time.perf_counter() - start) / keystrokes
+
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(description="Time incremental edits against full recompiles.")
+    arg_parser.add_argument("--functions", type=int, default=300)
+    arg_parser.add_argument("--keystrokes", type=int, default=20)
+    args = arg_parser.parse_args(argv)
+
+    source = generate_program(ProgramShape(functions=args.functions))
+    full, _ = best_of(lambda: compile_source(source, CompilationContext()), 1)
+    document = Document(source)
+    middle = len(source) // 2
+    body = source.index("return", middle)
+    name = source.index("(", source.index("\nint ", middle)) - 1
+    rows = [("full compile", f"{full * 1000:.1f}ms", "1x")]
+    for label, offset in (("body keystroke", body), ("name keystroke", name)):
+        seconds = type_into(document, offset, args.keystrokes)
+        rows.append((label, f"{seconds * 1000:.1f}ms", f"{full / seconds:.0f}x"))
+    print(f"📊 {len(source):,} characters, {args.functions} functions")
+    print(format_table(("operation", "time", "speedup"), rows))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
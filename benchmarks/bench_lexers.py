@@ -0,0 +1,60 @@
+"""Compare the regex scanner (scripts.lexer) with the table-driven DFA
+scanner (scripts.dfa_lexer) on generated programs.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_lexers [--sizes 10,100,1000] [--repeat 3]
+
+Both scanners are timed on str input (tokenize_iter) and on UTF-8 bytes
+(lexer.tokenize_buffer against dfa_lexer.tokenize_bytes). Every run also
+checks that the two produce the same tokens.
+"""
+import argparse
+import sys
+
+from benchmarks.harness import best_of, format_table
+from benchmarks.program_generator import ProgramShape, generate_program
+from scripts import dfa_lexer, lexer
+from scripts.context import CompilationContext
+
+
+def scanners(source):
+    data = source.encode('utf-8')
+    return {
+        'regex str': lambda: list(lexer.tokenize_iter(source, CompilationContext())),
+        'dfa str': lambda: list(dfa_lexer.tokenize_iter(source, CompilationContext())),
+        'regex bytes': lambda: list(lexer.tokenize_buffer(data, ctx=CompilationContext())),
+        'dfa bytes': lambda: list(dfa_lexer.tokenize_bytes(data, CompilationContext())),
+    }
+
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(description="Compare the regex and DFA lexers.")
+    arg_parser.add_argument("--sizes", default="10,100,1000", help="comma-separated function counts")
+    arg_parser.add_argument("--repeat", type=int, default=3)
+    args = arg_parser.parse_args(argv)
+
+    tables = dfa_lexer.TABLES
+    print(f"📊 DFA: {tables.state_count} states, {tables.class_count} character classes")
+    rows = []
+    for size in (int(size) for size in args.sizes.split(",")):
+        source = generate_program(ProgramShape(functions=size))
+        times = {}
+        outputs = {}
+        for name, scan in scanners(source).items():
+            times[name], outputs[name] = best_of(scan, args.repeat)
+        for kind in ('str', 'bytes'):
+            if outputs[f'regex {kind}'] != outputs[f'dfa {kind}']:
+                print(f"❌ {size} functions: the scanners disagree on {kind} input")
+                return 1
+        count = len(outputs['regex str'])
+        for kind in ('str', 'bytes'):
+            regex, dfa = times[f'regex {kind}'], times[f'dfa {kind}']
+            rows.append((f"{size} {kind}", f"{count:,}", f"{count / regex:,.0f}", f"{count / dfa:,.0f}",
+                         f"{regex / dfa:.2f}x"))
+    print(format_table(("functions", "tokens", "regex tok/s", "dfa tok/s", "dfa speedup"), rows))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,57 @@
+"""Time semantic analysis plus TAC generation of one large generated file,
+serially and with scripts.parallel across a growing number of processes.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_parallel [--functions 400] [--jobs 1,2,4,8] [--repeat 3]
+
+Lexing and parsing happen once up front and are not timed. Every run is
+checked against the serial TAC.
+"""
+import argparse
+import os
+import sys
+
+from benchmarks.harness import best_of, format_table
+from benchmarks.program_generator import ProgramShape, generate_program
+from scripts import intermediate_code, lexer, parallel, semantic_analyzer
+from scripts.context import CompilationContext
+from scripts.parser import Parser
+from scripts.tac import format_module
+from scripts.token_stream import TokenStream
+
+
+def serial(ast):
+    ctx = CompilationContext()
+    semantic_analyzer.analyze(ast, ctx)
+    return intermediate_code.generate_intermediate_code(ast, ctx)
+
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(description="Compare serial and parallel function lowering.")
+    arg_parser.add_argument("--functions", type=int, default=400)
+    arg_parser.add_argument("--jobs", default="1,2,4,8", help="comma-separated process counts")
+    arg_parser.add_argument("--repeat", type=int, default=3)
+    args = arg_parser.parse_args(argv)
+
+    source = generate_program(ProgramShape(functions=args.functions))
+    tokens = TokenStream.from_tokens(lexer.tokenize_iter(source, CompilationContext()))
+    ast = Parser(tokens, CompilationContext()).parse()
+    baseline, module = best_of(lambda: serial(ast), args.repeat)
+    expected = format_module(module)
+    print(f"📊 {len(ast.functions):,} functions, {os.cpu_count()} CPUs")
+    rows = [("serial", f"{baseline * 1000:.0f}ms", "1.00x")]
+    for jobs in (int(jobs) for jobs in args.jobs.split(",")):
+        if jobs < 2:
+            continue
+        seconds, module = best_of(lambda: parallel.analyze_and_generate(ast, CompilationContext(), jobs), args.repeat)
+        if format_module(module) != expected:
+            print(f"❌ -j {jobs} produced different TAC")
+            return 1
+        rows.append((f"-j {jobs}", f"{seconds * 1000:.0f}ms", f"{baseline / seconds:.2f}x"))
+    print(format_table(("mode", "time", "speedup"), rows))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,75 @@
+"""Time lexing one large generated file serially and with
+scripts.parallel_lexer across a growing number of processes, plus the
+split_points() pre-scan on its own with and without NumPy.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_parallel_lexer [--functions 4000] [--jobs 2,4,8] [--repeat 3]
+
+Every parallel run is checked against the serial TokenStream.
+"""
+import argparse
+import os
+import sys
+import tempfile
+
+from benchmarks.harness import best_of, format_table
+from benchmarks.program_generator import ProgramShape, generate_program
+from scripts import lexer, parallel_lexer
+from scripts.context import CompilationContext
+from scripts.token_stream import TokenStream
+
+
+def serial(path):
+    return TokenStream.from_tokens(lexer.tokenize_file(path, ctx=CompilationContext()))
+
+
+def same(left, right):
+    return (list(left) == list(right) and left.starts == right.starts
+            and all(left.position(i) == right.position(i) for i in range(len(left))))
+
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(description="Compare serial and parallel lexing of one large file.")
+    arg_parser.add_argument("--functions", type=int, default=4000)
+    arg_parser.add_argument("--jobs", default="2,4,8", help="comma-separated process counts")
+    arg_parser.add_argument("--repeat", type=int, default=3)
+    args = arg_parser.parse_args(argv)
+    jobs_list = [int(jobs) for jobs in args.jobs.split(",") if int(jobs) > 1]
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "big.mlpp")
+        with open(path, "w", encoding="utf-8") as file:
+            file.write(generate_program(ProgramShape(functions=args.functions)))
+        with open(path, "rb") as file:
+            data = file.read()
+        print(f"📊 {len(data) / 2 ** 20:.1f}MB, {os.cpu_count()} CPUs, "
+              f"NumPy {'available' if parallel_lexer.np is not None else 'not installed'}")
+
+        numpy = parallel_lexer.np
+        rows = []
+        for label, module in (("numpy", numpy), ("bytes.find", None)):
+            if label == "numpy" and numpy is None:
+                continue
+            parallel_lexer.np = module
+            try:
+                seconds, cuts = best_of(lambda: parallel_lexer.split_points(data, max(jobs_list, default=2)), args.repeat)
+            finally:
+                parallel_lexer.np = numpy
+            rows.append((f"pre-scan ({label})", f"{seconds * 1000:.1f}ms", f"{len(cuts)} cuts"))
+
+        baseline, expected = best_of(lambda: serial(path), args.repeat)
+        rows.append(("serial", f"{baseline * 1000:.0f}ms", "1.00x"))
+        for jobs in jobs_list:
+            seconds, tokens = best_of(lambda: parallel_lexer.tokenize_file(path, CompilationContext(), jobs),
+                                      args.repeat)
+            if not same(tokens, expected):
+                print(f"❌ -j {jobs} produced different tokens")
+                return 1
+            rows.append((f"-j {jobs}", f"{seconds * 1000:.0f}ms", f"{baseline / seconds:.2f}x"))
+    print(format_table(("mode", "time", "speedup"), rows))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,183 @@
+"""Time each compiler phase on generated programs of growing size.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_phases [--sizes 10,100,1000] [--repeat 3]
+        [--seed N] [--depth N] [--expression-length N] [--identifiers N]
+        [--statements N] [--output FILE] [--baseline FILE] [--threshold 0.1]
+
+Sizes are function counts passed to benchmarks.program_generator; the
+other shape options are fixed across sizes. For every size the lexer,
+parser, semantic analyzer and TAC generator are timed separately (best of
+--repeat runs) and throughput is reported as tokens/s and AST nodes/s.
+Peak memory of each phase comes from one extra run under tracemalloc, so
+it does not distort the timings.
+
+--output writes the results as JSON. --baseline compares against an
+earlier JSON file and exits with status 1 if any phase got slower by
+more than --threshold (0.1 = 10%).
+"""
+import argparse
+import json
+import platform
+import sys
+import time
+import tracemalloc
+
+from benchmarks.harness import best_of, format_table
+from benchmarks.program_generator import ProgramShape, generate_program
+from scripts import lexer, semantic_analyzer, intermediate_code
+from scripts.ast import walk
+from scripts.compiler import COMPILER_VERSION
+from scripts.context import CompilationContext
+from scripts.parser import Parser
+from scripts.token_stream import TokenStream
+
+RESULTS_VERSION = 1
+PHASES = ('lex', 'parse', 'semantic', 'tac')
+
+
+def phase_functions(source):
+    """One zero-argument callable per phase. Each gets a fresh context and
+    the previous phase's output, computed once up front."""
+    tokens = TokenStream.from_tokens(lexer.tokenize_iter(source, CompilationContext()))
+    ast = Parser(tokens, CompilationContext()).parse()
+    return tokens, ast, {
+        'lex': lambda: TokenStream.from_tokens(lexer.tokenize_iter(source, CompilationContext())),
+        'parse': lambda: Parser(tokens, CompilationContext()).parse(),
+        'semantic': lambda: semantic_analyzer.analyze(ast, CompilationContext()),
+        'tac': lambda: intermediate_code.generate_intermediate_code(ast, CompilationContext()),
+    }
+
+
+def peak_memory(function):
+    tracemalloc.start()
+    try:
+        function()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def measure(shape, seed, repeat):
+    source = generate_program(shape, seed)
+    tokens, ast, functions = phase_functions(source)
+    token_count = len(tokens)
+    node_count = sum(1 for _ in walk(ast))
+    phases = {}
+    for name in PHASES:
+        seconds, _ = best_of(functions[name], repeat)
+        phases[name] = {
+            'seconds': seconds,
+            'tokens_per_sec': token_count / seconds if seconds else 0.0,
+            'nodes_per_sec': node_count / seconds if seconds else 0.0,
+            'peak_bytes': peak_memory(functions[name]),
+        }
+    return {
+        'size': shape.functions,
+        'source_bytes': len(source.encode('utf-8')),
+        'tokens': token_count,
+        'nodes': node_count,
+        'phases': phases,
+    }
+
+
+def run(sizes, shape, seed=0, repeat=3):
+    """Measure every size and return the JSON-ready results document."""
+    results = []
+    for size in sizes:
+        sized = ProgramShape(**{**shape.to_dict(), 'functions': size})
+        results.append(measure(sized, seed, repeat))
+    return {
+        'version': RESULTS_VERSION,
+        'compiler': COMPILER_VERSION,
+        'python': platform.python_version(),
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'seed': seed,
+        'repeat': repeat,
+        'shape': {key: value for key, value in shape.to_dict().items() if key != 'functions'},
+        'results': results,
+    }
+
+
+def compare(baseline, current, threshold):
+    """Rows of (size, phase, old seconds, new seconds, change) for every
+    measurement present in both documents, and the rows whose time grew
+    by more than `threshold`."""
+    old = {(result['size'], phase): stats['seconds']
+           for result in baseline['results'] for phase, stats in result['phases'].items()}
+    rows = []
+    regressions = []
+    for result in current['results']:
+        for phase, stats in result['phases'].items():
+            before = old.get((result['size'], phase))
+            if not before:
+                continue
+            change = stats['seconds'] / before - 1
+            row = (result['size'], phase, before, stats['seconds'], change)
+            rows.append(row)
+            if change > threshold:
+                regressions.append(row)
+    return rows, regressions
+
+
+def format_results(document):
+    rows = []
+    for result in document['results']:
+        for phase in PHASES:
+            stats = result['phases'][phase]
+            rows.append((result['size'], phase, f"{result['tokens']:,}", f"{result['nodes']:,}",
+                         f"{stats['seconds'] * 1000:.1f}ms", f"{stats['tokens_per_sec']:,.0f}",
+                         f"{stats['nodes_per_sec']:,.0f}", f"{stats['peak_bytes'] / 1024:,.0f}KiB"))
+    return format_table(('functions', 'phase', 'tokens', 'nodes', 'time', 'tokens/s', 'nodes/s', 'peak'),
+                        rows)
+
+
+def format_comparison(rows):
+    return format_table(('functions', 'phase', 'baseline', 'current', 'change'),
+                        [(size, phase, f"{before * 1000:.1f}ms", f"{after * 1000:.1f}ms", f"{change:+.1%}")
+                         for size, phase, before, after, change in rows])
+
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(description="Benchmark the compiler phases.")
+    arg_parser.add_argument("--sizes", default="10,100,1000", help="comma-separated function counts")
+    arg_parser.add_argument("--repeat", type=int, default=3, help="runs per phase; the fastest counts")
+    arg_parser.add_argument("--seed", type=int, default=0)
+    defaults = ProgramShape()
+    for field, value in defaults.to_dict().items():
+        if field != 'functions':
+            arg_parser.add_argument("--" + field.replace("_", "-"), type=int, default=value)
+    arg_parser.add_argument("--output", help="write the results to this JSON file")
+    arg_parser.add_argument("--baseline", help="compare against results from an earlier run")
+    arg_parser.add_argument("--threshold", type=float, default=0.1,
+                            help="slowdown that counts as a regression (default: 0.1)")
+    args = arg_parser.parse_args(argv)
+
+    sizes = [int(size) for size in args.sizes.split(",") if size]
+    shape = ProgramShape(**{field: getattr(args, field) for field in defaults.to_dict() if field != 'functions'})
+    document = run(sizes, shape, args.seed, max(args.repeat, 1))
+    print(format_results(document))
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump(document, file, indent=2)
+        print(f"\n💾 Results written to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as file:
+            baseline = json.load(file)
+        if baseline.get('shape') != document['shape'] or baseline.get('seed') != document['seed']:
+            print("\n⚠️ Baseline was generated with a different shape or seed; timings may not be comparable.")
+        rows, regressions = compare(baseline, document, args.threshold)
+        print(f"\n📊 Compared with {args.baseline}:")
+        print(format_comparison(rows))
+        if regressions:
+            print(f"\n❌ {len(regressions)} phase timings regressed by more than {args.threshold:.0%}.")
+            return 1
+        print(f"\n✅ No phase regressed by more than {args.threshold:.0%}.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
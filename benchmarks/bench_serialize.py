@@ -0,0 +1,60 @@
+"""Compare scripts.serialize with pickle for one large generated file's AST
+and TAC: encoded size, dump time, full load time, and the time to open a
+file and get one function out of it.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_serialize [--functions 400] [--repeat 5]
+
+Every binary load is checked against the original.
+"""
+import argparse
+import pickle
+import sys
+
+from benchmarks.harness import best_of, format_table
+from benchmarks.program_generator import ProgramShape, generate_program
+from scripts import compiler, serialize
+from scripts.context import CompilationContext
+
+
+def compare(label, value, dump, load, whole, one, repeat):
+    pickled = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+    binary = dump(value)
+    if whole(load(binary)) != value:
+        raise AssertionError(f"{label} did not round-trip")
+    middle = len(value.functions) // 2
+    timings = [
+        (best_of(lambda: pickle.dumps(value, pickle.HIGHEST_PROTOCOL), repeat)[0], best_of(lambda: dump(value), repeat)[0]),
+        (best_of(lambda: pickle.loads(pickled), repeat)[0], best_of(lambda: whole(load(binary)), repeat)[0]),
+        (best_of(lambda: pickle.loads(pickled).functions[middle], repeat)[0],
+         best_of(lambda: one(load(binary), middle), repeat)[0]),
+    ]
+    rows = [(label, "size", f"{len(pickled) / 1024:,.0f}KB", f"{len(binary) / 1024:,.0f}KB",
+             f"{len(pickled) / len(binary):.2f}x")]
+    for name, (pickle_seconds, binary_seconds) in zip(("dump", "load", "one function"), timings):
+        rows.append((label, name, f"{pickle_seconds * 1000:.1f}ms", f"{binary_seconds * 1000:.1f}ms",
+                     f"{pickle_seconds / binary_seconds:.2f}x"))
+    return rows
+
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(description="Compare the binary AST/TAC format with pickle.")
+    arg_parser.add_argument("--functions", type=int, default=400)
+    arg_parser.add_argument("--repeat", type=int, default=5)
+    args = arg_parser.parse_args(argv)
+
+    source = generate_program(ProgramShape(functions=args.functions))
+    result = compiler.compile_source(source, CompilationContext())
+    print(f"📊 {len(result.ast.functions):,} functions, "
+          f"{sum(len(function.code) for function in result.module.functions):,} TAC instructions")
+    rows = compare("AST", result.ast, serialize.dump_ast, serialize.load_ast,
+                   lambda reader: reader.program(), lambda reader, number: reader.function(number), args.repeat)
+    rows += compare("TAC", result.module, serialize.dump_module, serialize.load_module,
+                    lambda reader: reader.module(), lambda reader, number: reader.function(number), args.repeat)
+    print(format_table(("payload", "measure", "pickle", "binary", "gain"), rows))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
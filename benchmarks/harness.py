@@ -0,0 +1,24 @@
+"""Timing helpers shared by the benchmark scripts."""
+import time
+
+
+def best_of(function, repeat=5):
+    """Call `function` `repeat` times; return (fastest seconds, last result)."""
+    best = float('inf')
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def format_table(headers, rows):
+    """Right-aligned columns sized to fit, the first column left-aligned."""
+    table = [list(map(str, headers))] + [[str(cell) for cell in row] for row in rows]
+    widths = [max(len(row[i]) for row in table) for i in range(len(headers))]
+    lines = []
+    for row in table:
+        cells = [row[0].ljust(widths[0])] + [cell.rjust(width) for cell, width in zip(row[1:], widths[1:])]
+        lines.append("  ".join(cells))
+    return "\n".join(lines)
@@ -0,0 +1,151 @@
+"""Seeded generator of valid MiniLang++ programs for benchmarking.
+
+    python -m benchmarks.program_generator [--functions N] [--depth N]
+        [--expression-length N] [--identifiers N] [--statements N] [--seed N]
+
+prints one program. Every generated program lexes, parses and analyzes
+without diagnostics: all values are int, names are declared before use,
+and functions only call functions defined above them. The programs are
+meant to be compiled, not run: loops are short and nothing recurses, but
+values can still grow very large.
+"""
+import argparse
+import random
+import sys
+from dataclasses import dataclass, asdict
+
+OPERATORS = ('+', '-', '*', '/')
+COMPARISONS = ('<', '>', '=')
+
+
+@dataclass
+class ProgramShape:
+    functions: int = 10         # Functions besides main
+    depth: int = 3              # Deepest nesting of if/while blocks
+    expression_length: int = 6  # Operands per expression
+    identifiers: int = 8        # Locals declared at the top of each function
+    statements: int = 5         # Statements per block
+
+    def to_dict(self):
+        return asdict(self)
+
+
+class _Generator:
+    def __init__(self, shape, rng):
+        self.shape = shape
+        self.rng = rng
+        self.lines = []
+        self.arity = {}         # Functions defined so far
+        self.counters = 0       # Loop counters get names of their own
+
+    def program(self):
+        for index in range(self.shape.functions):
+            self.function(f"f{index}", self.rng.randint(0, 3))
+        self.main()
+        return "\n".join(self.lines) + "\n"
+
+    def function(self, name, arity):
+        params = [f"p{i}" for i in range(arity)]
+        self.lines.append(f"int {name}({', '.join('int ' + p for p in params)}) {{")
+        names = list(params)
+        for i in range(self.shape.identifiers):
+            self.lines.append(f"  int v{i} = {self.expression(names)};")
+            names.append(f"v{i}")
+        self.block(names, names[len(params):], 1)
+        self.lines.append(f"  return {self.expression(names)};")
+        self.lines.append("}")
+        self.arity[name] = arity
+
+    def main(self):
+        self.lines.append("int main() {")
+        self.lines.append("  int result = 0;")
+        for name, arity in self.arity.items():
+            args = ', '.join(str(self.rng.randint(0, 9)) for _ in range(arity))
+            self.lines.append(f"  result = result + {name}({args});")
+        self.lines.append("  return result;")
+        self.lines.append("}")
+
+    def block(self, readable, writable, depth):
+        """Emit statements reading `readable` and assigning `writable`."""
+        rng = self.rng
+        indent = "  " * depth
+        for _ in range(self.shape.statements):
+            choice = rng.random()
+            if depth <= self.shape.depth and choice < 0.15:
+                self.lines.append(f"{indent}if ({self.condition(readable)}) {{")
+                self.block(readable, writable, depth + 1)
+                if rng.random() < 0.5:
+                    self.lines.append(f"{indent}}} else {{")
+                    self.block(readable, writable, depth + 1)
+                self.lines.append(f"{indent}}}")
+            elif depth <= self.shape.depth and choice < 0.25:
+                counter = f"i{self.counters}"
+                self.counters += 1
+                self.lines.append(f"{indent}int {counter} = 0;")
+                self.lines.append(f"{indent}while ({counter} < {rng.randint(1, 4)}) {{")
+                self.lines.append(f"{indent}  {counter} = {counter} + 1;")
+                self.block(readable + [counter], writable, depth + 1)
+                self.lines.append(f"{indent}}}")
+            elif choice < 0.3 and self.arity:
+                self.lines.append(f"{indent}{self.call(readable)};")
+            elif writable:
+                self.lines.append(f"{indent}{rng.choice(writable)} = {self.expression(readable)};")
+
+    def condition(self, names):
+        length = max(self.shape.expression_length // 2, 1)
+        return (f"{self.expression(names, length)} {self.rng.choice(COMPARISONS)} "
+                f"{self.expression(names, length)}")
+
+    def expression(self, names, length=None):
+        rng = self.rng
+        length = length or self.shape.expression_length
+        parts = [self.operand(names)]
+        open_parens = 0
+        for _ in range(length - 1):
+            parts.append(rng.choice(OPERATORS))
+            if rng.random() < 0.1:
+                parts.append("(")
+                open_parens += 1
+            parts.append(self.operand(names))
+            if open_parens and rng.random() < 0.3:
+                parts.append(")")
+                open_parens -= 1
+        parts.append(")" * open_parens)
+        return " ".join(parts).replace("( ", "(").replace(" )", ")")
+
+    def operand(self, names):
+        rng = self.rng
+        choice = rng.random()
+        if choice < 0.05 and self.arity:
+            return self.call(names)
+        if choice < 0.3 or not names:
+            return str(rng.randint(0, 99))
+        return rng.choice(names)
+
+    def call(self, names):
+        rng = self.rng
+        name = rng.choice(list(self.arity))
+        args = (rng.choice(names) if names else str(rng.randint(0, 99)) for _ in range(self.arity[name]))
+        return f"{name}({', '.join(args)})"
+
+
+def generate_program(shape=None, seed=0):
+    """Return the source of a program with the given shape. The same shape
+    and seed always give the same program."""
+    return _Generator(shape or ProgramShape(), random.Random(seed)).program()
+
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(description="Print a generated MiniLang++ program.")
+    defaults = ProgramShape()
+    for field, value in defaults.to_dict().items():
+        arg_parser.add_argument("--" + field.replace("_", "-"), type=int, default=value)
+    arg_parser.add_argument("--seed", type=int, default=0)
+    args = arg_parser.parse_args(argv)
+    shape = ProgramShape(**{field: getattr(args, field) for field in defaults.to_dict()})
+    sys.stdout.write(generate_program(shape, args.seed))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
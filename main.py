@@ -1,37 +1,108 @@
-import sys
-from scripts import lexer, parser, semantic_analyzer
-from scripts.parser import Parser
-from scripts import intermediate_code
-def main():
-    with open("test/sample1", "r", encoding="utf-8") as file:
-
-        code = file.read()
-
-    print("📥 Lexing...")
-    tokens = lexer.tokenize(code)
-    print("📤 Tokens:")
-    for tok in tokens:
-        print(f"  {tok}")
-
-    print("\n🧱 Parsing...")
-    ast = Parser(tokens).parse()
-
-    print("\n🌳 AST Structure:")
-    for func in ast.functions:
-        print(f"Function: {func.name} -> {func.return_type}")
-        if func.params:
-            print("  Params:")
-            for param in func.params:
-                print(f"    {param.param_type} {param.name}")
-        print("  Body:")
-        for stmt in func.body:
-            print(f"    {stmt.value}")
-
-    print("\n🧠 Semantic Analysis:")
-    semantic_analyzer.analyze(ast)
-
-    intermediate_code.generate_intermediate_code(ast)
-
-
-if __name__ == "__main__":
-    main()
+import argparse
+import sys
+from scripts import compiler, optimizer, regalloc, tac
+from scripts.context import CompilationContext
+from scripts.ast import If, While, to_source
+from scripts.cache import ArtifactCache
+from scripts.metrics import Metrics
+
+def print_block(stmts, indent):
+    for stmt in stmts:
+        print(f"{indent}{to_source(stmt)}")
+        if isinstance(stmt, If):
+            print_block(stmt.then_body, indent + "  ")
+            if stmt.else_body:
+                print(f"{indent}else")
+                print_block(stmt.else_body, indent + "  ")
+        elif isinstance(stmt, While):
+            print_block(stmt.body, indent + "  ")
+
+def print_tokens(tokens):
+    print("📤 Tokens:")
+    for tok in tokens:
+        print(f"  {tok}")
+
+def print_ast(ast):
+    print("\n🌳 AST Structure:")
+    for func in ast.functions:
+        print(f"Function: {func.name} -> {func.return_type}")
+        if func.params:
+            print("  Params:")
+            for param in func.params:
+                print(f"    {param.param_type} {param.name}")
+        print("  Body:")
+        print_block(func.body, "    ")
+
+def print_frames(frames):
+    print("\n📦 Frame sizes (slots per call):")
+    print(regalloc.format_frames(frames))
+
+def print_metrics(metrics, format, path=None):
+    report = metrics.to_json() if format == "json" else metrics.format_text()
+    if path:
+        with open(path, "w", encoding="utf-8") as file:
+            file.write(report + "\n")
+        print(f"\n📊 Metrics written to {path}")
+    else:
+        print("\n📊 Metrics:")
+        print(report)
+
+def print_tac(module):
+    print("\n🧾 Intermediate Code (TAC):")
+    tac.write_module(module, sys.stdout)
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(description="MiniLang++ compiler front end")
+    arg_parser.add_argument("source", nargs="?", default="test/sample1")
+    arg_parser.add_argument("--cache-dir", help="reuse compiled artifacts stored in this directory")
+    arg_parser.add_argument("-O", "--optimize", action="store_true", help="optimize the generated TAC")
+    arg_parser.add_argument("--allocate", action="store_true",
+                            help="reuse temp names across live ranges and print frame sizes")
+    arg_parser.add_argument("--lexer", choices=("regex", "dfa"), default="regex",
+                            help="scanner backend; both produce the same tokens (default: regex)")
+    arg_parser.add_argument("--max-errors", type=int, help="stop collecting errors after this many")
+    arg_parser.add_argument("-j", "--jobs", type=int,
+                            help="lex large files and check and lower function bodies on this many processes")
+    arg_parser.add_argument("--metrics", nargs="?", const="text", choices=("text", "json"),
+                            help="report per-phase timings and counters (default format: text)")
+    arg_parser.add_argument("--metrics-output", help="write the metrics report to this file")
+    arg_parser.add_argument("--profile", action="store_true", help="add a cProfile summary to the metrics")
+    arg_parser.add_argument("--trace-memory", action="store_true",
+                            help="add each phase's tracemalloc peak to the metrics")
+    args = arg_parser.parse_args(argv)
+
+    options = {}
+    if args.optimize:
+        options["optimize"] = True
+    if args.allocate:
+        options["allocate"] = True
+    if args.max_errors is not None:
+        options["max_errors"] = args.max_errors
+    if args.lexer != "regex":
+        options["lexer"] = args.lexer
+    metrics = None
+    if args.metrics or args.metrics_output or args.profile or args.trace_memory:
+        metrics = Metrics(profile=args.profile, trace_memory=args.trace_memory)
+    cache = ArtifactCache(args.cache_dir) if args.cache_dir else None
+    result = compiler.compile_file(args.source, CompilationContext(metrics=metrics, jobs=args.jobs, **options), cache)
+    if result.cached:
+        print(f"♻️ Using cached artifacts for {args.source}")
+    print_tokens(result.tokens)
+    print_ast(result.ast)
+
+    print("\n🧠 Semantic Analysis:")
+    for message in result.diagnostics:
+        print(message)
+    print("✅ Compiled without errors." if result.ok else "❌ Compiled with errors.")
+    if args.optimize:
+        print("\n⚙️ Optimization passes (instructions before -> after):")
+        print(optimizer.format_report(result.pass_stats))
+    if args.allocate:
+        print_frames(result.frames)
+    print_tac(result.module)
+    if metrics is not None:
+        print_metrics(metrics, args.metrics or ("json" if args.metrics_output else "text"), args.metrics_output)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,48 +1,209 @@
-from dataclasses import dataclass
-from typing import List, Optional, Union
-
-@dataclass
-class Program:
-    functions: List['Function']
-
-@dataclass
-class Function:
-    return_type: str
-    name: str
-    params: List['Param']
-    body: List['Statement']
-
-@dataclass
-class Param:
-    param_type: str
-    name: str
-
-@dataclass
-class FunctionCall:
-    name: str
-    args: List[str]
-
-@dataclass
-class Expression:
-    left: Union[str, 'Expression']
-    operator: str
-    right: Union[str, 'Expression']
-
-@dataclass
-class IfStatement:
-    condition: Union[str, Expression]
-    true_branch: List['Statement']
-    false_branch: Optional[List['Statement']] = None
-
-@dataclass
-class WhileStatement:
-    condition: Union[str, Expression]
-    body: List['Statement']
-
-@dataclass
-class Statement:
-    value: str
-    func_call: Optional[FunctionCall] = None
-    if_stmt: Optional[IfStatement] = None
-    while_stmt: Optional[WhileStatement] = None
-    expression: Optional[Expression] = None
+from dataclasses import dataclass
+from typing import List, Optional, Union
+
+# Every node records the line/column of the token that starts it
+# (0 when the parser had no position for it).
+
+@dataclass(slots=True)
+class Program:
+    functions: List['Function']
+
+@dataclass(slots=True)
+class Function:
+    return_type: str
+    name: str
+    params: List['Param']
+    body: List['Stmt']
+    line: int = 0
+    column: int = 0
+
+@dataclass(slots=True)
+class Param:
+    param_type: str
+    name: str
+    line: int = 0
+    column: int = 0
+
+# Expressions
+
+@dataclass(slots=True)
+class Name:
+    id: str
+    line: int = 0
+    column: int = 0
+
+@dataclass(slots=True)
+class Literal:
+    value: str
+    type: str
+    line: int = 0
+    column: int = 0
+
+@dataclass(slots=True)
+class BinOp:
+    op: str
+    left: 'Expr'
+    right: 'Expr'
+    line: int = 0
+    column: int = 0
+
+@dataclass(slots=True)
+class Call:
+    name: str
+    args: List['Expr']
+    line: int = 0
+    column: int = 0
+
+Expr = Union[Name, Literal, BinOp, Call]
+
+# Statements
+
+@dataclass(slots=True)
+class VarDecl:
+    var_type: str
+    name: str
+    value: Expr
+    line: int = 0
+    column: int = 0
+
+@dataclass(slots=True)
+class Assign:
+    name: str
+    value: Expr
+    line: int = 0
+    column: int = 0
+
+@dataclass(slots=True)
+class Return:
+    value: Expr
+    line: int = 0
+    column: int = 0
+
+@dataclass(slots=True)
+class If:
+    condition: Expr
+    then_body: List['Stmt']
+    else_body: Optional[List['Stmt']] = None
+    line: int = 0
+    column: int = 0
+
+@dataclass(slots=True)
+class While:
+    condition: Expr
+    body: List['Stmt']
+    line: int = 0
+    column: int = 0
+
+# A bare call such as `f(x);` is used directly as a statement
+Stmt = Union[VarDecl, Assign, Return, If, While, Call]
+
+
+class NodeVisitor:
+    """Base class for passes over the AST.
+
+    `visit(node)` calls `visit_<NodeClass>(node, ...)`. The method for each
+    node type is looked up once per visitor class and kept in that class's
+    dispatch table, so visiting is one dict lookup plus the call.
+    """
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls._dispatch = {}
+
+    def visit(self, node, *args):
+        method = self._dispatch.get(node.__class__)
+        if method is None:
+            cls = self.__class__
+            method = getattr(cls, 'visit_' + node.__class__.__name__, cls.generic_visit)
+            cls._dispatch[node.__class__] = method
+        return method(self, node, *args)
+
+    def generic_visit(self, node, *args):
+        raise TypeError(f"{self.__class__.__name__} cannot visit {node.__class__.__name__}")
+
+
+# Attributes holding child nodes (a node, a list of nodes or None), in source order
+CHILD_FIELDS = {
+    Program: ('functions',),
+    Function: ('params', 'body'),
+    BinOp: ('left', 'right'),
+    Call: ('args',),
+    VarDecl: ('value',),
+    Assign: ('value',),
+    Return: ('value',),
+    If: ('condition', 'then_body', 'else_body'),
+    While: ('condition', 'body'),
+}
+
+
+def walk(node):
+    """Yield `node` and every node below it in source order, without recursing."""
+    stack = [node]
+    pop = stack.pop
+    push = stack.append
+    while stack:
+        node = pop()
+        yield node
+        fields = CHILD_FIELDS.get(node.__class__)
+        if fields is None:
+            continue
+        for name in reversed(fields):
+            child = getattr(node, name)
+            if child.__class__ is list:
+                stack.extend(reversed(child))
+            elif child is not None:
+                push(child)
+
+
+class SourceFormatter(NodeVisitor):
+    """Render expressions as source text and statements as a one-line summary."""
+
+    def visit_Name(self, node):
+        return node.id
+
+    def visit_Literal(self, node):
+        return node.value
+
+    def visit_BinOp(self, node):
+        # In-order walk with an explicit stack of nodes and literal text,
+        # joined once, so deep or long expressions neither recurse nor
+        # copy their text at every level
+        parts = []
+        stack = [node]
+        while stack:
+            item = stack.pop()
+            if item.__class__ is str:
+                parts.append(item)
+            elif item.__class__ is not BinOp:
+                parts.append(self.visit(item))
+            else:
+                for operand, text in ((item.right, None), (None, f" {item.op} "), (item.left, None)):
+                    if operand is None:
+                        stack.append(text)
+                    elif operand.__class__ is BinOp:
+                        stack.extend((")", operand, "("))
+                    else:
+                        stack.append(operand)
+        return "".join(parts)
+
+    def visit_Call(self, node):
+        return f"{node.name}({', '.join(self.visit(arg) for arg in node.args)})"
+
+    def visit_VarDecl(self, node):
+        return f"{node.var_type} {node.name} = {self.visit(node.value)}"
+
+    def visit_Assign(self, node):
+        return f"{node.name} = {self.visit(node.value)}"
+
+    def visit_Return(self, node):
+        return f"return {self.visit(node.value)}"
+
+    def visit_If(self, node):
+        return f"if ({self.visit(node.condition)})"
+
+    def visit_While(self, node):
+        return f"while ({self.visit(node.condition)})"
+
+
+def to_source(node):
+    return SourceFormatter().visit(node)
@@ -0,0 +1,98 @@
+"""Compile every source file under a directory across worker processes.
+
+    python -m scripts.batch SOURCE_DIR [-o OUT_DIR] [-j WORKERS] [--glob PATTERN]
+                                       [--cache-dir DIR] [-O] [--allocate]
+
+Each file is compiled in its own CompilationContext, so the output for a
+file does not depend on which worker compiled it or what ran before.
+"""
+import argparse
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from scripts import compiler, tac
+from scripts.cache import ArtifactCache
+from scripts.context import CompilationContext
+from scripts.diagnostics import Diagnostic, ERROR, INTERNAL_ERROR, IO_ERROR
+
+
+def compile_path(path, options=None, cache_dir=None):
+    """Worker entry point; returns (path, tac_text, diagnostics, cache_hit)."""
+    ctx = CompilationContext(**(options or {}))
+    cache = ArtifactCache(cache_dir) if cache_dir else None
+    try:
+        result = compiler.compile_file(path, ctx, cache)
+        text = tac.format_module(result.module)
+    except OSError as e:
+        message = f"❌ Cannot read {path}: {e.strerror}"
+        return str(path), None, [Diagnostic(ERROR, IO_ERROR, message)], False
+    except Exception as e:
+        # One bad file must not abort the pool and lose every other result
+        message = f"❌ Internal compiler error in {path}: {type(e).__name__}: {e}"
+        return str(path), None, [Diagnostic(ERROR, INTERNAL_ERROR, message)], False
+    return str(path), text, result.diagnostics, result.cached
+
+
+def find_sources(directory, pattern="*"):
+    return sorted(p for p in Path(directory).rglob(pattern) if p.is_file() and p.suffix != ".tac")
+
+
+def compile_directory(directory, output_dir=None, workers=None, pattern="*", options=None, cache_dir=None):
+    """Compile all matching files and return [(path, tac_text, diagnostics,
+    cache_hit)] in sorted path order. With output_dir, TAC is written to
+    <rel_path>.tac."""
+    paths = find_sources(directory, pattern)
+    workers = workers or os.cpu_count() or 1
+    chunksize = max(1, len(paths) // (workers * 4))
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        results = list(pool.map(compile_path, paths, [options] * len(paths),
+                                [cache_dir] * len(paths), chunksize=chunksize))
+
+    if output_dir is not None:
+        for path, text, _, _ in results:
+            if text is None:
+                continue
+            target = Path(output_dir) / Path(path).relative_to(directory)
+            target = target.with_name(target.name + ".tac")
+            target.parent.mkdir(parents=True, exist_ok=True)
+            target.write_text(text, encoding="utf-8")
+    return results
+
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(description="Compile a directory of MiniLang++ sources in parallel.")
+    arg_parser.add_argument("source_dir")
+    arg_parser.add_argument("-o", "--output-dir", help="write <file>.tac here")
+    arg_parser.add_argument("-j", "--workers", type=int, help="worker processes (default: CPU count)")
+    arg_parser.add_argument("--glob", default="*", help="source file pattern (default: *)")
+    arg_parser.add_argument("--cache-dir", help="skip files whose compiled artifacts are cached here")
+    arg_parser.add_argument("-O", "--optimize", action="store_true", help="optimize the generated TAC")
+    arg_parser.add_argument("--allocate", action="store_true", help="reuse temp names across live ranges")
+    args = arg_parser.parse_args(argv)
+
+    options = {}
+    if args.optimize:
+        options["optimize"] = True
+    if args.allocate:
+        options["allocate"] = True
+    results = compile_directory(args.source_dir, args.output_dir, args.workers, args.glob,
+                                options=options, cache_dir=args.cache_dir)
+    failed = 0
+    for path, _, diagnostics, _ in results:
+        if diagnostics:
+            failed += 1
+            print(f"❌ {path}")
+            for message in diagnostics:
+                print(f"    {message}")
+    print(f"✅ Compiled {len(results)} files, {failed} with errors.")
+    if args.cache_dir:
+        hits = sum(1 for result in results if result[3])
+        print(f"♻️ Cache: {hits} hits, {len(results) - hits} misses")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,293 @@
+"""Separate compilation of a directory of modules with interface files.
+
+    python -m scripts.build SOURCE_DIR BUILD_DIR [--glob PATTERN] [-O] [--allocate]
+
+Every source file under SOURCE_DIR is a module named by its relative path.
+A module may call any function another module defines; there is no import
+syntax, so a module's dependencies are the modules defining the functions
+it calls but does not define itself. BUILD_DIR mirrors the source tree:
+
+    <module>.iface   exported signatures and a hash of them (JSON)
+    <module>.tac     the module's TAC
+    manifest.json    per module: source hash, interface hash, the names it
+                     imports, the interface hash of each dependency it was
+                     checked against, and its diagnostics
+
+A module is checked against its dependencies' interface files only; their
+sources are not read. It is parsed again only when its source hash
+changed, and checked and lowered again only when its source changed or
+one of its dependencies' interface hash did. Editing a function body
+leaves the interface hash alone, so dependents are reused. Changing the
+compiler version or the options rebuilds everything. The outputs of a
+module whose source was deleted are removed.
+
+Two modules defining the same function is reported on the later one (in
+path order), which keeps its own definition; calls from other modules go
+to the first.
+"""
+import argparse
+import hashlib
+import json
+import os
+import sys
+import tempfile
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from scripts import compiler, lexer, tac
+from scripts.ast import Call, walk
+from scripts.batch import find_sources
+from scripts.context import CompilationContext
+from scripts.diagnostics import Diagnostic, Span, REDECLARED_SYMBOL, ERROR
+from scripts.parser import Parser
+from scripts.token_stream import TokenStream
+
+FORMAT = 1
+MANIFEST = "manifest.json"
+INTERFACE_SUFFIX = ".iface"
+
+
+@dataclass
+class Interface:
+    module: str
+    functions: Dict[str, Tuple[List[str], str]]   # Name -> (param_types, return_type)
+    hash: str = ""
+
+    def __post_init__(self):
+        if not self.hash:
+            self.hash = self.compute_hash()
+
+    def compute_hash(self):
+        # Positions are left out, so moving code around keeps dependents
+        text = json.dumps(sorted((name, list(params), ret) for name, (params, ret) in self.functions.items()))
+        return hashlib.sha256(text.encode()).hexdigest()
+
+    def to_json(self):
+        return json.dumps({'format': FORMAT, 'compiler': compiler.COMPILER_VERSION, 'module': self.module,
+                           'hash': self.hash, 'functions': [[name, params, ret] for name, (params, ret)
+                                                            in sorted(self.functions.items())]},
+                          separators=(',', ':'))
+
+    @classmethod
+    def from_json(cls, text):
+        data = json.loads(text)
+        if data.get('format') != FORMAT or data.get('compiler') != compiler.COMPILER_VERSION:
+            return None
+        interface = cls(data['module'], {name: (params, ret) for name, params, ret in data['functions']},
+                        data['hash'])
+        return interface if interface.hash == interface.compute_hash() else None
+
+
+@dataclass
+class ModuleResult:
+    name: str
+    interface: Interface
+    diagnostics: List[Diagnostic]
+    analyzed: bool                  # False when reused from the manifest
+    dependencies: Dict[str, str] = field(default_factory=dict)   # Module -> interface hash
+
+    @property
+    def ok(self):
+        return not any(d.severity == ERROR for d in self.diagnostics)
+
+
+class _Unit:
+    def __init__(self, name, path, data, entry):
+        self.name = name
+        self.path = path
+        self.data = data
+        self.source_hash = hashlib.sha256(data).hexdigest()
+        self.entry = entry if entry and entry.get('source_hash') == self.source_hash else None
+        self.interface: Optional[Interface] = None
+        self.imports = self.entry['imports'] if self.entry else []
+        self.ctx = self.tokens = self.ast = None
+
+    def parse(self, options):
+        self.ctx = CompilationContext(**options)
+        code = self.data.decode('utf-8', 'replace')
+        self.tokens = TokenStream.from_tokens(lexer.tokenize_iter(code, self.ctx))
+        self.ast = Parser(self.tokens, self.ctx).parse()
+        defined = {func.name for func in self.ast.functions}
+        self.imports = sorted({node.name for node in walk(self.ast)
+                               if node.__class__ is Call and node.name not in defined})
+        self.interface = Interface(self.name, {func.name: ([p.param_type for p in func.params], func.return_type)
+                                               for func in self.ast.functions})
+
+
+def build(source_dir, build_dir, pattern="*", options=None):
+    """Bring BUILD_DIR up to date with SOURCE_DIR; return a ModuleResult per
+    module, in path order."""
+    source_dir, build_dir = Path(source_dir), Path(build_dir)
+    options = options or {}
+    build_dir.mkdir(parents=True, exist_ok=True)
+    entries, previous = _read_manifest(build_dir, options)
+    skip = build_dir.resolve()
+
+    units = []
+    for path in find_sources(source_dir, pattern):
+        if path.resolve().is_relative_to(skip):
+            continue
+        name = path.relative_to(source_dir).as_posix()
+        unit = _Unit(name, path, path.read_bytes(), entries.get(name))
+        if unit.entry:
+            unit.interface = _read_interface(build_dir / (name + INTERFACE_SUFFIX), unit.entry['interface_hash'])
+        if unit.interface is None:
+            unit.parse(options)
+            _write_if_changed(build_dir / (name + INTERFACE_SUFFIX), unit.interface.to_json())
+        units.append(unit)
+
+    providers = {}
+    duplicates = {}   # Module -> [(function, first module)]
+    for unit in units:
+        for function in unit.interface.functions:
+            first = providers.setdefault(function, unit.name)
+            if first != unit.name:
+                duplicates.setdefault(unit.name, []).append((function, first))
+    interfaces = {unit.name: unit.interface for unit in units}
+
+    results = []
+    manifest = {}
+    for unit in units:
+        dependencies = {}
+        externals = {}
+        for function in unit.imports:
+            provider = providers.get(function)
+            if provider is not None and provider != unit.name:
+                dependencies[provider] = interfaces[provider].hash
+                externals[function] = interfaces[provider].functions[function]
+        tac_path = build_dir / (unit.name + ".tac")
+        entry = unit.entry
+        if entry and entry['dependencies'] == dependencies and tac_path.exists():
+            diagnostics = [_diagnostic_from_dict(item) for item in entry['diagnostics']]
+            analyzed = False
+        else:
+            if unit.ast is None:
+                unit.parse(options)
+            result = compiler.compile_ast(unit.tokens, unit.ast, unit.ctx, str(unit.path), externals)
+            _write_if_changed(tac_path, tac.format_module(result.module))
+            diagnostics = list(result.diagnostics)
+            analyzed = True
+        manifest[unit.name] = {
+            'source_hash': unit.source_hash,
+            'interface_hash': unit.interface.hash,
+            'imports': unit.imports,
+            'dependencies': dependencies,
+            'diagnostics': [_diagnostic_to_dict(d) for d in diagnostics],
+        }
+        for function, first in duplicates.get(unit.name, ()):
+            diagnostics.append(Diagnostic(ERROR, REDECLARED_SYMBOL,
+                                          f"❌ Function '{function}' is already defined in {first}."))
+        results.append(ModuleResult(unit.name, unit.interface, diagnostics, analyzed, dependencies))
+
+    _write_if_changed(build_dir / MANIFEST, json.dumps(
+        {'format': FORMAT, 'compiler': compiler.COMPILER_VERSION, 'options': _options_key(options),
+         'modules': manifest}, indent=1, sort_keys=True))
+    for name in sorted(previous - manifest.keys()):
+        _remove_outputs(build_dir, name)
+    return results
+
+
+def _options_key(options):
+    return repr(sorted(options.items()))
+
+
+def _read_manifest(build_dir, options):
+    """The manifest's entries, empty if another compiler or other options
+    wrote it, and the names of all the modules it lists either way."""
+    try:
+        data = json.loads((build_dir / MANIFEST).read_text(encoding="utf-8"))
+        modules = data.get('modules', {})
+        names = set(modules)
+    except (OSError, ValueError, AttributeError, TypeError):
+        return {}, set()
+    if (data.get('format') != FORMAT or data.get('compiler') != compiler.COMPILER_VERSION
+            or data.get('options') != _options_key(options)):
+        return {}, names
+    return modules, names
+
+
+def _remove_outputs(build_dir, name):
+    """Delete the files a module whose source is gone left behind, and any
+    directories that leaves empty."""
+    for suffix in (".tac", INTERFACE_SUFFIX):
+        try:
+            os.remove(build_dir / (name + suffix))
+        except FileNotFoundError:
+            pass
+    directory = (build_dir / name).parent
+    while directory != build_dir:
+        try:
+            directory.rmdir()
+        except OSError:
+            break   # Not empty
+        directory = directory.parent
+
+
+def _read_interface(path, expected_hash):
+    try:
+        interface = Interface.from_json(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+    return interface if interface is not None and interface.hash == expected_hash else None
+
+
+def _write_if_changed(path, text):
+    """Write atomically, leaving the file (and its mtime) alone if unchanged."""
+    try:
+        if path.read_text(encoding="utf-8") == text:
+            return
+    except (OSError, ValueError):
+        pass
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=".tmp-")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as file:
+            file.write(text)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+
+
+def _diagnostic_to_dict(diagnostic):
+    span = diagnostic.span
+    return {'severity': diagnostic.severity, 'code': diagnostic.code, 'message': diagnostic.message,
+            'line': span.line if span else None, 'column': span.column if span else None}
+
+
+def _diagnostic_from_dict(item):
+    span = None if item['line'] is None else Span(item['line'], item['column'])
+    return Diagnostic(item['severity'], item['code'], item['message'], span)
+
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(description="Build a directory of MiniLang++ modules incrementally.")
+    arg_parser.add_argument("source_dir")
+    arg_parser.add_argument("build_dir", help="interface files, TAC and the manifest go here")
+    arg_parser.add_argument("--glob", default="*", help="source file pattern (default: *)")
+    arg_parser.add_argument("-O", "--optimize", action="store_true", help="optimize the generated TAC")
+    arg_parser.add_argument("--allocate", action="store_true", help="reuse temp names across live ranges")
+    args = arg_parser.parse_args(argv)
+
+    options = {}
+    if args.optimize:
+        options["optimize"] = True
+    if args.allocate:
+        options["allocate"] = True
+    results = build(args.source_dir, args.build_dir, args.glob, options)
+    failed = 0
+    for result in results:
+        if not result.ok:
+            failed += 1
+            print(f"❌ {result.name}")
+            for message in result.diagnostics:
+                print(f"    {message}")
+    analyzed = sum(1 for result in results if result.analyzed)
+    print(f"✅ Built {len(results)} modules, {failed} with errors.")
+    print(f"♻️ {analyzed} checked and lowered, {len(results) - analyzed} reused")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,170 @@
+import hashlib
+import os
+import pickle
+import tempfile
+from dataclasses import dataclass
+from pathlib import Path
+
+from scripts.compiler import COMPILER_VERSION
+
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+SIZE_FILE = "size"
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    stores: int = 0
+    evictions: int = 0
+
+    @property
+    def hit_rate(self):
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+class ArtifactCache:
+    """Content-addressed on-disk cache of compilation results.
+
+    Entries live at <directory>/<key[:2]>/<key>.pkl and the key is a hash of
+    the compiler version, the compile options and the source bytes, so a
+    changed source or compiler never hits a stale entry. Files are written
+    to a temp file and renamed into place, so concurrent processes only ever
+    see complete entries. A hit refreshes the entry's mtime, and the oldest
+    entries are evicted once the directory exceeds `max_bytes`.
+
+    The running total lives in <directory>/size, so a put costs one small
+    read and write instead of a scan of every entry. Concurrent writers can
+    lose each other's updates; that only delays eviction, and every
+    eviction rescans the directory and rewrites the exact total. A missing
+    or unreadable size file is rebuilt the same way.
+    """
+
+    def __init__(self, directory, max_bytes=DEFAULT_MAX_BYTES, version=COMPILER_VERSION):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self.version = version
+        self.stats = CacheStats()
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    def _hasher(self, options):
+        hasher = hashlib.sha256(self.version.encode())
+        hasher.update(b"\0" + repr(sorted((options or {}).items())).encode() + b"\0")
+        return hasher
+
+    def key(self, source: bytes, options=None):
+        hasher = self._hasher(options)
+        hasher.update(source)
+        return hasher.hexdigest()
+
+    def key_for_file(self, path, options=None):
+        hasher = self._hasher(options)
+        with open(path, "rb") as file:
+            for block in iter(lambda: file.read(1 << 20), b""):
+                hasher.update(block)
+        return hasher.hexdigest()
+
+    def _entry_path(self, key):
+        return self.directory / key[:2] / f"{key}.pkl"
+
+    def get(self, key):
+        path = self._entry_path(key)
+        try:
+            with open(path, "rb") as file:
+                value = pickle.load(file)
+        except FileNotFoundError:
+            self.stats.misses += 1
+            return None
+        except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ImportError):
+            # Unreadable or written by an incompatible build; drop it
+            self._remove(path)
+            self.stats.misses += 1
+            return None
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        self.stats.hits += 1
+        return value
+
+    def put(self, key, value):
+        path = self._entry_path(key)
+        path.parent.mkdir(exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as file:
+                pickle.dump(value, file, protocol=pickle.HIGHEST_PROTOCOL)
+            try:
+                replaced = path.stat().st_size   # Already counted in the size file
+            except FileNotFoundError:
+                replaced = 0
+            os.replace(tmp_path, path)
+        except BaseException:
+            self._remove(tmp_path)
+            raise
+        self.stats.stores += 1
+
+        size = self._read_size()
+        if size is None:
+            size = self.total_size()   # Includes the entry just written
+        else:
+            size += path.stat().st_size - replaced
+        if size > self.max_bytes:
+            self.evict()
+        else:
+            self._write_size(size)
+
+    def _read_size(self):
+        try:
+            return int((self.directory / SIZE_FILE).read_text(encoding="ascii"))
+        except (OSError, ValueError):
+            return None
+
+    def _write_size(self, size):
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "w", encoding="ascii") as file:
+                file.write(str(size))
+            os.replace(tmp_path, self.directory / SIZE_FILE)
+        except OSError:
+            self._remove(tmp_path)   # The next put or eviction rebuilds it
+
+    def _entries(self):
+        entries = []
+        for path in self.directory.glob("*/*.pkl"):
+            try:
+                st = path.stat()
+            except FileNotFoundError:
+                continue  # Evicted by another process
+            entries.append((st.st_mtime, st.st_size, path))
+        return entries
+
+    def total_size(self):
+        return sum(size for _, size, _ in self._entries())
+
+    def evict(self, target_bytes=None):
+        """Remove least recently used entries until the cache fits in
+        `target_bytes` (default: 90% of max_bytes)."""
+        if target_bytes is None:
+            target_bytes = int(self.max_bytes * 0.9)
+        entries = sorted(self._entries(), key=lambda entry: entry[0])
+        size = sum(entry[1] for entry in entries)
+        for _, entry_size, path in entries:
+            if size <= target_bytes:
+                break
+            if self._remove(path):
+                self.stats.evictions += 1
+            size -= entry_size
+        self._write_size(size)
+
+    def clear(self):
+        self.evict(target_bytes=0)
+
+    @staticmethod
+    def _remove(path):
+        try:
+            os.remove(path)
+            return True
+        except FileNotFoundError:
+            return False
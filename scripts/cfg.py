@@ -0,0 +1,439 @@
+from scripts import tac
+from scripts.tac import Instr, LABEL, GOTO, IF_FALSE, RETURN, is_constant, uses, defines
+
+# A function's TAC split into basic blocks. Labels and jumps are not kept
+# in the block code: a block records its label, the condition of a trailing
+# if_false, and the indices of its `fallthrough` (taken when the condition
+# holds, or always) and `jump` successors. flatten() regenerates labels and
+# jumps for any block order, so passes can add or drop blocks freely.
+
+
+class BasicBlock:
+    __slots__ = ('index', 'label', 'phis', 'code', 'cond', 'fallthrough', 'jump', 'preds')
+
+    def __init__(self, index, label=None):
+        self.index = index
+        self.label = label
+        self.phis = []
+        self.code = []           # Body, possibly ending in a return
+        self.cond = None         # Operand tested by a trailing if_false
+        self.fallthrough = None
+        self.jump = None
+        self.preds = []
+
+    @property
+    def succs(self):
+        if self.fallthrough is None:
+            return [] if self.jump is None else [self.jump]
+        return [self.fallthrough] if self.jump is None else [self.fallthrough, self.jump]
+
+    def redirect(self, old, new):
+        """Point the edge to block `old` at block `new` instead."""
+        if self.fallthrough == old:
+            self.fallthrough = new
+        else:
+            self.jump = new
+
+    def __repr__(self):
+        return f"<BasicBlock {self.index} {self.label or ''} -> {self.succs}>"
+
+
+class CFG:
+    """Basic blocks of one function; block 0 is the entry and `layout` is
+    the order flatten() writes them in."""
+
+    def __init__(self, name, params):
+        self.name = name
+        self.params = params
+        self.blocks = []
+        self.layout = []
+        self.label_count = 0
+
+    @property
+    def entry(self):
+        return self.blocks[0]
+
+    def new_block(self, after=None, before=None):
+        """Append an empty block, placing it in the layout next to another."""
+        block = BasicBlock(len(self.blocks))
+        self.blocks.append(block)
+        if after is not None:
+            self.layout.insert(self.layout.index(after) + 1, block.index)
+        elif before is not None:
+            self.layout.insert(self.layout.index(before), block.index)
+        else:
+            self.layout.append(block.index)
+        return block
+
+    def new_label(self):
+        self.label_count += 1
+        return f"L{self.label_count}"
+
+    def remove_edge(self, pred, succ):
+        """Forget the edge pred -> succ, dropping its phi operands."""
+        block = self.blocks[succ]
+        position = block.preds.index(pred)
+        del block.preds[position]
+        for phi in block.phis:
+            del phi.src2[position]
+
+    def split_edge(self, pred, succ):
+        """Insert an empty block on the edge pred -> succ and return it.
+        It is laid out so that the edge that fell through still does."""
+        if self.blocks[pred].fallthrough == succ:
+            middle = self.new_block(after=pred)
+        else:
+            middle = self.new_block(before=succ)
+        self.blocks[pred].redirect(succ, middle.index)
+        middle.fallthrough = succ
+        middle.preds.append(pred)
+        block = self.blocks[succ]
+        block.preds[block.preds.index(pred)] = middle.index
+        return middle
+
+    def skip_empty_blocks(self):
+        """Send the edges into blocks that only pass control on straight to
+        their successor; the bypassed blocks are then pruned."""
+        blocks = self.blocks
+        for block in blocks[1:]:
+            if block.code or block.phis or block.cond is not None or not block.succs:
+                continue
+            succ = block.succs[0]
+            target = blocks[succ]
+            if succ == block.index or target.phis:
+                continue
+            kept = []
+            for pred in block.preds:
+                if succ in blocks[pred].succs:
+                    kept.append(pred)   # Would become a second edge to succ
+                else:
+                    blocks[pred].redirect(block.index, succ)
+                    target.preds.append(pred)
+            block.preds = kept
+        return self.prune()
+
+    def prune(self):
+        """Drop blocks that cannot be reached from the entry and renumber
+        the rest. Returns True if anything was removed."""
+        reachable = reverse_postorder(self)
+        if len(reachable) == len(self.blocks):
+            return False
+        alive = set(reachable)
+        for index in reachable:
+            block = self.blocks[index]
+            for pred in [p for p in block.preds if p not in alive]:
+                self.remove_edge(pred, index)
+        renumber = {}
+        blocks = []
+        for index, block in enumerate(self.blocks):
+            if index in alive:
+                renumber[index] = block.index = len(blocks)
+                blocks.append(block)
+        for block in blocks:
+            block.preds = [renumber[p] for p in block.preds]
+            if block.fallthrough is not None:
+                block.fallthrough = renumber[block.fallthrough]
+            if block.jump is not None:
+                block.jump = renumber[block.jump]
+        self.blocks = blocks
+        self.layout = [renumber[i] for i in self.layout if i in alive]
+        return True
+
+
+def build_cfg(func: tac.Function) -> CFG:
+    cfg = CFG(func.name, func.params)
+    label_of = {}
+    jumps = []     # (block, goto or if_false instruction)
+    block = cfg.new_block()   # The entry never carries a label
+    ended = False
+    for instr in func.code:
+        op = instr.opcode
+        if op == LABEL:
+            if block.label is not None and not block.code and not ended:
+                label_of[instr.dest] = block   # Consecutive labels
+                continue
+            block = cfg.new_block()
+            block.label = instr.dest
+            label_of[instr.dest] = block
+            ended = False
+            continue
+        if ended:
+            block = cfg.new_block()
+            ended = False
+        if op == GOTO or op == IF_FALSE:
+            if op == IF_FALSE:
+                block.cond = instr.src1
+            jumps.append((block, instr))
+            ended = True
+        else:
+            # Copied so passes can rewrite blocks without touching `func`
+            block.code.append(Instr(op, instr.dest, instr.src1, instr.src2))
+            ended = op == RETURN
+    if jumps and jumps[-1][0] is block and block.cond is not None:
+        cfg.new_block()   # Somewhere for the final if_false to fall through to
+
+    blocks = cfg.blocks
+    jumped = set()
+    for block, instr in jumps:
+        jumped.add(block.index)
+        target = label_of[instr.dest].index
+        if instr.opcode == GOTO:
+            block.jump = target
+        elif target == block.index + 1:
+            block.cond = None   # Both edges lead to the same block
+            block.fallthrough = target
+        else:
+            block.fallthrough = block.index + 1
+            block.jump = target
+    for block in blocks:
+        if block.index in jumped or block.code and block.code[-1].opcode == RETURN:
+            continue
+        if block.index + 1 < len(blocks):
+            block.fallthrough = block.index + 1
+
+    for label in label_of:
+        if label[:1] == 'L' and label[1:].isdigit():
+            cfg.label_count = max(cfg.label_count, int(label[1:]))
+    for block in blocks:
+        for succ in block.succs:
+            blocks[succ].preds.append(block.index)
+    cfg.prune()
+    return cfg
+
+
+def flatten(cfg: CFG):
+    """Lay the blocks out as label-based TAC, emitting a goto wherever a
+    successor does not directly follow its block."""
+    blocks = cfg.blocks
+    layout = cfg.layout
+    following = {index: layout[i + 1] if i + 1 < len(layout) else None
+                 for i, index in enumerate(layout)}
+
+    def label(index):
+        block = blocks[index]
+        if block.label is None:
+            block.label = cfg.new_label()
+        return block.label
+
+    targets = set()
+    tails = {}
+    for index in layout:
+        block = blocks[index]
+        tail = []
+        if block.cond is not None:
+            tail.append(Instr(IF_FALSE, label(block.jump), block.cond))
+            targets.add(block.jump)
+            if block.fallthrough != following[index]:
+                tail.append(Instr(GOTO, label(block.fallthrough)))
+                targets.add(block.fallthrough)
+        else:
+            succ = block.jump if block.jump is not None else block.fallthrough
+            if succ is not None and succ != following[index]:
+                tail.append(Instr(GOTO, label(succ)))
+                targets.add(succ)
+        tails[index] = tail
+
+    code = []
+    for index in layout:
+        block = blocks[index]
+        if index in targets:
+            code.append(Instr(LABEL, block.label))
+        if block.phis:
+            raise ValueError(f"Cannot flatten {cfg.name}: block {index} still has phi nodes")
+        code.extend(block.code)
+        code.extend(tails[index])
+    return code
+
+
+# Orders and dominators
+
+def reverse_postorder(cfg):
+    """Indices of the blocks reachable from the entry, in reverse postorder."""
+    blocks = cfg.blocks
+    order = []
+    seen = {0}
+    stack = [(0, iter(blocks[0].succs))]
+    while stack:
+        index, succs = stack[-1]
+        for succ in succs:
+            if succ not in seen:
+                seen.add(succ)
+                stack.append((succ, iter(blocks[succ].succs)))
+                break
+        else:
+            stack.pop()
+            order.append(index)
+    order.reverse()
+    return order
+
+
+def dominators(cfg):
+    """Immediate dominator of every block (the entry maps to itself), using
+    Lengauer-Tarjan with path compression. Assumes every block is reachable,
+    which build_cfg and prune() guarantee."""
+    blocks = cfg.blocks
+    return _immediate_dominators(len(blocks), [block.succs for block in blocks],
+                                 [block.preds for block in blocks], 0)
+
+
+def post_dominators(cfg):
+    """Immediate post-dominator of every block. Index len(cfg.blocks) is a
+    virtual exit that follows every block without successors; it maps to
+    itself, and blocks that never reach it (endless loops) map to -1."""
+    blocks = cfg.blocks
+    exit_ = len(blocks)
+    succs = [list(block.preds) for block in blocks] + [[]]
+    preds = [list(block.succs) for block in blocks] + [[]]
+    for block in blocks:
+        if not block.succs:
+            succs[exit_].append(block.index)
+            preds[block.index].append(exit_)
+    return _immediate_dominators(exit_ + 1, succs, preds, exit_)
+
+
+def _immediate_dominators(count, succs, preds, root):
+    # Depth-first numbering; vertex[n] is the node numbered n
+    dfnum = [-1] * count
+    parent = [-1] * count
+    vertex = []
+    stack = [(root, -1)]
+    while stack:
+        index, from_ = stack.pop()
+        if dfnum[index] != -1:
+            continue
+        dfnum[index] = len(vertex)
+        vertex.append(index)
+        parent[index] = from_
+        for succ in reversed(succs[index]):
+            if dfnum[succ] == -1:
+                stack.append((succ, index))
+
+    semi = list(range(count))
+    ancestor = [-1] * count
+    best = list(range(count))
+    samedom = [-1] * count
+    idom = [-1] * count
+    bucket = [[] for _ in range(count)]
+
+    def lowest_semi_ancestor(v):
+        path = []
+        node = v
+        while ancestor[ancestor[node]] != -1:
+            path.append(node)
+            node = ancestor[node]
+        for node in reversed(path):
+            above = ancestor[node]
+            candidate = best[above]
+            ancestor[node] = ancestor[above]
+            if dfnum[semi[candidate]] < dfnum[semi[best[node]]]:
+                best[node] = candidate
+        return best[v]
+
+    for n in reversed(vertex[1:]):
+        p = parent[n]
+        s = p
+        for v in preds[n]:
+            if dfnum[v] == -1:
+                continue    # Unreachable from the root
+            if dfnum[v] <= dfnum[n]:
+                candidate = v
+            else:
+                candidate = semi[lowest_semi_ancestor(v)]
+            if dfnum[candidate] < dfnum[s]:
+                s = candidate
+        semi[n] = s
+        bucket[s].append(n)
+        ancestor[n] = p
+        for v in bucket[p]:
+            y = lowest_semi_ancestor(v)
+            if semi[y] == semi[v]:
+                idom[v] = p
+            else:
+                samedom[v] = y
+        bucket[p] = []
+
+    for n in vertex[1:]:
+        if samedom[n] != -1:
+            idom[n] = idom[samedom[n]]
+    idom[root] = root
+    return idom
+
+
+def dominator_tree(idom):
+    children = [[] for _ in idom]
+    for index, parent in enumerate(idom):
+        if index != parent:
+            children[parent].append(index)
+    return children
+
+
+def dominance_frontiers(cfg, idom):
+    frontiers = [set() for _ in cfg.blocks]
+    for index, block in enumerate(cfg.blocks):
+        if len(block.preds) < 2:
+            continue
+        for pred in block.preds:
+            runner = pred
+            while runner != idom[index]:
+                frontiers[runner].add(index)
+                runner = idom[runner]
+    return frontiers
+
+
+def dominates(idom, a, b):
+    while b != a:
+        if b == 0:
+            return False
+        b = idom[b]
+    return True
+
+
+# Liveness
+
+def block_uses(block):
+    """Operands a block reads before writing them, and the names it writes."""
+    gen = set()
+    kill = {phi.dest for phi in block.phis}
+    for instr in block.code:
+        for operand in uses(instr):
+            if operand not in kill and not is_constant(operand):
+                gen.add(operand)
+        dest = defines(instr)
+        if dest is not None:
+            kill.add(dest)
+    if block.cond is not None and block.cond not in kill and not is_constant(block.cond):
+        gen.add(block.cond)
+    return gen, kill
+
+
+def liveness(cfg):
+    """Names live on entry to and exit from each block. A phi operand is
+    live out of the predecessor it comes from, not into the phi's block."""
+    blocks = cfg.blocks
+    gen_kill = [block_uses(block) for block in blocks]
+    phi_uses = [set() for _ in blocks]
+    for block in blocks:
+        for position, pred in enumerate(block.preds):
+            for phi in block.phis:
+                operand = phi.src2[position]
+                if not is_constant(operand):
+                    phi_uses[pred].add(operand)
+    live_in = [set() for _ in blocks]
+    live_out = [set() for _ in blocks]
+
+    order = reverse_postorder(cfg)
+    order.reverse()
+    changed = True
+    while changed:
+        changed = False
+        for index in order:
+            out = set(phi_uses[index])
+            for succ in blocks[index].succs:
+                out |= live_in[succ]
+            gen, kill = gen_kill[index]
+            new_in = gen | (out - kill)
+            if len(new_in) != len(live_in[index]) or len(out) != len(live_out[index]):
+                live_in[index] = new_in
+                live_out[index] = out
+                changed = True
+    return live_in, live_out
@@ -0,0 +1,104 @@
+"""Send compile requests to a running scripts.server.
+
+    python -m scripts.client --socket PATH SOURCE [-O] [--allocate] [--json]
+    python -m scripts.client --socket PATH --stats
+    python -m scripts.client --socket PATH --shutdown
+
+prints the TAC and diagnostics the server returns (or the raw JSON
+response with --json). SOURCE is sent as a path, so the server reads it;
+use `-` to send standard input as source text instead.
+"""
+import argparse
+import json
+import socket
+import sys
+
+from scripts.server import MAX_REQUEST_BYTES
+
+
+class ServerError(Exception):
+    pass
+
+
+class CompileClient:
+    """One connection to the server; requests are answered in turn."""
+
+    def __init__(self, socket_path, timeout=None):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(timeout)
+        self.sock.connect(str(socket_path))
+        self.file = self.sock.makefile("rwb")
+        self.next_id = 0
+
+    def request(self, payload):
+        self.next_id += 1
+        payload = {**payload, 'id': self.next_id}
+        self.file.write(json.dumps(payload).encode() + b"\n")
+        self.file.flush()
+        line = self.file.readline(MAX_REQUEST_BYTES)
+        if not line:
+            raise ServerError("server closed the connection")
+        response = json.loads(line)
+        if 'error' in response:
+            raise ServerError(response['error'])
+        return response
+
+    def compile(self, source=None, path=None, **options):
+        payload = {'options': options}
+        if source is not None:
+            payload['source'] = source
+        else:
+            payload['path'] = str(path)
+        return self.request(payload)
+
+    def close(self):
+        self.file.close()
+        self.sock.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(description="Compile through a running MiniLang++ server.")
+    arg_parser.add_argument("source", nargs="?", help="file to compile, or - for standard input")
+    arg_parser.add_argument("--socket", required=True, help="the server's Unix socket")
+    arg_parser.add_argument("-O", "--optimize", action="store_true", help="optimize the generated TAC")
+    arg_parser.add_argument("--allocate", action="store_true", help="reuse temp names across live ranges")
+    arg_parser.add_argument("--json", action="store_true", help="print the raw JSON response")
+    arg_parser.add_argument("--stats", action="store_true", help="print the server's counters")
+    arg_parser.add_argument("--shutdown", action="store_true", help="stop the server")
+    args = arg_parser.parse_args(argv)
+
+    try:
+        with CompileClient(args.socket) as client:
+            if args.stats or args.shutdown:
+                print(json.dumps(client.request({'command': 'stats' if args.stats else 'shutdown'}), indent=2))
+                return 0
+            if args.source is None:
+                arg_parser.error("a source file is required")
+            options = {'optimize': args.optimize, 'allocate': args.allocate}
+            if args.source == "-":
+                response = client.compile(source=sys.stdin.read(), **options)
+            else:
+                response = client.compile(path=args.source, **options)
+    except (OSError, ServerError) as e:
+        print(f"❌ {e}")
+        return 1
+
+    if args.json:
+        print(json.dumps(response, indent=2))
+    else:
+        for diagnostic in response['diagnostics']:
+            print(diagnostic['message'])
+        sys.stdout.write(response['tac'])
+        state = "♻️ cached" if response['cached'] else f"⏱️ {response['seconds'] * 1000:.1f}ms"
+        print(f"{'✅' if response['ok'] else '❌'} {state}")
+    return 0 if response['ok'] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,121 @@
+import os
+from dataclasses import dataclass, field, fields
+from typing import List, Optional
+
+from scripts import (lexer, dfa_lexer, semantic_analyzer, intermediate_code, optimizer, parallel, parallel_lexer,
+                     regalloc, tac)
+from scripts.ast import Program
+from scripts.context import CompilationContext
+from scripts.diagnostics import Diagnostic, ERROR
+from scripts.metrics import phase
+from scripts.parser import Parser
+from scripts.token_stream import TokenStream
+
+# Part of every cache key: bump it whenever CompilationResult gains or
+# loses a field or the compiler's output changes, so old entries miss.
+COMPILER_VERSION = "0.9.0"
+
+
+@dataclass
+class CompilationResult:
+    tokens: TokenStream
+    ast: Program
+    module: tac.Module
+    diagnostics: List[Diagnostic]
+    path: Optional[str] = None
+    cached: bool = False
+    pass_stats: List[optimizer.PassStat] = field(default_factory=list)
+    frames: List[regalloc.FrameSummary] = field(default_factory=list)
+
+    @property
+    def ok(self):
+        return not any(d.severity == ERROR for d in self.diagnostics)
+
+
+def compile_source(code, ctx=None, path=None, cache=None):
+    ctx = ctx or CompilationContext()
+    if cache is not None:
+        with phase(ctx, 'cache'):
+            key = cache.key(code.encode("utf-8"), ctx.options)
+            result = _from_cache(cache, key, ctx, path)
+        if result is not None:
+            return _measured(result, ctx)
+    with phase(ctx, 'lex'):
+        tokens = TokenStream.from_tokens(_lexer(ctx).tokenize_iter(code, ctx))
+    result = compile_tokens(tokens, ctx, path)
+    if cache is not None:
+        with phase(ctx, 'cache'):
+            cache.put(key, result)
+    return _measured(result, ctx)
+
+
+def compile_file(path, ctx=None, cache=None):
+    ctx = ctx or CompilationContext()
+    path = str(path)
+    if cache is not None:
+        with phase(ctx, 'cache'):
+            key = cache.key_for_file(path, ctx.options)
+            result = _from_cache(cache, key, ctx, path)
+        if result is not None:
+            return _measured(result, ctx)
+    with phase(ctx, 'lex'):
+        if parallel_lexer.worth_splitting(os.path.getsize(path), ctx.jobs):
+            tokens = parallel_lexer.tokenize_file(path, ctx, ctx.jobs)
+        else:
+            tokens = TokenStream.from_tokens(_lexer(ctx).tokenize_file(path, ctx=ctx))
+    result = compile_tokens(tokens, ctx, path)
+    if cache is not None:
+        with phase(ctx, 'cache'):
+            cache.put(key, result)
+    return _measured(result, ctx)
+
+
+def _lexer(ctx):
+    return dfa_lexer if ctx.options.get('lexer') == 'dfa' else lexer
+
+
+def _from_cache(cache, key, ctx, path):
+    result = cache.get(key)
+    if not isinstance(result, CompilationResult) or any(
+            not hasattr(result, item.name) for item in fields(CompilationResult)):
+        return None   # Missing, or pickled by a build with another result shape
+    ctx.diagnostics.extend(result.diagnostics)
+    result.diagnostics = ctx.diagnostics.items
+    result.path = path
+    result.cached = True
+    return result
+
+
+def _measured(result, ctx):
+    if ctx.metrics is not None:
+        ctx.metrics.record_result(result, ctx)
+    return result
+
+
+def compile_tokens(tokens, ctx, path=None):
+    with phase(ctx, 'parse'):
+        ast = Parser(tokens, ctx).parse()
+    return compile_ast(tokens, ast, ctx, path)
+
+
+def compile_ast(tokens, ast, ctx, path=None, externals=None):
+    """Check and lower a parsed Program. `externals` declares functions
+    defined in other modules (see scripts.build)."""
+    if parallel.worth_splitting(ast, ctx.jobs):
+        with phase(ctx, 'functions'):
+            module = parallel.analyze_and_generate(ast, ctx, ctx.jobs, externals)
+    else:
+        with phase(ctx, 'semantic'):
+            semantic_analyzer.analyze(ast, ctx, externals)
+        with phase(ctx, 'tac'):
+            module = intermediate_code.generate_intermediate_code(ast, ctx)
+    pass_stats = []
+    if ctx.options.get('optimize'):
+        with phase(ctx, 'optimize'):
+            pass_stats = optimizer.optimize(module)
+    frames = []
+    if ctx.options.get('allocate'):
+        with phase(ctx, 'allocate'):
+            frames = regalloc.allocate_module(module)
+    return CompilationResult(tokens, ast, module, ctx.diagnostics.items, path,
+                             pass_stats=pass_stats, frames=frames)
@@ -0,0 +1,49 @@
+from scripts.diagnostics import DiagnosticCollector
+
+
+class CompilationContext:
+    """Per-compilation state shared by every phase.
+
+    Owns the temp and label counters, the diagnostics reported so far and
+    the options for this compilation. Nothing is kept at module level, so
+    separate contexts can compile in parallel threads or processes and
+    always number temps and labels the same way for the same input.
+
+    Options: max_errors caps the number of errors collected; optimize runs
+    the TAC optimization pipeline; allocate packs temps into reusable
+    registers; lexer='dfa' scans with scripts.dfa_lexer instead of the
+    regex scanner (same output). `metrics` is not an option (it does not
+    change the output or the cache key): a scripts.metrics.Metrics to
+    record phase timings and counters in, or None. Neither is `jobs`: with
+    more than one, function bodies are analyzed and lowered on that many
+    processes (see scripts.parallel), and so are pieces of a large file
+    lexed (see scripts.parallel_lexer).
+    """
+
+    def __init__(self, echo=False, metrics=None, jobs=None, **options):
+        self.echo = echo  # Print diagnostics as they are reported
+        self.metrics = metrics
+        self.jobs = jobs
+        self.options = options
+        self.temp_count = 0
+        self.label_count = 0
+        self.diagnostics = DiagnosticCollector(options.get('max_errors'), echo)
+
+    def new_temp(self):
+        self.temp_count += 1
+        return f"t{self.temp_count}"
+
+    def new_label(self):
+        self.label_count += 1
+        return f"L{self.label_count}"
+
+    def error(self, code, message, line=0, column=0):
+        return self.diagnostics.error(code, message, line, column)
+
+    def log(self, message):
+        if self.echo:
+            print(message)
+
+    @property
+    def has_errors(self):
+        return self.diagnostics.error_count > 0
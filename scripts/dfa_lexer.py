@@ -0,0 +1,354 @@
+"""Table-driven lexer generated from lexer.TOKEN_SPEC and lexer.KEYWORDS.
+
+build_tables() compiles the token patterns (a small regex subset: literals,
+escapes, classes, `.`, groups, `|`, `*`, `+`, `?`) through a Thompson NFA
+into a DFA. Keywords are literal patterns ranked above ID, so `int` ends
+in a state that accepts INT while `int5` runs on into plain ID states and
+no keyword lookup is needed. Input symbols are bytes; every non-ASCII byte
+(or character, for str input) shares one symbol, matching the re.ASCII
+scanners in scripts.lexer. The 256 symbols collapse into the few character
+classes the DFA can tell apart, and the transition table is one flat list
+indexed by state offset plus class.
+
+The scanner takes the longest match at each position, ties going to the
+earlier rule. For this TOKEN_SPEC that finds the same tokens as the
+ordered regex alternation, and tokenize_iter/tokenize_file produce exactly
+the Tokens and diagnostics of lexer.tokenize_iter/lexer.tokenize_file.
+Select it with CompilationContext(lexer='dfa') or `main.py --lexer dfa`.
+"""
+import os
+from dataclasses import dataclass
+from typing import List
+
+from scripts.context import CompilationContext
+from scripts.lexer import TOKEN_SPEC, KEYWORDS, KEYWORD_KINDS, Token, report_invalid_run
+
+SYMBOLS = 129          # ASCII 0-127, then one symbol for everything else
+NON_ASCII = 128
+
+_DIGITS = frozenset(range(ord('0'), ord('9') + 1))
+_SPACE = frozenset(b' \t\n\r\f\v')
+_WORD = frozenset(b'abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ_') | _DIGITS
+_ESCAPES = {'d': _DIGITS, 's': _SPACE, 'w': _WORD}
+_ANY_BUT_NEWLINE = frozenset(range(SYMBOLS)) - {ord('\n')}
+
+
+# Patterns to NFA
+
+class _NFA:
+    def __init__(self):
+        self.epsilon = []   # State -> [state]
+        self.edges = []     # State -> [(symbols, state)]
+
+    def state(self):
+        self.epsilon.append([])
+        self.edges.append([])
+        return len(self.edges) - 1
+
+
+class _PatternParser:
+    """Recursive descent over one pattern; returns (start, end) states."""
+
+    def __init__(self, nfa, pattern):
+        self.nfa = nfa
+        self.pattern = pattern
+        self.pos = 0
+
+    def parse(self):
+        fragment = self.alternation()
+        if self.pos != len(self.pattern):
+            raise ValueError(f"Unexpected '{self.pattern[self.pos]}' in pattern {self.pattern!r}")
+        return fragment
+
+    def peek(self):
+        return self.pattern[self.pos] if self.pos < len(self.pattern) else ''
+
+    def alternation(self):
+        left = self.concatenation()
+        while self.peek() == '|':
+            self.pos += 1
+            right = self.concatenation()
+            start, end = self.nfa.state(), self.nfa.state()
+            self.nfa.epsilon[start] += [left[0], right[0]]
+            self.nfa.epsilon[left[1]].append(end)
+            self.nfa.epsilon[right[1]].append(end)
+            left = (start, end)
+        return left
+
+    def concatenation(self):
+        start = end = self.nfa.state()
+        while self.peek() not in ('', '|', ')'):
+            item_start, item_end = self.repetition()
+            self.nfa.epsilon[end].append(item_start)
+            end = item_end
+        return start, end
+
+    def repetition(self):
+        fragment = self.atom()
+        while self.peek() in ('*', '+', '?'):
+            op = self.pattern[self.pos]
+            self.pos += 1
+            inner_start, inner_end = fragment
+            start, end = self.nfa.state(), self.nfa.state()
+            self.nfa.epsilon[start].append(inner_start)
+            self.nfa.epsilon[inner_end].append(end)
+            if op != '+':
+                self.nfa.epsilon[start].append(end)
+            if op != '?':
+                self.nfa.epsilon[inner_end].append(inner_start)
+            fragment = (start, end)
+        return fragment
+
+    def atom(self):
+        char = self.peek()
+        self.pos += 1
+        if char == '(':
+            if self.pattern.startswith('?:', self.pos):
+                self.pos += 2
+            fragment = self.alternation()
+            if self.peek() != ')':
+                raise ValueError(f"Unbalanced '(' in pattern {self.pattern!r}")
+            self.pos += 1
+            return fragment
+        if char == '[':
+            symbols = self.char_class()
+        elif char == '.':
+            symbols = _ANY_BUT_NEWLINE
+        elif char == '\\':
+            symbols = self.escape()
+        elif char in ('', ')', '*', '+', '?'):
+            raise ValueError(f"Unexpected '{char}' in pattern {self.pattern!r}")
+        else:
+            symbols = frozenset({ord(char)})
+        start, end = self.nfa.state(), self.nfa.state()
+        self.nfa.edges[start].append((symbols, end))
+        return start, end
+
+    def escape(self):
+        char = self.peek()
+        self.pos += 1
+        return _ESCAPES.get(char) or frozenset({ord(char)})
+
+    def char_class(self):
+        negate = self.peek() == '^'
+        if negate:
+            self.pos += 1
+        symbols = set()
+        while self.peek() != ']':
+            char = self.peek()
+            if not char:
+                raise ValueError(f"Unbalanced '[' in pattern {self.pattern!r}")
+            self.pos += 1
+            if char == '\\':
+                item = self.escape()
+                if len(item) > 1:
+                    symbols |= item
+                    continue
+                (low,) = item
+            else:
+                low = ord(char)
+            if self.peek() == '-' and self.pattern[self.pos + 1:self.pos + 2] not in ('', ']'):
+                self.pos += 1
+                high = self.peek()
+                self.pos += 1
+                if high == '\\':
+                    (high,) = self.escape()
+                else:
+                    high = ord(high)
+                symbols.update(range(low, high + 1))
+            else:
+                symbols.add(low)
+        self.pos += 1
+        if negate:
+            return frozenset(range(SYMBOLS)) - symbols
+        return frozenset(symbols)
+
+
+# NFA to DFA
+
+@dataclass
+class LexerTables:
+    classes: bytes            # Byte value -> character class
+    class_count: int
+    transitions: List[int]    # state offset + class -> next state offset, or -1
+    accepts: List[object]     # state offset -> token kind, or None
+    start: int
+
+    @property
+    def state_count(self):
+        return len(self.transitions) // self.class_count
+
+
+def _closure(nfa, states):
+    stack = list(states)
+    seen = set(states)
+    while stack:
+        for target in nfa.epsilon[stack.pop()]:
+            if target not in seen:
+                seen.add(target)
+                stack.append(target)
+    return frozenset(seen)
+
+
+def build_tables(spec=TOKEN_SPEC, keywords=KEYWORDS):
+    """Compile the token rules into LexerTables. Keywords rank above every
+    rule in `spec`, and earlier rules rank above later ones."""
+    nfa = _NFA()
+    rules = [(KEYWORD_KINDS.get(keyword, keyword.upper()), _escape_literal(keyword))
+             for keyword in sorted(keywords)]
+    rules += list(spec)
+    start = nfa.state()
+    accepting = {}   # NFA state -> (rank, kind)
+    for rank, (kind, pattern) in enumerate(rules):
+        fragment_start, fragment_end = _PatternParser(nfa, pattern).parse()
+        nfa.epsilon[start].append(fragment_start)
+        accepting[fragment_end] = (rank, kind)
+
+    first = _closure(nfa, [start])
+    index = {first: 0}
+    sets = [first]
+    moves = []       # DFA state -> [next DFA state or -1 per symbol]
+    accepts = []
+    for states in sets:   # Grows while we iterate
+        targets = {}
+        for state in states:
+            for symbols, target in nfa.edges[state]:
+                for symbol in symbols:
+                    targets.setdefault(symbol, set()).add(target)
+        row = [-1] * SYMBOLS
+        for symbol, states_after in targets.items():
+            closed = _closure(nfa, states_after)
+            number = index.get(closed)
+            if number is None:
+                number = index[closed] = len(sets)
+                sets.append(closed)
+            row[symbol] = number
+        moves.append(row)
+        ranked = [accepting[state] for state in states if state in accepting]
+        accepts.append(min(ranked)[1] if ranked else None)
+
+    # Symbols whose columns agree in every state form one class
+    class_of_column = {}
+    symbol_classes = []
+    for symbol in range(SYMBOLS):
+        column = tuple(row[symbol] for row in moves)
+        symbol_classes.append(class_of_column.setdefault(column, len(class_of_column)))
+    class_count = len(class_of_column)
+    transitions = [-1] * (len(moves) * class_count)
+    for state, row in enumerate(moves):
+        for symbol, target in enumerate(row):
+            if target >= 0:
+                transitions[state * class_count + symbol_classes[symbol]] = target * class_count
+    offset_accepts = [None] * len(transitions)
+    for state, kind in enumerate(accepts):
+        offset_accepts[state * class_count] = kind
+    classes = bytes(symbol_classes[min(byte, NON_ASCII)] for byte in range(256))
+    return LexerTables(classes, class_count, transitions, offset_accepts, 0)
+
+
+def _escape_literal(text):
+    return ''.join('\\' + char if not char.isalnum() else char for char in text)
+
+
+TABLES = build_tables()
+
+
+class _CharClasses(dict):
+    """str.translate table: ASCII characters to their class, anything else
+    to the non-ASCII class."""
+
+    def __init__(self, tables):
+        super().__init__((code, tables.classes[code]) for code in range(128))
+        self.other = tables.classes[NON_ASCII]
+
+    def __missing__(self, code):
+        return self.other
+
+
+_CHAR_CLASSES = _CharClasses(TABLES)
+
+
+# Scanners
+
+_new_token = tuple.__new__
+
+
+def tokenize_iter(code, ctx=None):
+    """Same Tokens and diagnostics as lexer.tokenize_iter(code, ctx)."""
+    ctx = ctx or CompilationContext(echo=True)
+    classes = code.translate(_CHAR_CLASSES).encode('latin-1')
+    return _scan(code, classes, ctx, TABLES, False)
+
+
+def tokenize_bytes(data, ctx=None):
+    """Lex UTF-8 bytes like lexer.tokenize_buffer: columns and offsets
+    count bytes and an invalid multi-byte sequence is one error. The whole
+    buffer is classified at once rather than a chunk at a time."""
+    ctx = ctx or CompilationContext(echo=True)
+    data = bytes(data)
+    return _scan(data, data.translate(TABLES.classes), ctx, TABLES, True)
+
+
+def tokenize_file(path, ctx=None):
+    """Same Tokens and diagnostics as lexer.tokenize_file(path, ctx=ctx)."""
+    with open(path, 'rb') as file:
+        if os.fstat(file.fileno()).st_size == 0:
+            return
+        data = file.read()
+    yield from tokenize_bytes(data, ctx)
+
+
+def _scan(text, classes, ctx, tables, is_bytes):
+    transitions = tables.transitions
+    accepts = tables.accepts
+    start = tables.start
+    newline = b'\n' if is_bytes else '\n'
+    count = text.count
+    size = len(text)
+    pos = 0
+    line = 1
+    line_start = 0
+    run_start = run_end = -1   # Invalid characters not reported yet
+    run_line = run_column = 0
+    while pos < size:
+        state = start
+        index = pos
+        end = -1
+        kind = None
+        while index < size:
+            state = transitions[state + classes[index]]
+            if state < 0:
+                break
+            index += 1
+            if accepts[state] is not None:
+                kind = accepts[state]
+                end = index
+
+        if kind is None:
+            end = pos + 1
+            if is_bytes and 0xc2 <= text[pos] <= 0xf4:
+                while end < size and 0x80 <= text[end] <= 0xbf:
+                    end += 1   # One error for the whole UTF-8 sequence
+            if run_end != pos:
+                if run_end >= 0:
+                    report_invalid_run(ctx, text, run_start, run_end, run_line, run_column)
+                run_start, run_line, run_column = pos, line, pos - line_start + 1
+            run_end = end
+            pos = end
+            continue
+        if run_end >= 0:
+            report_invalid_run(ctx, text, run_start, run_end, run_line, run_column)
+            run_end = -1
+        if kind == 'WS':
+            newlines = count(newline, pos, end)
+            if newlines:
+                line += newlines
+                line_start = text.rfind(newline, pos, end) + 1
+        elif kind != 'COMMENT':
+            value = text[pos:end]
+            if is_bytes:
+                value = value.decode('utf-8', 'replace')
+            yield _new_token(Token, (kind, value, line, pos - line_start + 1, pos))
+        pos = end
+    if run_end >= 0:
+        report_invalid_run(ctx, text, run_start, run_end, run_line, run_column)
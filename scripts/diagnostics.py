@@ -0,0 +1,138 @@
+from array import array
+from bisect import bisect_right
+from dataclasses import dataclass
+from typing import Optional
+
+ERROR = 'error'
+WARNING = 'warning'
+
+# Diagnostic codes
+IO_ERROR = 'E001'
+INTERNAL_ERROR = 'E002'
+INVALID_CHARACTER = 'L001'
+SYNTAX_ERROR = 'P001'
+UNEXPECTED_TOKEN = 'P002'
+UNDECLARED_VARIABLE = 'S001'
+REDECLARED_SYMBOL = 'S002'
+TYPE_MISMATCH = 'S003'
+RETURN_TYPE_MISMATCH = 'S004'
+CONDITION_TYPE = 'S005'
+UNDECLARED_FUNCTION = 'S006'
+ARGUMENT_COUNT = 'S007'
+ARGUMENT_TYPE = 'S008'
+
+
+@dataclass(slots=True)
+class Span:
+    line: int = 0
+    column: int = 0
+
+
+def located(message, line, column):
+    """`message` with the position suffix every phase ends its messages
+    with, or unchanged if the position is unknown."""
+    return f"{message} at line {line}, column {column}" if line else message
+
+
+@dataclass(slots=True)
+class Diagnostic:
+    severity: str
+    code: str
+    message: str
+    span: Optional[Span] = None
+
+    def __str__(self):
+        return self.message
+
+    def moved(self, lines):
+        """This diagnostic `lines` lines further down, its message too."""
+        span = self.span
+        if span is None or not lines or not span.line:
+            return self
+        message = self.message
+        suffix = located("", span.line, span.column)
+        if message.endswith(suffix):
+            message = located(message[:-len(suffix)], span.line + lines, span.column)
+        return Diagnostic(self.severity, self.code, message, Span(span.line + lines, span.column))
+
+
+class SourceMap:
+    """Line starts of one source text (str or bytes), found in one pass, so
+    an offset maps to its (line, column) with a bisect instead of a scan."""
+
+    __slots__ = ('starts',)
+
+    def __init__(self, text):
+        newline = '\n' if isinstance(text, str) else b'\n'
+        find = text.find
+        starts = array('I', [0])
+        position = find(newline)
+        while position >= 0:
+            starts.append(position + 1)
+            position = find(newline, position + 1)
+        self.starts = starts
+
+    @property
+    def line_count(self):
+        return len(self.starts)
+
+    def position(self, offset):
+        line = bisect_right(self.starts, offset)
+        return line, offset - self.starts[line - 1] + 1
+
+    def offset(self, line, column=1):
+        return self.starts[line - 1] + column - 1
+
+
+class DiagnosticCollector:
+    """Ordered list of Diagnostics with an optional error cap.
+
+    Once `max_errors` errors have been collected, further errors are counted
+    in `dropped` but not stored, and `full` becomes true so passes can stop
+    early instead of producing findings nobody will read.
+    """
+
+    def __init__(self, max_errors=None, echo=False):
+        self.items = []
+        self.max_errors = max_errors
+        self.echo = echo
+        self.error_count = 0
+        self.dropped = 0
+
+    @property
+    def full(self):
+        return self.max_errors is not None and self.error_count >= self.max_errors
+
+    def report(self, severity, code, message, span=None):
+        if severity == ERROR:
+            if self.full:
+                self.dropped += 1
+                return None
+            self.error_count += 1
+        diagnostic = Diagnostic(severity, code, message, span)
+        self.items.append(diagnostic)
+        if self.echo:
+            print(message)
+        return diagnostic
+
+    def error(self, code, message, line=0, column=0):
+        return self.report(ERROR, code, message, Span(line, column))
+
+    def warning(self, code, message, line=0, column=0):
+        return self.report(WARNING, code, message, Span(line, column))
+
+    def extend(self, diagnostics):
+        for diagnostic in diagnostics:
+            self.report(diagnostic.severity, diagnostic.code, diagnostic.message, diagnostic.span)
+
+    def errors(self):
+        return [d for d in self.items if d.severity == ERROR]
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __len__(self):
+        return len(self.items)
+
+    def __bool__(self):
+        return bool(self.items)
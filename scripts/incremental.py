@@ -0,0 +1,260 @@
+"""Incremental relexing, reparsing and checking of one source text, for
+editors that recompile on every keystroke.
+
+    document = Document(source)
+    document.edit(offset, removed, inserted)
+    document.diagnostics()
+
+A Document splits its text into segments of whole lines, each starting at
+a top-level item (a function, or stray tokens the parser skips) that is
+the first token on its line. Tokens, AST nodes and diagnostics are stored
+with lines and offsets relative to their segment, so an edit never touches
+the segments after it, only the running totals used to place them.
+
+The lexer carries no state across a newline and the parser carries none
+from one top-level item to the next except its position. An edit is
+relexed and reparsed from the segment before the one it starts in (the
+parser may have looked one token into the next segment) through the
+segment it ends in. Parsing then continues into the following segments
+only until the parser is between items exactly at a segment boundary;
+everything after that is unchanged.
+
+The signature pass is rerun over every function header on each edit (a
+dict insert per function). Bodies are rechecked when they were reparsed
+or when they mention a function whose signature changed. Tokens, the AST
+and diagnostics read from a Document are what compiler.compile_source
+produces for the same text; max_errors is not applied and no TAC is kept,
+since temps are numbered across the whole module.
+"""
+import copy
+from bisect import bisect_right
+from dataclasses import dataclass, field
+from typing import List, Set
+
+from scripts import lexer
+from scripts.ast import Assign, Call, Function, Name, Program, walk
+from scripts.context import CompilationContext
+from scripts.diagnostics import Diagnostic, SourceMap
+from scripts.lexer import Token
+from scripts.parser import Parser
+from scripts.semantic_analyzer import SemanticAnalyzer, analyze_function
+from scripts.token_stream import TokenStream
+
+
+@dataclass
+class Segment:
+    """Whole lines of source; line 1 is the segment's first line."""
+    text: str
+    tokens: List[Token] = field(default_factory=list)
+    lex_diagnostics: List[Diagnostic] = field(default_factory=list)
+    functions: List[Function] = field(default_factory=list)
+    parse_diagnostics: List[Diagnostic] = field(default_factory=list)
+    signature_diagnostics: List[Diagnostic] = field(default_factory=list)
+    body_diagnostics: List[List[Diagnostic]] = field(default_factory=list)   # Per function
+    names: List[Set[str]] = field(default_factory=list)   # Per function: global names it may read
+
+    @property
+    def line_count(self):
+        return self.text.count('\n')
+
+
+@dataclass
+class EditStats:
+    relexed: int = 0       # Characters lexed again
+    reparsed: int = 0      # Functions parsed again
+    rechecked: int = 0     # Function bodies analyzed again
+
+
+class Document:
+    def __init__(self, text=""):
+        self.segments = self._parse_region(text, "")
+        self.globals = {}     # Function name -> (declared type, signature)
+        self._check(set(range(len(self.segments))))
+
+    @property
+    def text(self):
+        return "".join(segment.text for segment in self.segments)
+
+    def edit(self, offset, removed, inserted):
+        """Replace `removed` characters at `offset` with `inserted`."""
+        starts = self._starts()
+        size = starts[-1] + len(self.segments[-1].text)
+        if offset < 0 or removed < 0 or offset + removed > size:
+            raise ValueError(f"Edit {offset}+{removed} is outside the text (length {size})")
+        first = max(bisect_right(starts, offset) - 1, 0)
+        last = max(bisect_right(starts, offset + removed) - 1, 0)
+        begin = max(first - 1, 0)
+        while begin > 0 and not self.segments[begin].tokens:
+            begin -= 1   # The item that may have looked into `first` is further back
+        local = offset - starts[begin]
+        text = "".join(segment.text for segment in self.segments[begin:last + 1])
+        text = text[:local] + inserted + text[local + removed:]
+
+        end = last + 1
+        stats = EditStats()
+        while True:
+            pad = self.segments[end].text if end < len(self.segments) else ""
+            if pad and not text.endswith('\n'):
+                new = None      # The edit joined lines across the boundary
+            else:
+                new = self._parse_region(text, pad)
+                stats.relexed += len(text) + len(pad)
+            if new is not None:
+                break
+            text += pad
+            end += 1
+        new = [segment for segment in new if segment.text]
+        stats.reparsed = sum(len(segment.functions) for segment in new)
+        self.segments[begin:end] = new
+        if not self.segments:
+            self.segments.append(Segment(""))
+        stats.rechecked = self._check(set(range(begin, begin + len(new))))
+        return stats
+
+    # Reading the results
+
+    def tokens(self):
+        """Every Token of the text, with absolute positions."""
+        for segment, offset, line in self._placed():
+            for kind, value, token_line, column, token_offset in segment.tokens:
+                yield Token(kind, value, token_line + line, column, token_offset + offset)
+
+    def program(self):
+        """A Program of copies of the stored functions, with absolute lines."""
+        functions = []
+        for segment, _, line in self._placed():
+            for func in segment.functions:
+                func = copy.deepcopy(func)
+                _shift_lines(func, line)
+                functions.append(func)
+        return Program(functions)
+
+    def diagnostics(self):
+        """Diagnostics in the order a full compile reports them: lexer,
+        parser, signature pass, then function bodies."""
+        placed = list(self._placed())
+        items = [d.moved(line) for segment, _, line in placed for d in segment.lex_diagnostics]
+        items += [d.moved(line) for segment, _, line in placed for d in segment.parse_diagnostics]
+        items += [d.moved(line) for segment, _, line in placed for d in segment.signature_diagnostics]
+        items += [d.moved(line) for segment, _, line in placed
+                  for body in segment.body_diagnostics for d in body]
+        return items
+
+    # Internals
+
+    def _starts(self):
+        starts = []
+        offset = 0
+        for segment in self.segments:
+            starts.append(offset)
+            offset += len(segment.text)
+        return starts
+
+    def _placed(self):
+        """(segment, offset of its first character, lines before it)."""
+        offset = line = 0
+        for segment in self.segments:
+            yield segment, offset, line
+            offset += len(segment.text)
+            line += segment.line_count
+
+    def _parse_region(self, text, pad):
+        """Lex and parse `text`, whole lines, followed by `pad`, the text of
+        the segments after it. Returns the new Segments for `text`, or None
+        if the parser was not between items where `pad` starts."""
+        ctx = CompilationContext()
+        tokens = list(lexer.tokenize_iter(text + pad, ctx))
+        lex_errors = ctx.diagnostics.items[:]
+        count = bisect_right(tokens, len(text) - 1, key=lambda token: token.offset) if pad else len(tokens)
+        parser = Parser(TokenStream.from_tokens(tokens), ctx)
+        items = parser.parse_items()
+        parsed = []   # (start, Function or None, parse diagnostics)
+        while not pad or parser.position < count:
+            reported = len(ctx.diagnostics)
+            item = next(items, None)
+            if item is None:
+                break
+            parsed.append((item[0], item[1], ctx.diagnostics.items[reported:]))
+        if pad and parser.position != count:
+            return None
+
+        source_map = SourceMap(text)
+        line_count = source_map.line_count
+        # A segment starts at each item whose first token begins a line
+        first_lines = [1] + [tokens[start].line for start, _, _ in parsed
+                             if 0 < start < count and tokens[start - 1].line < tokens[start].line]
+        segments = []
+        for index, first_line in enumerate(first_lines):
+            end_line = first_lines[index + 1] if index + 1 < len(first_lines) else line_count + 1
+            end = source_map.offset(end_line) if end_line <= line_count else len(text)
+            segments.append(Segment(text[source_map.offset(first_line):end]))
+        segment_starts = [source_map.offset(line) for line in first_lines]
+
+        for token in tokens[:count]:
+            index = bisect_right(segment_starts, token.offset) - 1
+            lines = first_lines[index] - 1
+            segments[index].tokens.append(
+                Token(token.kind, token.value, token.line - lines, token.column, token.offset - segment_starts[index]))
+        for error in lex_errors:
+            line, column = error.span.line, error.span.column
+            if line > line_count or (pad and source_map.offset(line, column) >= len(text)):
+                continue   # In `pad`
+            index = bisect_right(first_lines, line) - 1
+            segments[index].lex_diagnostics.append(error.moved(1 - first_lines[index]))
+        for start, func, diagnostics in parsed:
+            line = tokens[start].line if start < len(tokens) else first_lines[-1]
+            index = bisect_right(first_lines, line) - 1
+            segment = segments[index]
+            if func is not None:
+                _shift_lines(func, 1 - first_lines[index])
+                segment.functions.append(func)
+            segment.parse_diagnostics += [d.moved(1 - first_lines[index]) for d in diagnostics]
+        return segments
+
+    def _check(self, reparsed):
+        """Rerun the signature pass; recheck the bodies in the segments
+        numbered in `reparsed` and those reading a changed function.
+        Returns the number of bodies checked."""
+        analyzer = SemanticAnalyzer(CompilationContext())
+        reported = analyzer.diagnostics.items
+        for segment in self.segments:
+            first = len(reported)
+            for func in segment.functions:
+                analyzer.declare_function(func)
+            segment.signature_diagnostics = reported[first:]
+        symtab, signatures = analyzer.symtab, analyzer.function_signatures
+        new_globals = {name: (symtab.lookup(name).type, signature) for name, signature in signatures.items()}
+        changed = {name for name in new_globals.keys() | self.globals.keys()
+                   if new_globals.get(name) != self.globals.get(name)}
+        self.globals = new_globals
+
+        checked = 0
+        for number, segment in enumerate(self.segments):
+            if number in reparsed:
+                segment.body_diagnostics = [None] * len(segment.functions)
+                segment.names = [_global_names(func) for func in segment.functions]
+            for index, func in enumerate(segment.functions):
+                if number in reparsed or segment.names[index] & changed:
+                    ctx = CompilationContext()
+                    analyze_function(func, symtab, signatures, ctx)
+                    segment.body_diagnostics[index] = ctx.diagnostics.items
+                    checked += 1
+        return checked
+
+
+def _global_names(func):
+    names = set()
+    for node in walk(func):
+        kind = node.__class__
+        if kind is Name:
+            names.add(node.id)
+        elif kind is Call or kind is Assign:
+            names.add(node.name)
+    return names
+
+
+def _shift_lines(node, lines):
+    for item in walk(node):
+        if item.line:
+            item.line += lines
+
@@ -1,107 +1,143 @@
-from scripts.ast import *
-
-temp_count = 0
-
-def new_temp():
-    global temp_count
-    temp_count += 1
-    return f"t{temp_count}"
-
-def generate_intermediate_code(ast: Program):
-    print("\n🧾 Intermediate Code (TAC):")
-    for func in ast.functions:
-        print(f"# Function: {func.name}")
-        for stmt in func.body:
-            gen_stmt(stmt)
-
-def gen_stmt(stmt: Statement):
-    if stmt.value.startswith("declare"):
-        parts = stmt.value.split()
-        if len(parts) < 3:
-            print(f"❌ Invalid declaration statement: {stmt.value}")
-            return
-        _, var_type, var_name = parts
-
-        if stmt.expression:
-            code, temp = gen_expression(stmt.expression)
-            for line in code:
-                print(line)
-            print(f"{var_name} = {temp}")
-        else:
-            print(f"❌ Declaration missing expression: {stmt.value}")
-
-    elif stmt.value.startswith("expr"):
-        parts = stmt.value.split()
-        if len(parts) < 3:
-            print(f"❌ Invalid assignment statement: {stmt.value}")
-            return
-        _, left, _ = parts
-        if stmt.expression:
-            code, temp = gen_expression(stmt.expression)
-            for line in code:
-                print(line)
-            print(f"{left} = {temp}")
-        else:
-            print(f"❌ Assignment missing expression: {stmt.value}")
-
-    elif stmt.value.startswith("return"):
-        if stmt.expression:
-            code, temp = gen_expression(stmt.expression)
-            for line in code:
-                print(line)
-            print(f"return {temp}")
-        else:
-            parts = stmt.value.split()
-            if len(parts) >= 2:
-                _, ret_var = parts
-                print(f"return {ret_var}")
-            else:
-                print(f"❌ Invalid return statement: {stmt.value}")
-
-    elif stmt.func_call:
-        tmp = new_temp()
-        arg_list = ", ".join(stmt.func_call.args)
-        print(f"{tmp} = call {stmt.func_call.name}, {arg_list}")
-        left = stmt.value.split()[1]  # call z = func()
-        print(f"{left} = {tmp}")
-
-    elif stmt.if_stmt:
-        label_else = f"L{new_temp()}"
-        label_end = f"L{new_temp()}"
-        cond_code, cond_temp = gen_expression(stmt.if_stmt.condition)
-        for line in cond_code:
-            print(line)
-        print(f"if_false {cond_temp} goto {label_else}")
-        for s in stmt.if_stmt.true_branch:
-            gen_stmt(s)
-        print(f"goto {label_end}")
-        print(f"{label_else}:")
-        if stmt.if_stmt.false_branch:
-            for s in stmt.if_stmt.false_branch:
-                gen_stmt(s)
-        print(f"{label_end}:")
-
-    elif stmt.while_stmt:
-        label_start = f"L{new_temp()}"
-        label_end = f"L{new_temp()}"
-        print(f"{label_start}:")
-        cond_code, cond_temp = gen_expression(stmt.while_stmt.condition)
-        for line in cond_code:
-            print(line)
-        print(f"if_false {cond_temp} goto {label_end}")
-        for s in stmt.while_stmt.body:
-            gen_stmt(s)
-        print(f"goto {label_start}")
-        print(f"{label_end}:")
-
-def gen_expression(expr):
-    if isinstance(expr, str):
-        return [], expr
-    elif isinstance(expr, Expression):
-        left_code, left_temp = gen_expression(expr.left)
-        right_code, right_temp = gen_expression(expr.right)
-        result = new_temp()
-        code = left_code + right_code + [f"{result} = {left_temp} {expr.operator} {right_temp}"]
-        return code, result
-    else:
-        return [], str(expr)
+import re
+
+from scripts.ast import *
+from scripts import tac
+from scripts.context import CompilationContext
+from scripts.tac import Instr
+
+def generate_intermediate_code(ast: Program, ctx=None) -> tac.Module:
+    return TACGenerator(ctx or CompilationContext()).visit(ast)
+
+
+# Temps are named "t<N>"; a variable spelled like one is renamed so the two
+# can never share a TAC name.
+TEMP_LIKE = re.compile(r't\d+')
+
+
+class TACGenerator(NodeVisitor):
+    """Visitors append instructions to the current function's code buffer.
+    Expression visitors emit the code for their operands first and return
+    the operand naming their value.
+
+    TAC has one flat namespace per function, so a declaration that shadows
+    a visible variable (or looks like a temp) gets a fresh "<name>_<N>"
+    that no identifier in the function uses. `bindings` maps source names
+    to TAC names and each block scope keeps an undo list for it."""
+
+    def __init__(self, ctx):
+        self.ctx = ctx
+        self.code = None
+        self.bindings = {}
+        self.scopes = []
+        self.taken = set()
+
+    def visit_Program(self, node):
+        return tac.Module([self.visit(func) for func in node.functions])
+
+    def visit_Function(self, node):
+        self.bindings = {}
+        self.scopes = [[]]
+        self.taken = {getattr(item, 'name', None) or getattr(item, 'id', None)
+                      for item in walk(node) if item.__class__ in (Param, VarDecl, Assign, Name)}
+        func = tac.Function(node.name, [self.declare(p.name) for p in node.params])
+        self.code = func.code
+        for stmt in node.body:
+            self.visit(stmt)
+        self.code = None
+        return func
+
+    def declare(self, name):
+        target = name
+        if name in self.bindings or TEMP_LIKE.fullmatch(name):
+            number = 1
+            while f"{name}_{number}" in self.taken:
+                number += 1
+            target = f"{name}_{number}"
+            self.taken.add(target)
+        self.scopes[-1].append((name, self.bindings.get(name)))
+        self.bindings[name] = target
+        return target
+
+    def visit_block(self, stmts):
+        self.scopes.append([])
+        for stmt in stmts:
+            self.visit(stmt)
+        bindings = self.bindings
+        for name, previous in reversed(self.scopes.pop()):
+            if previous is None:
+                del bindings[name]
+            else:
+                bindings[name] = previous
+
+    # Statements
+
+    def visit_VarDecl(self, node):
+        temp = self.visit(node.value)
+        self.code.append(Instr(tac.COPY, self.declare(node.name), temp))
+
+    def visit_Assign(self, node):
+        temp = self.visit(node.value)
+        self.code.append(Instr(tac.COPY, self.bindings.get(node.name, node.name), temp))
+
+    def visit_Return(self, node):
+        temp = self.visit(node.value)
+        self.code.append(Instr(tac.RETURN, src1=temp))
+
+    def visit_If(self, node):
+        code = self.code
+        label_else = self.ctx.new_label()
+        label_end = self.ctx.new_label()
+        cond_temp = self.visit(node.condition)
+        code.append(Instr(tac.IF_FALSE, label_else, cond_temp))
+        self.visit_block(node.then_body)
+        code.append(Instr(tac.GOTO, label_end))
+        code.append(Instr(tac.LABEL, label_else))
+        if node.else_body:
+            self.visit_block(node.else_body)
+        code.append(Instr(tac.LABEL, label_end))
+
+    def visit_While(self, node):
+        code = self.code
+        label_start = self.ctx.new_label()
+        label_end = self.ctx.new_label()
+        code.append(Instr(tac.LABEL, label_start))
+        cond_temp = self.visit(node.condition)
+        code.append(Instr(tac.IF_FALSE, label_end, cond_temp))
+        self.visit_block(node.body)
+        code.append(Instr(tac.GOTO, label_start))
+        code.append(Instr(tac.LABEL, label_end))
+
+    # Expressions
+
+    def visit_Name(self, node):
+        return self.bindings.get(node.id, node.id)
+
+    def visit_Literal(self, node):
+        return node.value
+
+    def visit_BinOp(self, node):
+        # Post-order walk with an explicit stack so long operator chains
+        # neither recurse nor build intermediate lists
+        code = self.code
+        results = []
+        stack = [(node, False)]
+        while stack:
+            expr, operands_done = stack.pop()
+            if expr.__class__ is not BinOp:
+                results.append(self.visit(expr))
+            elif operands_done:
+                right = results.pop()
+                result = self.ctx.new_temp()
+                code.append(Instr(expr.op, result, results[-1], right))
+                results[-1] = result
+            else:
+                stack.append((expr, True))
+                stack.append((expr.right, False))
+                stack.append((expr.left, False))
+        return results[0]
+
+    def visit_Call(self, node):
+        args = tuple(self.visit(arg) for arg in node.args)
+        result = self.ctx.new_temp()
+        self.code.append(Instr(tac.CALL, result, node.name, args))
+        return result
@@ -1,62 +1,195 @@
-import re
-
-TOKEN_SPEC = [
-    ('COMMENT', r'//.*'),  # Comments (ignored)
-    ('NUMBER', r'\d+(\.\d*)?'),  # Integer or float
-    ('ID', r'[A-Za-z_][A-Za-z0-9_]*'),  # Identifiers
-    ('OP', r'[+\-*/=<>]'),  # Operators
-    ('LPAREN', r'\('),
-    ('RPAREN', r'\)'),
-    ('LBRACE', r'\{'),
-    ('RBRACE', r'\}'),
-    ('SEMI', r';'),
-    ('COMMA', r','),
-    ('WS', r'\s+'),  # Whitespace (ignored)
-]
-
-TOKEN_REGEX = '|'.join(f'(?P<{name}>{pattern})' for name, pattern in TOKEN_SPEC)
-
-KEYWORDS = {'int', 'float', 'bool', 'if', 'else', 'while', 'return'}
-
-
-def tokenize(code):
-    tokens = []
-    line_num = 1
-    line_start = 0
-
-    for mo in re.finditer(TOKEN_REGEX, code):
-        kind = mo.lastgroup
-        value = mo.group()
-        start = mo.start()
-        end = mo.end()
-
-        # Count line number & column
-        line_num += code[line_start:start].count('\n')
-        if '\n' in code[line_start:start]:
-            line_start = code.rfind('\n', line_start, start) + 1
-
-        column = start - line_start + 1
-
-        if kind in ['WS', 'COMMENT']:
-            continue
-
-        if kind == 'ID' and value in KEYWORDS:
-            kind = value.upper()
-
-        tokens.append((kind, value))
-
-    # Check for unmatched characters
-    combined_pattern = re.compile(TOKEN_REGEX)
-    pos = 0
-    while pos < len(code):
-        match = combined_pattern.match(code, pos)
-        if match:
-            pos = match.end()
-        else:
-            # Report invalid character with line/column
-            line = code[:pos].count('\n') + 1
-            col = pos - code.rfind('\n', 0, pos)
-            print(f"❌ Lexical Error: Invalid character '{code[pos]}' at line {line}, column {col}")
-            pos += 1  # Skip invalid char and keep scanning
-
-    return tokens
+import mmap
+import os
+import re
+from typing import NamedTuple
+
+from scripts.context import CompilationContext
+from scripts.diagnostics import INVALID_CHARACTER, located
+
+TOKEN_SPEC = [
+    ('COMMENT', r'//.*'),  # Comments (ignored)
+    ('NUMBER', r'\d+(\.\d*)?'),  # Integer or float
+    ('ID', r'[A-Za-z_][A-Za-z0-9_]*'),  # Identifiers
+    ('OP', r'[+\-*/=<>]'),  # Operators
+    ('LPAREN', r'\('),
+    ('RPAREN', r'\)'),
+    ('LBRACE', r'\{'),
+    ('RBRACE', r'\}'),
+    ('SEMI', r';'),
+    ('COMMA', r','),
+    ('WS', r'\s+'),  # Whitespace (ignored)
+]
+
+TOKEN_REGEX = '|'.join(f'(?P<{name}>{pattern})' for name, pattern in TOKEN_SPEC)
+
+KEYWORDS = {'int', 'float', 'bool', 'if', 'else', 'while', 'return'}
+
+KEYWORD_KINDS = {kw: kw.upper() for kw in KEYWORDS}
+
+# Leading whitespace is folded into every match and invalid characters fall
+# through to MISMATCH, so a single pass finds tokens, positions and errors.
+# re.ASCII keeps \s and \d to ASCII as in the bytes scanner below, so a
+# no-break space or an Arabic digit is an invalid character in both.
+SCAN_REGEX = re.compile(
+    r'(\s*)(?:'
+    + '|'.join(f'(?P<{name}>{pattern})' for name, pattern in TOKEN_SPEC if name != 'WS')
+    + r'|(?P<MISMATCH>(?s:.))|\Z)',
+    re.ASCII,
+)
+
+# Same scanner over raw bytes; a multi-byte UTF-8 sequence is one mismatch
+SCAN_REGEX_BYTES = re.compile(
+    SCAN_REGEX.pattern.replace('(?s:.)', r'[\xc2-\xf4][\x80-\xbf]*|(?s:.)').encode('latin-1')
+)
+
+CHUNK_SIZE = 1 << 20
+
+# A run of adjacent invalid characters is one error, showing at most this many
+MAX_SHOWN = 20
+
+
+class Token(NamedTuple):
+    kind: str
+    value: str
+    line: int
+    column: int
+    offset: int
+
+
+_new_token = tuple.__new__
+
+
+def tokenize_iter(code, ctx=None):
+    ctx = ctx or CompilationContext(echo=True)
+    line_num = 1
+    line_start = 0
+    count = code.count
+    run_start = run_end = -1   # Invalid characters not reported yet
+    run_line = run_column = 0
+
+    for mo in SCAN_REGEX.finditer(code):
+        kind = mo.lastgroup
+        ws_start, start = mo.span(1)
+        if run_end >= 0 and (kind != 'MISMATCH' or start != run_end):
+            report_invalid_run(ctx, code, run_start, run_end, run_line, run_column)
+            run_end = -1
+
+        # Count line number & column from the skipped whitespace only
+        if start != ws_start and count('\n', ws_start, start):
+            line_num += count('\n', ws_start, start)
+            line_start = code.rfind('\n', ws_start, start) + 1
+
+        if kind == 'ID':
+            value = mo[kind]
+            kind = KEYWORD_KINDS.get(value, kind)
+        elif kind is None or kind == 'COMMENT':
+            continue
+        elif kind == 'MISMATCH':
+            if run_end < 0:
+                run_start, run_line, run_column = start, line_num, start - line_start + 1
+            run_end = mo.end()
+            continue
+        else:
+            value = mo[kind]
+
+        yield _new_token(Token, (kind, value, line_num, start - line_start + 1, start))
+
+
+def tokenize_buffer(buf, chunk_size=CHUNK_SIZE, ctx=None):
+    """Lex a bytes-like buffer (bytes, bytearray, mmap) a chunk at a time.
+
+    Only one chunk is copied out of the buffer at once. A token that runs
+    into the end of a chunk may continue past it (a number, an identifier,
+    a `/` that turns out to start a comment), so it is carried over and
+    rescanned together with the next chunk. Whitespace before it is
+    counted and dropped, and a comment is carried as just `//`, so long
+    comments and blank runs are scanned once. Columns count bytes rather
+    than characters.
+    """
+    ctx = ctx or CompilationContext(echo=True)
+    size = len(buf)
+    read_pos = 0
+    carry = b''
+    line_num = 1
+    line_start = 0
+    run_start = run_end = -1
+    run_line = run_column = 0
+
+    while True:
+        base = read_pos - len(carry)  # absolute offset of chunk[0]
+        read_end = min(read_pos + chunk_size, size)
+        chunk = carry + buf[read_pos:read_end]
+        read_pos = read_end
+        final = read_pos >= size
+        chunk_len = len(chunk)
+        count = chunk.count
+        carry = b''
+
+        for mo in SCAN_REGEX_BYTES.finditer(chunk):
+            kind = mo.lastgroup
+            ws_start, start = mo.span(1)
+            if run_end >= 0 and (kind != 'MISMATCH' or base + start != run_end):
+                report_invalid_run(ctx, buf, run_start, run_end, run_line, run_column)
+                run_end = -1
+
+            if start != ws_start and count(b'\n', ws_start, start):
+                line_num += count(b'\n', ws_start, start)
+                line_start = base + chunk.rfind(b'\n', ws_start, start) + 1
+
+            if not final and mo.end() == chunk_len:
+                # The comment's text is never needed, only that the next
+                # chunk starts inside it
+                carry = b'//' if kind == 'COMMENT' else chunk[start:]
+                break
+
+            if kind is None or kind == 'COMMENT':
+                continue
+            if kind == 'MISMATCH':
+                if run_end < 0:
+                    run_start, run_line, run_column = base + start, line_num, base + start - line_start + 1
+                run_end = base + mo.end()
+                continue
+            value = mo[kind].decode('utf-8', 'replace')
+            if kind == 'ID':
+                kind = KEYWORD_KINDS.get(value, kind)
+
+            yield _new_token(Token, (kind, value, line_num, base + start - line_start + 1, base + start))
+
+        if final:
+            return
+
+
+def tokenize_file(path, chunk_size=CHUNK_SIZE, ctx=None):
+    with open(path, 'rb') as file:
+        if os.fstat(file.fileno()).st_size == 0:
+            return
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+            yield from tokenize_buffer(buf, chunk_size, ctx)
+
+
+def report_invalid_char(ctx, chars, line, column):
+    """Report `chars`, one or more adjacent invalid characters, as one error."""
+    diagnostics = ctx.diagnostics
+    if diagnostics.full:
+        diagnostics.dropped += 1   # Past max_errors: not worth formatting
+        return
+    if len(chars) == 1:
+        message = f"❌ Lexical Error: Invalid character '{chars}'"
+    else:
+        shown = chars if len(chars) <= MAX_SHOWN else chars[:MAX_SHOWN] + '...'
+        message = f"❌ Lexical Error: Invalid characters '{shown}'"
+    ctx.error(INVALID_CHARACTER, located(message, line, column), line, column)
+
+
+def report_invalid_run(ctx, source, start, end, line, column):
+    """Report source[start:end] (str, or UTF-8 bytes) as one error, copying
+    no more of it than the message shows."""
+    if isinstance(source, str):
+        chars = source[start:min(end, start + MAX_SHOWN + 1)]
+    else:
+        chars = bytes(source[start:min(end, start + 4 * (MAX_SHOWN + 1))]).decode('utf-8', 'replace')
+    report_invalid_char(ctx, chars, line, column)
+
+
+def tokenize(code, ctx=None):
+    return [(tok[0], tok[1]) for tok in tokenize_iter(code, ctx)]
@@ -0,0 +1,141 @@
+"""Per-phase timers and counters for one compilation.
+
+A CompilationContext only carries a Metrics object when one is asked for
+(main.py --metrics). Every hook goes through phase() and checks for None
+first, so an ordinary compile pays one attribute test per phase. Each phase
+records wall and CPU time; with `trace_memory` also its tracemalloc peak,
+and with `profile` the phases run under one cProfile profiler whose
+hottest functions are added to the report.
+"""
+import cProfile
+import json
+import pstats
+import time
+import tracemalloc
+from collections import Counter
+from contextlib import contextmanager, nullcontext
+from dataclasses import dataclass, asdict
+from typing import Optional
+
+from scripts.ast import walk
+from scripts.diagnostics import ERROR
+
+PROFILE_ENTRIES = 15
+_NO_PHASE = nullcontext()
+
+
+@dataclass
+class PhaseTiming:
+    wall: float = 0.0
+    cpu: float = 0.0
+    calls: int = 0
+    peak_bytes: Optional[int] = None   # Only with trace_memory
+
+
+class Metrics:
+    def __init__(self, profile=False, trace_memory=False):
+        self.phases = {}            # Name -> PhaseTiming, in the order phases first ran
+        self.counters = Counter()
+        self.node_kinds = Counter()
+        self.profiler = cProfile.Profile() if profile else None
+        self.trace_memory = trace_memory
+
+    @contextmanager
+    def phase(self, name):
+        timing = self.phases.get(name)
+        if timing is None:
+            timing = self.phases[name] = PhaseTiming()
+        started_tracing = False
+        if self.trace_memory:
+            if tracemalloc.is_tracing():
+                tracemalloc.reset_peak()
+            else:
+                tracemalloc.start()
+                started_tracing = True
+            baseline = tracemalloc.get_traced_memory()[0]
+        if self.profiler is not None:
+            self.profiler.enable()
+        wall = time.perf_counter()
+        cpu = time.process_time()
+        try:
+            yield timing
+        finally:
+            timing.wall += time.perf_counter() - wall
+            timing.cpu += time.process_time() - cpu
+            timing.calls += 1
+            if self.profiler is not None:
+                self.profiler.disable()
+            if self.trace_memory:
+                peak = tracemalloc.get_traced_memory()[1] - baseline
+                timing.peak_bytes = max(timing.peak_bytes or 0, peak)
+                if started_tracing:
+                    tracemalloc.stop()
+
+    def count(self, name, amount=1):
+        self.counters[name] += amount
+
+    def record_result(self, result, ctx):
+        """Counters that can be read off a finished CompilationResult."""
+        counters = self.counters
+        counters['tokens'] = len(result.tokens)
+        self.node_kinds = Counter(node.__class__.__name__ for node in walk(result.ast))
+        counters['ast_nodes'] = sum(self.node_kinds.values())
+        if not result.cached:
+            # ctx only counted temps and labels if it generated the TAC
+            counters['temps'] = ctx.temp_count
+            counters['labels'] = ctx.label_count
+        counters['instructions'] = sum(len(func.code) for func in result.module.functions)
+        counters['diagnostics'] = len(result.diagnostics)
+        counters['errors'] = sum(1 for d in result.diagnostics if d.severity == ERROR)
+
+    def profile_entries(self, limit=PROFILE_ENTRIES):
+        """The `limit` functions with the most cumulative time, as dicts."""
+        if self.profiler is None:
+            return []
+        stats = pstats.Stats(self.profiler).stats
+        rows = sorted(stats.items(), key=lambda item: item[1][3], reverse=True)[:limit]
+        return [{'function': f"{path}:{line}({name})", 'calls': calls,
+                 'total_seconds': total, 'cumulative_seconds': cumulative}
+                for (path, line, name), (_, calls, total, cumulative, _) in rows]
+
+    def to_dict(self):
+        return {
+            'phases': {name: asdict(timing) for name, timing in self.phases.items()},
+            'counters': dict(self.counters),
+            'node_kinds': dict(self.node_kinds.most_common()),
+            'profile': self.profile_entries(),
+        }
+
+    def to_json(self):
+        return json.dumps(self.to_dict(), indent=2)
+
+    def format_text(self):
+        lines = [f"  {'phase':<10} {'wall ms':>10} {'cpu ms':>10} {'peak KiB':>10}"]
+        for name, timing in self.phases.items():
+            peak = "-" if timing.peak_bytes is None else f"{timing.peak_bytes / 1024:,.0f}"
+            lines.append(f"  {name:<10} {timing.wall * 1000:>10.2f} {timing.cpu * 1000:>10.2f} {peak:>10}")
+        total = sum(timing.wall for timing in self.phases.values())
+        lines.append(f"  {'total':<10} {total * 1000:>10.2f}")
+        if self.phases:
+            slowest = max(self.phases, key=lambda name: self.phases[name].wall)
+            lines.append(f"  slowest phase: {slowest}")
+        lines.append("")
+        for name, value in sorted(self.counters.items()):
+            lines.append(f"  {name:<18} {value:>10,}")
+        if self.node_kinds:
+            kinds = ", ".join(f"{kind} {count:,}" for kind, count in self.node_kinds.most_common())
+            lines.append(f"  {'node kinds':<18} {kinds}")
+        entries = self.profile_entries()
+        if entries:
+            lines.append("")
+            lines.append(f"  {'cumulative':>12} {'calls':>8} function")
+        for entry in entries:
+            lines.append(f"  {entry['cumulative_seconds'] * 1000:>10.2f}ms {entry['calls']:>8} "
+                         f"{entry['function']}")
+        return "\n".join(lines)
+
+
+def phase(ctx, name):
+    """Time a block as phase `name` when `ctx` collects metrics."""
+    metrics = ctx.metrics
+    return _NO_PHASE if metrics is None else metrics.phase(name)
@@ -0,0 +1,683 @@
+import gc
+import itertools
+import math
+from collections import Counter
+from dataclasses import dataclass
+
+from scripts import tac
+from scripts.cfg import build_cfg, flatten, dominators, dominator_tree, reverse_postorder
+from scripts.ssa import to_ssa, from_ssa, restore_names, rename_uses
+from scripts.tac import (
+    BINARY_OPS, COPY, CALL, RETURN, LABEL, GOTO, IF_FALSE, PHI,
+    is_constant, parse_constant, format_constant, evaluate, uses, defines,
+)
+
+# Local passes work on extended basic blocks: facts are dropped at every
+# label (a possible join point) but survive the fall-through of if_false.
+# Each pass takes a tac.Function, rewrites it in place and returns True
+# if anything changed.
+
+COMMUTATIVE_OPS = {'+', '*', '='}
+COMPARISON_OPS = {'<', '>', '='}
+
+
+def fold_constants(func):
+    """Evaluate operators on constant operands, apply x+0 / x*1 style
+    identities, and resolve if_false on a constant condition."""
+    changed = False
+    code = []
+    for instr in func.code:
+        op = instr.opcode
+        if op in BINARY_OPS:
+            left, right = instr.src1, instr.src2
+            if is_constant(left) and is_constant(right):
+                folded = _fold(op, left, right)
+                if folded is not None:
+                    instr.opcode, instr.src1, instr.src2 = COPY, folded, None
+                    changed = True
+            else:
+                same = _identity_operand(op, left, right)
+                if same is not None:
+                    instr.opcode, instr.src1, instr.src2 = COPY, same, None
+                    changed = True
+        elif op == IF_FALSE and is_constant(instr.src1) and _constant_value(instr.src1) is not None:
+            changed = True
+            if _constant_value(instr.src1) != 0:
+                continue  # Never taken
+            instr.opcode, instr.src1 = GOTO, None
+        code.append(instr)
+    func.code = code
+    return changed
+
+
+def _constant_value(text):
+    """The value of a constant operand, or None if Python cannot convert it
+    (an int literal longer than the interpreter's digit limit)."""
+    try:
+        return parse_constant(text)
+    except ValueError:
+        return None
+
+
+def _finite(value):
+    return not isinstance(value, float) or math.isfinite(value)
+
+
+def _fold(op, left, right):
+    """Constant text for `left op right`, or None if it has to be left for
+    run time: division by zero, a float overflow, or a value too long to
+    convert."""
+    try:
+        value = evaluate(op, parse_constant(left), parse_constant(right))
+        return format_constant(value) if _finite(value) else None
+    except (ZeroDivisionError, OverflowError, ValueError):
+        return None
+
+
+def _small_int(operand):
+    """True for an int constant that converts to a float without overflow."""
+    if not is_constant(operand):
+        return False
+    value = _constant_value(operand)
+    if value.__class__ is not int:
+        return False
+    try:
+        float(value)
+    except OverflowError:
+        return False
+    return True
+
+
+def _may_fail(instr):
+    """True for arithmetic that may stop the program: a division that is
+    not by a nonzero int constant, or any operator that could mix a float
+    with an int too large to convert (OverflowError). An int constant that
+    fits a float rules out the latter. Such an instruction is never
+    removed or moved even when its result is unused."""
+    op = instr.opcode
+    if op not in BINARY_OPS or op in COMPARISON_OPS:
+        return False   # Python compares ints and floats exactly
+    if op == '/':
+        divisor = instr.src2
+        return not (_small_int(divisor) and _constant_value(divisor) != 0)
+    return not (_small_int(instr.src1) or _small_int(instr.src2))
+
+
+def _identity_operand(op, left, right):
+    if op == '+':
+        if right == '0':
+            return left
+        if left == '0':
+            return right
+    elif op == '-' and right == '0':
+        return left
+    elif op == '*':
+        if right == '1':
+            return left
+        if left == '1':
+            return right
+    elif op == '/' and right == '1':
+        return left
+    return None
+
+
+def propagate_copies(func):
+    """Replace uses of `x` after `x = y` by `y` until either is redefined,
+    then fold `t = <expr>; x = t` into `x = <expr>` when that copy is the
+    only use of t."""
+    changed = False
+    copies = {}      # name -> operand it currently equals
+    copied_by = {}   # operand -> names currently mapped to it
+
+    def kill(name):
+        source = copies.pop(name, None)
+        if source is not None and source in copied_by:
+            copied_by[source].discard(name)
+        for alias in copied_by.pop(name, ()):
+            copies.pop(alias, None)
+
+    for instr in func.code:
+        op = instr.opcode
+        if op == LABEL:
+            copies.clear()
+            copied_by.clear()
+            continue
+
+        if copies:
+            if op in BINARY_OPS:
+                src1 = copies.get(instr.src1, instr.src1)
+                src2 = copies.get(instr.src2, instr.src2)
+                if src1 is not instr.src1 or src2 is not instr.src2:
+                    instr.src1, instr.src2 = src1, src2
+                    changed = True
+            elif op == COPY or op == RETURN or op == IF_FALSE:
+                if instr.src1 in copies:
+                    instr.src1 = copies[instr.src1]
+                    changed = True
+            elif op == CALL:
+                args = tuple(copies.get(arg, arg) for arg in instr.src2)
+                if args != instr.src2:
+                    instr.src2 = args
+                    changed = True
+
+        dest = defines(instr)
+        if dest is not None:
+            kill(dest)
+            if op == COPY and instr.src1 != dest:
+                copies[dest] = instr.src1
+                if not is_constant(instr.src1):
+                    copied_by.setdefault(instr.src1, set()).add(dest)
+
+    return _coalesce_copies(func) or changed
+
+
+def _coalesce_copies(func):
+    counts = Counter(operand for instr in func.code for operand in uses(instr))
+    code = []
+    for instr in func.code:
+        if instr.opcode == COPY and code:
+            prev = code[-1]
+            if defines(prev) == instr.src1 and counts[instr.src1] == 1:
+                prev.dest = instr.dest
+                continue
+        code.append(instr)
+    changed = len(code) != len(func.code)
+    func.code = code
+    return changed
+
+
+def eliminate_common_subexpressions(func):
+    """Local value numbering: an operator whose operands have the same
+    value numbers as an earlier one becomes a copy of a name that still
+    holds that value."""
+    changed = False
+    new_number = itertools.count().__next__
+    value_of = {}    # operand -> value number
+    holder_of = {}   # value number -> a name or constant that held it
+    expressions = {}
+
+    def number(operand):
+        vn = value_of.get(operand)
+        if vn is None:
+            vn = value_of[operand] = new_number()
+            holder_of[vn] = operand
+        return vn
+
+    def assign(name, vn):
+        value_of[name] = vn
+        holder = holder_of.get(vn)
+        if holder is None or value_of.get(holder) != vn:
+            holder_of[vn] = name
+
+    for instr in func.code:
+        op = instr.opcode
+        if op == LABEL:
+            value_of.clear()
+            holder_of.clear()
+            expressions.clear()
+        elif op in BINARY_OPS:
+            left, right = number(instr.src1), number(instr.src2)
+            if op in COMMUTATIVE_OPS and right < left:
+                left, right = right, left
+            key = (op, left, right)
+            vn = expressions.get(key)
+            if vn is not None:
+                holder = holder_of.get(vn)
+                if holder is not None and value_of.get(holder) == vn:
+                    instr.opcode, instr.src1, instr.src2 = COPY, holder, None
+                    changed = True
+            else:
+                vn = expressions[key] = new_number()
+            assign(instr.dest, vn)
+        elif op == COPY:
+            assign(instr.dest, number(instr.src1))
+        elif op == CALL:
+            assign(instr.dest, new_number())
+    return changed
+
+
+def eliminate_dead_code(func):
+    """Drop unreachable code, jumps to the next instruction, unused labels,
+    self copies and operators/copies whose result is never read. Calls, and
+    arithmetic that may fail, are always kept."""
+    code = func.code
+    size = len(code)
+
+    # Unreachable code after goto/return up to the next label
+    live = []
+    reachable = True
+    for instr in code:
+        if instr.opcode == LABEL:
+            reachable = True
+        if reachable:
+            live.append(instr)
+            if instr.opcode == GOTO or instr.opcode == RETURN:
+                reachable = False
+    code = live
+
+    # Jumps to the label that follows, then labels nobody jumps to
+    code = [instr for i, instr in enumerate(code)
+            if not (instr.opcode == GOTO and i + 1 < len(code)
+                    and code[i + 1].opcode == LABEL and code[i + 1].dest == instr.dest)]
+    targets = {instr.dest for instr in code if instr.opcode == GOTO or instr.opcode == IF_FALSE}
+    code = [instr for instr in code if instr.opcode != LABEL or instr.dest in targets]
+
+    # Results that are never read, repeated until nothing else dies
+    counts = Counter(operand for instr in code for operand in uses(instr))
+    while True:
+        kept = []
+        for instr in reversed(code):
+            op = instr.opcode
+            if ((op in BINARY_OPS or op == COPY) and not _may_fail(instr)
+                    and (counts[instr.dest] == 0 or instr.src1 == instr.dest and op == COPY)):
+                for operand in uses(instr):
+                    counts[operand] -= 1
+                continue
+            kept.append(instr)
+        kept.reverse()
+        if len(kept) == len(code):
+            break
+        code = kept
+
+    func.code = code
+    return len(code) != size
+
+
+# Global passes work on the SSA form of the function's control-flow graph.
+# Going in and out of SSA can reorder copies without the transform having
+# done anything useful, so a pass only reports a change when the code it
+# produces differs from what it started with. The pass manager runs
+# consecutive global passes on one round trip.
+
+def _on_ssa(func, transforms):
+    """Run `transforms` in order on one SSA round trip of `func`; True if
+    the function changed."""
+    if not any(instr.opcode == LABEL for instr in func.code):
+        return False   # Straight-line code: the local passes see it all
+    cfg = build_cfg(func)
+    names = to_ssa(cfg)
+    changed = False
+    for transform in transforms:
+        if transform(cfg, names):
+            changed = True
+    if not changed:
+        return False
+    from_ssa(cfg, names)
+    restore_names(cfg, names)
+    cfg.skip_empty_blocks()
+    code = flatten(cfg)
+    if code == func.code:
+        return False
+    func.code = code
+    return True
+
+
+_UNKNOWN = object()     # Not known yet (lattice top)
+_VARYING = object()     # Not a constant (lattice bottom)
+
+
+def propagate_constants_globally(func):
+    """Sparse conditional constant propagation: find the SSA names that
+    hold one constant on every executable path, substitute them, and drop
+    branches that can never be taken."""
+    return _on_ssa(func, [_propagate_constants])
+
+
+def _propagate_constants(cfg, names):
+    blocks = cfg.blocks
+    defined = set()
+    users = {}
+    for block in blocks:
+        for instr in block.phis + block.code:
+            dest = defines(instr)
+            if dest is not None:
+                defined.add(dest)
+            for operand in uses(instr):
+                users.setdefault(operand, []).append((block.index, instr))
+        if block.cond is not None:
+            users.setdefault(block.cond, []).append((block.index, None))
+
+    values = {}
+
+    def value(operand):
+        if is_constant(operand):
+            constant = _constant_value(operand)
+            return _VARYING if constant is None else constant
+        if operand in values:
+            return values[operand]
+        return _UNKNOWN if operand in defined else _VARYING
+
+    executable = set()
+    visited = set()
+    flow = [(-1, 0)]
+    changed_names = []
+
+    def update(instr, new):
+        old = values.get(instr.dest, _UNKNOWN)
+        if old is _VARYING or new is _UNKNOWN:
+            return
+        if old is not _UNKNOWN:
+            if new is not _VARYING and new.__class__ is old.__class__ and new == old:
+                return
+            new = _VARYING
+        values[instr.dest] = new
+        changed_names.append(instr.dest)
+
+    def visit(index, instr):
+        op = instr.opcode
+        if op == PHI:
+            result = _UNKNOWN
+            for pred, operand in zip(blocks[index].preds, instr.src2):
+                if (pred, index) not in executable:
+                    continue
+                incoming = value(operand)
+                if incoming is _UNKNOWN:
+                    continue
+                if result is _UNKNOWN:
+                    result = incoming
+                elif incoming is _VARYING or incoming.__class__ is not result.__class__ or incoming != result:
+                    result = _VARYING
+                    break
+            update(instr, result)
+        elif op in BINARY_OPS:
+            left, right = value(instr.src1), value(instr.src2)
+            if left is _VARYING or right is _VARYING:
+                update(instr, _VARYING)
+            elif left is not _UNKNOWN and right is not _UNKNOWN:
+                try:
+                    result = evaluate(op, left, right)
+                except (ZeroDivisionError, OverflowError):
+                    result = _VARYING
+                if result is not _VARYING and not _finite(result):
+                    result = _VARYING
+                update(instr, result)
+        elif op == COPY:
+            result = value(instr.src1)
+            if result is not _UNKNOWN:
+                update(instr, result)
+        elif op == CALL:
+            update(instr, _VARYING)
+
+    def visit_branch(index):
+        block = blocks[index]
+        if block.cond is None:
+            targets = block.succs
+        else:
+            condition = value(block.cond)
+            if condition is _UNKNOWN:
+                return
+            if condition is _VARYING:
+                targets = block.succs
+            else:
+                targets = [block.fallthrough if condition != 0 else block.jump]
+        for succ in targets:
+            if (index, succ) not in executable:
+                flow.append((index, succ))
+
+    while flow or changed_names:
+        while flow:
+            edge = flow.pop()
+            if edge in executable:
+                continue
+            executable.add(edge)
+            index = edge[1]
+            block = blocks[index]
+            for phi in block.phis:
+                visit(index, phi)
+            if index not in visited:
+                visited.add(index)
+                for instr in block.code:
+                    visit(index, instr)
+                visit_branch(index)
+        while changed_names:
+            for index, instr in users.get(changed_names.pop(), ()):
+                if index in visited:
+                    if instr is None:
+                        visit_branch(index)
+                    else:
+                        visit(index, instr)
+
+    constants = {}
+    for name, result in values.items():
+        if result is not _UNKNOWN and result is not _VARYING:
+            try:
+                constants[name] = format_constant(result)
+            except ValueError:
+                pass    # Too many digits to write out; keep computing it
+    changed = bool(constants)
+    for index in visited:
+        block = blocks[index]
+        if block.cond is None:
+            continue
+        condition = value(block.cond)
+        if condition is not _UNKNOWN and condition is not _VARYING:
+            taken, dropped = ((block.fallthrough, block.jump) if condition != 0
+                              else (block.jump, block.fallthrough))
+            cfg.remove_edge(index, dropped)
+            block.cond, block.fallthrough, block.jump = None, taken, None
+            changed = True
+
+    def substitute(operand):
+        return constants.get(operand, operand)
+
+    for block in blocks:
+        block.phis = [phi for phi in block.phis if phi.dest not in constants]
+        for phi in block.phis:
+            rename_uses(phi, substitute)
+        code = []
+        for instr in block.code:
+            if instr.opcode != CALL and instr.dest in constants:
+                continue
+            rename_uses(instr, substitute)
+            code.append(instr)
+        block.code = code
+    return cfg.prune() or changed
+
+
+def hoist_loop_invariants(func):
+    """Move operators whose operands do not change inside a loop into a
+    preheader block in front of the loop. Division is only hoisted by a
+    nonzero constant, so nothing that could fail runs speculatively."""
+    return _on_ssa(func, [_hoist_loop_invariants])
+
+
+def _hoist_loop_invariants(cfg, names):
+    blocks = cfg.blocks
+    idom = dominators(cfg)
+
+    # Preorder interval of every block in the dominator tree
+    children = dominator_tree(idom)
+    enter = [0] * len(blocks)
+    leave = [0] * len(blocks)
+    clock = 0
+    work = [(0, False)]
+    while work:
+        index, done = work.pop()
+        clock += 1
+        if done:
+            leave[index] = clock
+            continue
+        enter[index] = clock
+        work.append((index, True))
+        work.extend((child, False) for child in children[index])
+
+    loops = {}
+    for block in blocks:
+        for succ in block.succs:
+            if enter[succ] <= enter[block.index] and leave[block.index] <= leave[succ]:
+                body = loops.setdefault(succ, {succ})
+                work = [block.index]
+                while work:
+                    index = work.pop()
+                    if index not in body:
+                        body.add(index)
+                        work.extend(blocks[index].preds)
+    if not loops:
+        return False
+
+    order = reverse_postorder(cfg)
+    changed = False
+    # Innermost loops first, so code can move out one level per loop
+    for header, body in sorted(loops.items(), key=lambda item: (len(item[1]), item[0])):
+        defined = set()
+        for index in body:
+            block = blocks[index]
+            defined.update(phi.dest for phi in block.phis)
+            defined.update(defines(instr) for instr in block.code if defines(instr) is not None)
+
+        hoisted = []
+        for index in order:
+            if index not in body:
+                continue
+            block = blocks[index]
+            kept = []
+            for instr in block.code:
+                if (instr.opcode in BINARY_OPS and not _may_fail(instr)
+                        and all(is_constant(operand) or operand not in defined for operand in uses(instr))):
+                    hoisted.append(instr)
+                    defined.discard(instr.dest)
+                else:
+                    kept.append(instr)
+            block.code = kept
+        if not hoisted:
+            continue
+        preheader = _preheader(cfg, names, header, body)
+        preheader.code.extend(hoisted)
+        for outer in loops.values():
+            if header in outer and outer is not body:
+                outer.add(preheader.index)
+        changed = True
+    return changed
+
+
+def _preheader(cfg, names, header, body):
+    """The single block that enters the loop from outside, creating one if
+    the header has several outside predecessors or shares one."""
+    blocks = cfg.blocks
+    block = blocks[header]
+    outside = [position for position, pred in enumerate(block.preds) if pred not in body]
+    if len(outside) == 1:
+        pred = blocks[block.preds[outside[0]]]
+        if len(pred.succs) == 1:
+            return pred
+
+    preheader = cfg.new_block(before=header)
+    preheader.fallthrough = header
+    preheader.preds = [block.preds[position] for position in outside]
+    inside = [position for position in range(len(block.preds)) if position not in outside]
+    for phi in block.phis:
+        incoming = [phi.src2[position] for position in outside]
+        if len(set(incoming)) == 1:
+            operand = incoming[0]
+        else:
+            operand = names.new(phi.src1)
+            preheader.phis.append(tac.Instr(PHI, operand, phi.src1, incoming))
+        phi.src2 = [phi.src2[position] for position in inside] + [operand]
+    for pred in preheader.preds:
+        blocks[pred].redirect(header, preheader.index)
+    block.preds = [block.preds[position] for position in inside] + [preheader.index]
+    return preheader
+
+
+PASSES = {
+    'fold': fold_constants,
+    'copy': propagate_copies,
+    'cse': eliminate_common_subexpressions,
+    'dce': eliminate_dead_code,
+    'sccp': propagate_constants_globally,
+    'licm': hoist_loop_invariants,
+}
+
+# The SSA transforms behind the global passes
+SSA_TRANSFORMS = {
+    'sccp': _propagate_constants,
+    'licm': _hoist_loop_invariants,
+}
+
+DEFAULT_PIPELINE = ('fold', 'copy', 'cse', 'copy', 'sccp', 'licm', 'dce')
+
+
+@dataclass
+class PassStat:
+    name: str
+    before: int
+    after: int
+
+
+class PassManager:
+    """Run a pipeline of passes over every function of a module, repeating
+    the whole pipeline until a round changes nothing (or `max_rounds`).
+
+    Consecutive global passes share one SSA round trip per function and
+    are reported together (for example "sccp+licm"). A step is skipped
+    for a function that has not changed since the step last left it
+    unchanged. The cyclic garbage collector is paused while
+    the pipeline runs: passes allocate many short-lived objects that form
+    no cycles, and every collection would rescan the whole IR."""
+
+    def __init__(self, pipeline=DEFAULT_PIPELINE, max_rounds=4):
+        unknown = [name for name in pipeline if name not in PASSES]
+        if unknown:
+            raise ValueError(f"Unknown optimization pass: {', '.join(unknown)}")
+        self.pipeline = pipeline
+        self.max_rounds = max_rounds
+        self.steps = []
+        for name in pipeline:
+            if name in SSA_TRANSFORMS and self.steps and self.steps[-1][0] in SSA_TRANSFORMS:
+                self.steps[-1] = self.steps[-1] + (name,)
+            else:
+                self.steps.append((name,))
+
+    def run(self, module: tac.Module):
+        collecting = gc.isenabled()
+        gc.disable()
+        try:
+            return self._run(module)
+        finally:
+            if collecting:
+                gc.enable()
+
+    def _run(self, module):
+        stats = []
+        functions = module.functions
+        version = itertools.count(1).__next__
+        versions = [0] * len(functions)
+        clean = {}   # (step, function) -> version the step last left unchanged
+        for _ in range(self.max_rounds):
+            round_changed = False
+            for step_index, step in enumerate(self.steps):
+                before = instruction_count(module)
+                for index, func in enumerate(functions):
+                    if clean.get((step_index, index)) == versions[index]:
+                        continue
+                    if step[0] in SSA_TRANSFORMS:
+                        changed = _on_ssa(func, [SSA_TRANSFORMS[name] for name in step])
+                    else:
+                        changed = PASSES[step[0]](func)
+                    if changed:
+                        versions[index] = version()
+                        round_changed = True
+                    else:
+                        clean[(step_index, index)] = versions[index]
+                stats.append(PassStat('+'.join(step), before, instruction_count(module)))
+            if not round_changed:
+                break
+        return stats
+
+
+def instruction_count(module):
+    return sum(len(func.code) for func in module.functions)
+
+
+def optimize(module, pipeline=DEFAULT_PIPELINE):
+    return PassManager(pipeline).run(module)
+
+
+def format_report(stats):
+    lines = []
+    for stat in stats:
+        delta = stat.after - stat.before
+        lines.append(f"  {stat.name:<9} {stat.before:>8} -> {stat.after:<8} ({delta:+d})")
+    if stats:
+        lines.append(f"  {'total':<9} {stats[0].before:>8} -> {stats[-1].after}")
+    return "\n".join(lines)
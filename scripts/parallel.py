@@ -0,0 +1,143 @@
+"""Semantic analysis and TAC generation of function bodies on a process pool.
+
+Once the signature pass has declared every function, a body only reads
+the global scope and the signatures, so bodies can be checked and lowered
+independently. analyze_and_generate() runs that pass in this process and
+hands the bodies to `jobs` worker processes, each with its own
+CompilationContext and so its own scope stack and counters. The results
+come back in source order and are merged here; diagnostics are replayed
+into the caller's collector, which applies max_errors.
+
+Temps and labels are numbered module-wide, so before dispatching we count
+the temps and labels each body will take (one temp per BinOp and Call, two
+labels per If and While, as TACGenerator allocates them) and start each
+worker's counters where a serial compile would be at that function. The
+module, the diagnostics and ctx's counters come out exactly as serially.
+
+Pickling slotted dataclasses costs more than checking and lowering them,
+so no AST node or tac.Instr crosses a pipe: workers get the whole AST once
+through the pool initializer (inherited for free where processes fork) and
+are sent function indices, and they return instructions as plain tuples.
+"""
+import gc
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import List, Tuple
+
+from scripts import tac
+from scripts.ast import BinOp, Call, If, While, walk
+from scripts.context import CompilationContext
+from scripts.diagnostics import Diagnostic
+from scripts.intermediate_code import TACGenerator
+from scripts.semantic_analyzer import SemanticAnalyzer, analyze_function
+from scripts.tac import Instr
+
+# Fewer functions than this per worker are not worth a process pool
+MIN_FUNCTIONS_PER_JOB = 8
+
+
+@dataclass(slots=True)
+class FunctionUnit:
+    params: List[str]
+    code: List[Tuple]     # (opcode, dest, src1, src2) per instruction
+    diagnostics: List[Diagnostic]
+    temp_count: int       # The worker's counters after this function
+    label_count: int
+    declared: int         # Symbols declared in the body
+    max_depth: int
+
+
+def worth_splitting(ast, jobs):
+    return bool(jobs) and jobs > 1 and len(ast.functions) >= 2 * MIN_FUNCTIONS_PER_JOB
+
+
+def analyze_and_generate(ast, ctx, jobs, externals=None):
+    """Check and lower `ast` across `jobs` processes; return the tac.Module.
+    `externals` is as for semantic_analyzer.analyze."""
+    ctx.log("Semantic analysis in progress...")
+    analyzer = SemanticAnalyzer(ctx)
+    if externals:
+        analyzer.declare_externals(externals)
+    analyzer.declare_functions(ast)
+    functions = ast.functions
+    tasks = []
+    temp_count, label_count = ctx.temp_count, ctx.label_count
+    for index, node in enumerate(functions):
+        tasks.append((index, temp_count, label_count))
+        temps, labels = _counter_use(node)
+        temp_count += temps
+        label_count += labels
+
+    options = {name: value for name, value in ctx.options.items() if name == 'max_errors'}
+    chunksize = max(1, len(functions) // (jobs * 4))
+    start_method = 'fork' if 'fork' in multiprocessing.get_all_start_methods() else None
+    with ProcessPoolExecutor(max_workers=jobs, mp_context=multiprocessing.get_context(start_method),
+                             initializer=_start_worker,
+                             initargs=(functions, analyzer.symtab, analyzer.function_signatures, options)) as pool:
+        units = list(pool.map(_lower_function, tasks, chunksize=chunksize))
+    if (units[-1].temp_count, units[-1].label_count) != (temp_count, label_count):
+        raise RuntimeError("TACGenerator allocated a different number of temps or labels than counted")
+
+    module = tac.Module()
+    had_error = analyzer.had_error
+    declared = analyzer.symtab.declared
+    max_depth = analyzer.symtab.max_depth
+    collecting = gc.isenabled()
+    gc.disable()   # Rebuilding every Instr would otherwise trigger collections
+    try:
+        for node, unit in zip(functions, units):
+            code = [Instr(*instr) for instr in unit.code]
+            module.functions.append(tac.Function(node.name, unit.params, code))
+            ctx.diagnostics.extend(unit.diagnostics)
+            had_error = had_error or bool(unit.diagnostics)
+            declared += unit.declared
+            max_depth = max(max_depth, unit.max_depth)
+    finally:
+        if collecting:
+            gc.enable()
+    ctx.temp_count, ctx.label_count = temp_count, label_count
+    if ctx.metrics is not None:
+        ctx.metrics.count('symbols_declared', declared)
+        ctx.metrics.count('max_scope_depth', max_depth)
+
+    if not had_error:
+        ctx.log("✅ Semantic analysis completed successfully.")
+    else:
+        ctx.log("❌ Semantic analysis completed with errors.")
+    return module
+
+
+def _counter_use(node):
+    """(temps, labels) TACGenerator allocates for function `node`."""
+    temps = labels = 0
+    for item in walk(node):
+        kind = item.__class__
+        if kind is BinOp or kind is Call:
+            temps += 1
+        elif kind is If or kind is While:
+            labels += 2
+    return temps, labels
+
+
+_shared = None   # Per worker process: (functions, global SymbolTable, signatures, options)
+
+
+def _start_worker(functions, symtab, signatures, options):
+    global _shared
+    _shared = (functions, symtab, signatures, options)
+
+
+def _lower_function(task):
+    index, temp_count, label_count = task
+    functions, symtab, signatures, options = _shared
+    node = functions[index]
+    ctx = CompilationContext(**options)
+    ctx.temp_count, ctx.label_count = temp_count, label_count
+    declared = symtab.declared
+    symtab.max_depth = 0
+    analyze_function(node, symtab, signatures, ctx)
+    function = TACGenerator(ctx).visit(node)
+    code = [(instr.opcode, instr.dest, instr.src1, instr.src2) for instr in function.code]
+    return FunctionUnit(function.params, code, ctx.diagnostics.items, ctx.temp_count, ctx.label_count,
+                        symtab.declared - declared, symtab.max_depth)
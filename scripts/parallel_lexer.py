@@ -0,0 +1,131 @@
+"""Lexing one large file on a process pool.
+
+The lexers carry no state across a newline: a `//` comment ends there and
+no token contains one. So a file cut just after newlines lexes to the same
+tokens piece by piece, once each piece's lines are counted on from the
+lines before it and its offsets from where it starts. Columns need no
+fixing, since every piece starts a line. Workers lex their piece of the
+file into a TokenStream; the parent stitches the streams together in order
+(TokenStream.extend) and replays their diagnostics, moved to their real
+lines, into its collector, which applies max_errors as a serial run would.
+
+split_points() chooses the cuts. With NumPy, one vectorised pass over the
+bytes finds every newline following a `}` that closes a top-level block,
+skipping braces inside `//` comments, and each cut is the such newline
+nearest an even share of the file, so pieces end where functions do. If
+none is close (one huge function, an unclosed `{`), or NumPy is not
+installed, the cut is the first newline after the even share; the tokens
+come out the same either way.
+"""
+import mmap
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from scripts import dfa_lexer, lexer
+from scripts.context import CompilationContext
+from scripts.token_stream import TokenStream
+
+try:
+    import numpy as np
+except ImportError:   # Optional: without it split_points() cuts at any newline
+    np = None
+
+# Smaller files are not worth a process pool
+MIN_BYTES_PER_JOB = 4 << 20
+# A function boundary may move a cut by up to this share of a piece
+SEARCH_WINDOW = 0.25
+
+_NEWLINE, _SLASH, _LBRACE, _RBRACE = b'\n/{}'
+
+
+def worth_splitting(size, jobs):
+    return bool(jobs) and jobs > 1 and size >= 2 * MIN_BYTES_PER_JOB
+
+
+def split_points(data, parts):
+    """Increasing offsets, each just after a newline, that cut `data` (a
+    bytes-like object) into at most `parts` pieces of about equal size."""
+    size = len(data)
+    if parts < 2 or not size:
+        return []
+    boundaries = _function_boundaries(data) if np is not None else None
+    window = int(size / parts * SEARCH_WINDOW)
+    cuts = []
+    for share in range(1, parts):
+        target = size * share // parts
+        cut = None
+        if boundaries is not None and len(boundaries):
+            index = int(np.searchsorted(boundaries, target))
+            near = [int(boundaries[i]) for i in (index - 1, index) if 0 <= i < len(boundaries)]
+            near = [point for point in near if abs(point - target) <= window]
+            if near:
+                cut = min(near, key=lambda point: abs(point - target))
+        if cut is None:
+            newline = data.find(b'\n', target)
+            cut = newline + 1 if newline >= 0 else size
+        if (not cuts or cut > cuts[-1]) and cut < size:
+            cuts.append(cut)
+    return cuts
+
+
+def _function_boundaries(data):
+    """Sorted offsets just after each newline that follows a top-level `}`."""
+    codes = np.frombuffer(data, dtype=np.uint8)
+    newlines = np.flatnonzero(codes == _NEWLINE)
+    braces = np.flatnonzero((codes == _LBRACE) | (codes == _RBRACE))
+    slashes = np.flatnonzero(codes[:-1] == _SLASH)
+    comments = slashes[codes[slashes + 1] == _SLASH]
+    if len(comments):
+        # A brace is commented out if its line has a `//` before it
+        comment_lines, first = np.unique(np.searchsorted(newlines, comments), return_index=True)
+        comment_start = np.full(len(newlines) + 1, len(codes), dtype=np.int64)
+        comment_start[comment_lines] = comments[first]
+        braces = braces[braces < comment_start[np.searchsorted(newlines, braces)]]
+    closing = codes[braces] == _RBRACE
+    depth = np.cumsum(np.where(closing, -1, 1))
+    depth -= np.minimum.accumulate(np.minimum(depth, 0))   # A stray `}` is skipped, as the parser does
+    ends = braces[closing & (depth == 0)]
+    after = np.searchsorted(newlines, ends)
+    return np.unique(newlines[after[after < len(newlines)]] + 1)
+
+
+def tokenize_file(path, ctx, jobs):
+    """The TokenStream of `path` lexed on `jobs` processes, with ctx's lexer
+    option; the same stream and diagnostics as TokenStream.from_tokens over
+    the serial lexer's tokenize_file."""
+    with open(path, 'rb') as file:
+        size = os.fstat(file.fileno()).st_size
+        if not size:
+            return TokenStream.from_tokens(())
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            cuts = split_points(data, jobs)
+    bounds = list(zip([0] + cuts, cuts + [size]))
+    options = {name: value for name, value in ctx.options.items() if name in ('lexer', 'max_errors')}
+    tasks = [(str(path), start, end, options) for start, end in bounds]
+    start_method = 'fork' if 'fork' in multiprocessing.get_all_start_methods() else None
+    with ProcessPoolExecutor(max_workers=jobs, mp_context=multiprocessing.get_context(start_method)) as pool:
+        parts = list(pool.map(_lex_part, tasks))
+
+    tokens = TokenStream()
+    lines = 0
+    for (start, _), (stream, diagnostics, dropped, newlines) in zip(bounds, parts):
+        tokens.extend(stream, start, lines)
+        ctx.diagnostics.extend(diagnostic.moved(lines) for diagnostic in diagnostics)
+        ctx.diagnostics.dropped += dropped
+        lines += newlines
+    tokens.close()
+    return tokens
+
+
+def _lex_part(task):
+    path, start, end, options = task
+    with open(path, 'rb') as file:
+        file.seek(start)
+        data = file.read(end - start)
+    ctx = CompilationContext(**options)
+    if options.get('lexer') == 'dfa':
+        stream = TokenStream.from_tokens(dfa_lexer.tokenize_bytes(data, ctx))
+    else:
+        stream = TokenStream.from_tokens(lexer.tokenize_buffer(data, ctx=ctx))
+    return stream, ctx.diagnostics.items, ctx.diagnostics.dropped, data.count(b'\n')
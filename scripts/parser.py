@@ -1,208 +1,304 @@
-from scripts.ast import *
-from scripts.lexer import tokenize
-
-class Parser:
-    def __init__(self, tokens):
-        self.tokens = tokens
-        self.position = 0
-        self.errors = []
-
-    def current(self):
-        if self.position < len(self.tokens):
-            return self.tokens[self.position]
-        return ('EOF', '')
-
-    def advance(self):
-        if self.position < len(self.tokens):
-            self.position += 1
-
-    def match(self, expected_type):
-        tok_type, value = self.current()
-        if tok_type == expected_type:
-            self.advance()
-            return value
-        else:
-            self.errors.append(f"❌ Syntax Error: Expected {expected_type} but got {tok_type} ('{value}')")
-            return None
-
-    def parse(self):
-        functions = []
-        while self.current()[0] != 'EOF':
-            try:
-                func = self.parse_function()
-                if func:
-                    functions.append(func)
-            except Exception as e:
-                self.errors.append(f"❌ Parse Error: {str(e)}")
-                self.synchronize()
-        return Program(functions=functions)
-
-    def synchronize(self):
-        sync_tokens = {'INT', 'FLOAT', 'BOOL', 'ID', 'RETURN', 'IF', 'WHILE', 'RBRACE', 'SEMI'}
-        while self.current()[0] not in sync_tokens and self.current()[0] != 'EOF':
-            self.advance()
-
-    def parse_function(self):
-        tok_type, _ = self.current()
-        if tok_type not in ['INT', 'FLOAT', 'BOOL']:
-            raise SyntaxError(f"Expected return type (INT/FLOAT/BOOL), got {tok_type}")
-        self.match(tok_type)
-        return_type = tok_type.lower()
-
-        name = self.match('ID') or "unnamed_func"
-        self.match('LPAREN')
-        params = self.parse_params()
-        self.match('RPAREN')
-        self.match('LBRACE')
-        body = []
-        while self.current()[0] != 'RBRACE' and self.current()[0] != 'EOF':
-            try:
-                stmt = self.parse_statement()
-                if stmt:
-                    body.append(stmt)
-            except Exception as e:
-                self.errors.append(f"❌ Statement Error: {str(e)}")
-                self.synchronize()
-        self.match('RBRACE')
-        return Function(return_type, name, params, body)
-
-    def parse_params(self):
-        params = []
-        if self.current()[0] == 'RPAREN':
-            return params
-        while True:
-            tok_type, _ = self.current()
-            if tok_type not in ['INT', 'FLOAT', 'BOOL']:
-                break
-            self.match(tok_type)
-            param_type = tok_type.lower()
-            param_name = self.match('ID') or "param"
-            params.append(Param(param_type, param_name))
-            if self.current()[0] != 'COMMA':
-                break
-            self.match('COMMA')
-        return params
-
-    def parse_statement(self):
-        tok_type, _ = self.current()
-        if tok_type in ['INT', 'FLOAT', 'BOOL']:
-            return self.parse_var_decl()
-        elif tok_type == 'RETURN':
-            return self.parse_return()
-        elif tok_type == 'IF':
-            return self.parse_if_statement()
-        elif tok_type == 'WHILE':
-            return self.parse_while_statement()
-        else:
-            return self.parse_expression_stmt()
-
-    def parse_var_decl(self):
-        tok_type, _ = self.current()
-        self.match(tok_type)
-        var_type = tok_type.lower()
-        name = self.match('ID') or "var"
-        self.match('OP')
-        expr = self.parse_expression()
-        self.match('SEMI')
-        return Statement(f"declare {var_type} {name}", expression=expr)
-
-    def parse_return(self):
-        self.match('RETURN')
-        expr = self.parse_expression()
-        self.match('SEMI')
-        return Statement("return x", expression=expr)
-
-    def parse_expression_stmt(self):
-        left = self.match('ID') or "unknown"
-        self.match('OP')
-        expr = self.parse_expression()
-        self.match('SEMI')
-        return Statement(f"expr {left} =", expression=expr)
-
-    def parse_if_statement(self):
-        self.match('IF')
-        self.match('LPAREN')
-        condition = self.parse_expression()
-        self.match('RPAREN')
-        self.match('LBRACE')
-        true_branch = []
-        while self.current()[0] != 'RBRACE' and self.current()[0] != 'EOF':
-            true_branch.append(self.parse_statement())
-        self.match('RBRACE')
-
-        false_branch = None
-        if self.current()[0] == 'ELSE':
-            self.match('ELSE')
-            self.match('LBRACE')
-            false_branch = []
-            while self.current()[0] != 'RBRACE' and self.current()[0] != 'EOF':
-                false_branch.append(self.parse_statement())
-            self.match('RBRACE')
-        return Statement("if", if_stmt=IfStatement(condition, true_branch, false_branch))
-
-    def parse_while_statement(self):
-        self.match('WHILE')
-        self.match('LPAREN')
-        condition = self.parse_expression()
-        self.match('RPAREN')
-        self.match('LBRACE')
-        body = []
-        while self.current()[0] != 'RBRACE' and self.current()[0] != 'EOF':
-            body.append(self.parse_statement())
-        self.match('RBRACE')
-        return Statement("while", while_stmt=WhileStatement(condition, body))
-
-    def parse_args(self):
-        args = []
-        if self.current()[0] == 'RPAREN':
-            return args
-        args.append(self.match('ID'))
-        while self.current()[0] == 'COMMA':
-            self.match('COMMA')
-            args.append(self.match('ID'))
-        return args
-
-    def parse_expression(self):
-        return self.parse_term()
-
-    def parse_term(self):
-        expr = self.parse_factor()
-        while self.current()[0] == 'OP' and self.current()[1] in ['+', '-']:
-            op = self.match('OP')
-            right = self.parse_factor()
-            expr = Expression(expr, op, right)
-        return expr
-
-    def parse_factor(self):
-        expr = self.parse_primary()
-        while self.current()[0] == 'OP' and self.current()[1] in ['*', '/']:
-            op = self.match('OP')
-            right = self.parse_primary()
-            expr = Expression(expr, op, right)
-        return expr
-
-    def parse_primary(self):
-        tok_type, value = self.current()
-        if tok_type == 'ID':
-            return self.match('ID')
-        elif tok_type == 'NUMBER':
-            return self.match('NUMBER')
-        elif tok_type == 'LPAREN':
-            self.match('LPAREN')
-            expr = self.parse_expression()
-            self.match('RPAREN')
-            return expr
-        else:
-            self.errors.append(f"❌ Unexpected token: {tok_type} ('{value}')")
-            self.advance()
-            return "0"  # Fallback for parsing to continue
-
-# External use
-def parse(tokens):
-    parser = Parser(tokens)
-    ast = parser.parse()
-    if parser.errors:
-        print("\n🛑 Parser Errors:")
-        for err in parser.errors:
-            print(err)
-    return ast
+from scripts.ast import *
+from scripts.lexer import tokenize
+from scripts.diagnostics import SYNTAX_ERROR, UNEXPECTED_TOKEN, located
+from scripts.token_stream import (
+    TOKEN_KINDS, TokenStream, EOF, NUMBER, ID, OP, LPAREN, RPAREN, LBRACE, RBRACE, SEMI, COMMA,
+    INT, FLOAT, BOOL, IF, ELSE, WHILE, RETURN,
+)
+
+TYPE_KINDS = (INT, FLOAT, BOOL)
+
+# Binary operator precedence, higher binds tighter
+BINARY_PRECEDENCE = {
+    '<': 1, '>': 1, '=': 1,
+    '+': 2, '-': 2,
+    '*': 3, '/': 3,
+}
+
+class Parser:
+    def __init__(self, tokens, ctx=None):
+        if not isinstance(tokens, TokenStream):
+            tokens = TokenStream.from_tokens(tokens)
+        self.tokens = tokens
+        self.kinds = tokens.kinds
+        self.position = 0
+        self.errors = []
+        self.ctx = ctx
+
+    def error(self, message, code=SYNTAX_ERROR):
+        line, column = self.pos()
+        message = located(message, line, column)
+        self.errors.append(message)
+        if self.ctx is not None:
+            self.ctx.error(code, message, line, column)
+
+    def peek(self):
+        return self.kinds[self.position]
+
+    def value(self):
+        return self.tokens.value(self.position)
+
+    def pos(self):
+        return self.tokens.position(self.position)
+
+    def current(self):
+        return self.tokens[self.position]
+
+    def advance(self):
+        if self.kinds[self.position] != EOF:
+            self.position += 1
+
+    def match(self, expected_type):
+        tok_type = self.kinds[self.position]
+        if tok_type == expected_type:
+            value = self.tokens.value(self.position)
+            self.advance()
+            return value
+        else:
+            self.error(f"❌ Syntax Error: Expected {TOKEN_KINDS[expected_type]} but got {TOKEN_KINDS[tok_type]} ('{self.value()}')")
+            return None
+
+    def parse(self):
+        return Program(functions=[func for _, func in self.parse_items() if func])
+
+    def parse_items(self):
+        """Yield (start position, Function or None) for each top-level item.
+        The parser carries no state from one item to the next except its
+        position, so parsing can stop between items and resume there."""
+        while self.peek() != EOF:
+            start = self.position
+            func = None
+            try:
+                func = self.parse_function()
+            except Exception as e:
+                self.error(f"❌ Parse Error: {str(e)}")
+                self.synchronize_function()
+            yield start, func
+
+    def synchronize_function(self):
+        # Statement sync tokens such as `}` or `;` cannot start a function,
+        # so stopping on one here would fail on the same token forever
+        self.advance()
+        while self.peek() not in TYPE_KINDS and self.peek() != EOF:
+            self.advance()
+
+    def synchronize(self):
+        sync_tokens = {INT, FLOAT, BOOL, ID, RETURN, IF, WHILE, RBRACE, SEMI, EOF}
+        while self.peek() not in sync_tokens:
+            self.advance()
+
+    def parse_function(self):
+        tok_type = self.peek()
+        if tok_type not in TYPE_KINDS:
+            raise SyntaxError(f"Expected return type (INT/FLOAT/BOOL), got {TOKEN_KINDS[tok_type]}")
+        line, column = self.pos()
+        return_type = self.match(tok_type)
+
+        name = self.match(ID) or "unnamed_func"
+        self.match(LPAREN)
+        params = self.parse_params()
+        self.match(RPAREN)
+        self.match(LBRACE)
+        body = []
+        while self.peek() != RBRACE and self.peek() != EOF:
+            try:
+                stmt = self.parse_statement()
+                if stmt:
+                    body.append(stmt)
+            except Exception as e:
+                self.error(f"❌ Statement Error: {str(e)}")
+                self.synchronize()
+        self.match(RBRACE)
+        return Function(return_type, name, params, body, line, column)
+
+    def parse_params(self):
+        params = []
+        if self.peek() == RPAREN:
+            return params
+        while True:
+            tok_type = self.peek()
+            if tok_type not in TYPE_KINDS:
+                break
+            line, column = self.pos()
+            param_type = self.match(tok_type)
+            param_name = self.match(ID) or "param"
+            params.append(Param(param_type, param_name, line, column))
+            if self.peek() != COMMA:
+                break
+            self.match(COMMA)
+        return params
+
+    def parse_statement(self):
+        tok_type = self.peek()
+        if tok_type in TYPE_KINDS:
+            return self.parse_var_decl()
+        elif tok_type == RETURN:
+            return self.parse_return()
+        elif tok_type == IF:
+            return self.parse_if_statement()
+        elif tok_type == WHILE:
+            return self.parse_while_statement()
+        else:
+            return self.parse_expression_stmt()
+
+    def parse_var_decl(self):
+        line, column = self.pos()
+        var_type = self.match(self.peek())
+        name = self.match(ID) or "var"
+        self.match(OP)
+        expr = self.parse_expression()
+        self.match(SEMI)
+        return VarDecl(var_type, name, expr, line, column)
+
+    def parse_return(self):
+        line, column = self.pos()
+        self.match(RETURN)
+        expr = self.parse_expression()
+        self.match(SEMI)
+        return Return(expr, line, column)
+
+    def parse_expression_stmt(self):
+        line, column = self.pos()
+        left = self.match(ID) or "unknown"
+        if self.peek() == LPAREN:
+            call = self.parse_call(left, line, column)
+            self.match(SEMI)
+            return call
+        self.match(OP)
+        expr = self.parse_expression()
+        self.match(SEMI)
+        return Assign(left, expr, line, column)
+
+    def parse_if_statement(self):
+        line, column = self.pos()
+        self.match(IF)
+        self.match(LPAREN)
+        condition = self.parse_expression()
+        self.match(RPAREN)
+        self.match(LBRACE)
+        true_branch = []
+        while self.peek() != RBRACE and self.peek() != EOF:
+            true_branch.append(self.parse_statement())
+        self.match(RBRACE)
+
+        false_branch = None
+        if self.peek() == ELSE:
+            self.match(ELSE)
+            self.match(LBRACE)
+            false_branch = []
+            while self.peek() != RBRACE and self.peek() != EOF:
+                false_branch.append(self.parse_statement())
+            self.match(RBRACE)
+        return If(condition, true_branch, false_branch, line, column)
+
+    def parse_while_statement(self):
+        line, column = self.pos()
+        self.match(WHILE)
+        self.match(LPAREN)
+        condition = self.parse_expression()
+        self.match(RPAREN)
+        self.match(LBRACE)
+        body = []
+        while self.peek() != RBRACE and self.peek() != EOF:
+            body.append(self.parse_statement())
+        self.match(RBRACE)
+        return While(condition, body, line, column)
+
+    def parse_call(self, name, line, column):
+        self.match(LPAREN)
+        args = self.parse_args()
+        self.match(RPAREN)
+        return Call(name, args, line, column)
+
+    def parse_args(self):
+        args = []
+        if self.peek() == RPAREN:
+            return args
+        args.append(self.parse_expression())
+        while self.peek() == COMMA:
+            self.match(COMMA)
+            args.append(self.parse_expression())
+        return args
+
+    def parse_expression(self):
+        """Operator-precedence (shunting-yard) parse over explicit stacks.
+
+        Parentheses push a None marker onto the operator stack instead of
+        recursing, so nesting depth is bounded only by memory. All binary
+        operators are left-associative. Only call arguments recurse.
+        """
+        kinds = self.kinds
+        tokens = self.tokens
+        operands = []
+        operators = []
+        open_parens = 0
+
+        while True:
+            # Operand position: any number of '(' then a primary
+            tok_type = kinds[self.position]
+            if tok_type == LPAREN:
+                self.position += 1
+                operators.append(None)
+                open_parens += 1
+                continue
+            line, column = tokens.position(self.position)
+            if tok_type == ID:
+                name = tokens.value(self.position)
+                self.position += 1
+                if kinds[self.position] == LPAREN:
+                    operands.append(self.parse_call(name, line, column))
+                else:
+                    operands.append(Name(name, line, column))
+            elif tok_type == NUMBER:
+                value = tokens.value(self.position)
+                self.position += 1
+                operands.append(Literal(value, 'float' if '.' in value else 'int', line, column))
+            else:
+                self.error(f"❌ Unexpected token: {TOKEN_KINDS[tok_type]} ('{self.value()}')", UNEXPECTED_TOKEN)
+                self.advance()
+                operands.append(Literal("0", 'int', line, column))  # Fallback for parsing to continue
+
+            # Operator position: close any groups, then continue on a binary operator
+            tok_type = kinds[self.position]
+            while tok_type == RPAREN and open_parens:
+                self.position += 1
+                while operators[-1] is not None:
+                    self._reduce(operands, operators)
+                operators.pop()
+                open_parens -= 1
+                tok_type = kinds[self.position]
+
+            if tok_type != OP:
+                break
+            op = tokens.value(self.position)
+            prec = BINARY_PRECEDENCE.get(op)
+            if prec is None:
+                break
+            while operators and operators[-1] is not None and BINARY_PRECEDENCE[operators[-1][0]] >= prec:
+                self._reduce(operands, operators)
+            operators.append((op, self.position))
+            self.position += 1
+
+        while operators:
+            if operators[-1] is None:
+                operators.pop()
+                self.match(RPAREN)
+            else:
+                self._reduce(operands, operators)
+        return operands[0]
+
+    def _reduce(self, operands, operators):
+        op, index = operators.pop()
+        line, column = self.tokens.position(index)
+        right = operands.pop()
+        operands[-1] = BinOp(op, operands[-1], right, line, column)
+
+# External use
+def parse(tokens, ctx=None):
+    parser = Parser(tokens, ctx)
+    ast = parser.parse()
+    if parser.errors and ctx is None:
+        print("\n🛑 Parser Errors:")
+        for err in parser.errors:
+            print(err)
+    return ast
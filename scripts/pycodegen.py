@@ -0,0 +1,326 @@
+"""Translate a program's TAC into Python source and run it natively.
+
+Each function's control-flow graph is rebuilt as Python `while`, `if` and
+`else` statements, with a comparison that only feeds a branch folded into
+the branch itself. A function that does not fit that shape (for example a
+loop with two exits, or loops nested deeper than Python's limit of 20)
+falls back to a loop that dispatches on the current basic block. The
+source is compiled once per distinct program and reused. MiniLang++ calls
+are Python calls, so very deep recursion hits Python's recursion limit
+sooner than it would in scripts.vm.
+"""
+import functools
+import time
+from collections import Counter
+
+from scripts import tac
+from scripts.cfg import build_cfg, dominators, dominates, post_dominators
+from scripts.tac import is_constant, uses
+from scripts.runtime import VMError, RunResult
+
+PYTHON_OPS = {'+': '+', '-': '-', '*': '*', '<': '<', '>': '>', '=': '=='}
+COMPARISONS = {'<', '>', '='}
+MAX_NESTING = 80     # Python rejects source nested much deeper than ~100 levels
+MAX_LOOPS = 20       # ... and more than 20 statically nested loops
+
+
+class _Unstructured(Exception):
+    pass
+
+
+def _name(operand):
+    if is_constant(operand):
+        return operand
+    if '.' in operand:
+        return 's_' + operand.replace('.', '_')   # SSA version
+    return 'v_' + operand
+
+
+def _function_name(name):
+    return 'f_' + name
+
+
+def _statement(instr):
+    op = instr.opcode
+    if op in tac.BINARY_OPS:
+        dest, left, right = _name(instr.dest), _name(instr.src1), _name(instr.src2)
+        if op == '/':
+            return f"{dest} = _div({left}, {right})"
+        if op in COMPARISONS:
+            return f"{dest} = 1 if {left} {PYTHON_OPS[op]} {right} else 0"
+        return f"{dest} = {left} {PYTHON_OPS[op]} {right}"
+    if op == tac.COPY:
+        return f"{_name(instr.dest)} = {_name(instr.src1)}"
+    if op == tac.CALL:
+        args = ', '.join(map(_name, instr.src2))
+        return f"{_name(instr.dest)} = {_function_name(instr.src1)}({args})"
+    if op == tac.RETURN:
+        return f"return {_name(instr.src1)}"
+    raise _Unstructured(op)
+
+
+class _Loop:
+    __slots__ = ('header', 'body', 'exit')
+
+    def __init__(self, header, body, exit_):
+        self.header = header
+        self.body = body      # Block indices, header included
+        self.exit = exit_     # The one block control leaves to, or None
+
+
+class _Structurer:
+    """Emit a function's CFG as nested Python statements, or raise
+    _Unstructured. Natural loops become `while` statements whose back edges
+    are `continue` and whose single exit is `break`. Each branch becomes an
+    `if`/`else` that rejoins at the branch's immediate post-dominator, so
+    jumps the optimizer threaded straight to an outer join point still
+    structure. Every block must be emitted exactly once."""
+
+    def __init__(self, cfg):
+        self.blocks = cfg.blocks
+        self.ipdom = post_dominators(cfg)
+        self.exit = len(cfg.blocks)
+        self.emitted = set()
+        self.loop_depth = 0
+        self.use_count = Counter(operand for block in cfg.blocks for instr in block.code
+                                 for operand in uses(instr))
+        self.use_count.update(block.cond for block in cfg.blocks if block.cond is not None)
+
+        idom = dominators(cfg)
+        bodies = {}
+        for block in cfg.blocks:
+            for header in block.succs:
+                if dominates(idom, header, block.index):
+                    body = bodies.setdefault(header, {header})
+                    work = [block.index]
+                    while work:
+                        index = work.pop()
+                        if index not in body:
+                            body.add(index)
+                            work.extend(self.blocks[index].preds)
+        self.loops = {}
+        for header, body in bodies.items():
+            exits = {succ for index in body for succ in self.blocks[index].succs} - body
+            if len(exits) > 1:
+                # Paths that leave the loop only to return (a `return` in
+                # the loop body) are emitted inside the loop
+                main_exit = self.blocks[header].jump
+                for succ in sorted(exits):
+                    if succ != main_exit and len(exits) > 1:
+                        reached = self.reachable(succ)
+                        if not reached & (body | exits - {succ}):
+                            body |= reached
+                            exits.discard(succ)
+            if len(exits) > 1:
+                raise _Unstructured("loop exits")
+            self.loops[header] = _Loop(header, body, exits.pop() if exits else None)
+
+    def reachable(self, index):
+        seen = {index}
+        work = [index]
+        while work:
+            for succ in self.blocks[work.pop()].succs:
+                if succ not in seen:
+                    seen.add(succ)
+                    work.append(succ)
+        return seen
+
+    def function(self, indent, lines):
+        self.region(0, None, None, False, indent, lines)
+        if len(self.emitted) != len(self.blocks):
+            raise _Unstructured("unreached blocks")
+
+    def region(self, index, stop, loop, tail, indent, lines, entering=False):
+        """Emit blocks from `index` until control reaches `stop` or leaves
+        the region. `tail` is true when nothing follows the region in the
+        enclosing loop body, so a back edge needs no `continue`."""
+        if len(indent) > MAX_NESTING * 4:
+            raise _Unstructured("nesting")
+        first = len(lines)
+        while index is not None and index != stop:
+            if loop is not None and not entering:
+                if index == loop.header:
+                    if not (tail and stop is None):
+                        lines.append(indent + "continue")
+                    break
+                if index == loop.exit:
+                    lines.append(indent + "break")
+                    break
+                if index not in loop.body:
+                    raise _Unstructured("jump out of loop")
+            if index in self.loops and not entering:
+                index = self.loop(self.loops[index], indent, lines)
+            else:
+                index = self.block(index, stop, loop, tail, indent, lines)
+            entering = False
+        if len(lines) == first:
+            lines.append(indent + "pass")
+
+    def loop(self, loop, indent, lines):
+        self.loop_depth += 1
+        if self.loop_depth > MAX_LOOPS:
+            raise _Unstructured("loop nesting")
+        header = self.blocks[loop.header]
+        if (header.cond is not None and len(header.code) == self.test(header)[1]
+                and header.jump == loop.exit
+                and header.fallthrough in loop.body and header.fallthrough != loop.header):
+            # while <test>: <body>
+            self.claim(loop.header)
+            lines.append(f"{indent}while {self.test(header)[0]}:")
+            self.region(header.fallthrough, None, loop, True, indent + "    ", lines)
+        else:
+            lines.append(f"{indent}while True:")
+            self.region(loop.header, None, loop, True, indent + "    ", lines, entering=True)
+        self.loop_depth -= 1
+        return loop.exit
+
+    def claim(self, index):
+        if index in self.emitted:
+            raise _Unstructured("block reached twice")
+        self.emitted.add(index)
+
+    def test(self, block):
+        """The Python test for block.cond, and whether it folds in the
+        comparison ending the block (when nothing else reads its result)."""
+        code = block.code
+        if (code and code[-1].opcode in COMPARISONS and code[-1].dest == block.cond
+                and self.use_count[block.cond] == 1):
+            compare = code[-1]
+            return f"{_name(compare.src1)} {PYTHON_OPS[compare.opcode]} {_name(compare.src2)}", True
+        return _name(block.cond), False
+
+    def block(self, index, stop, loop, tail, indent, lines):
+        """Emit one block; return the block control continues with."""
+        self.claim(index)
+        block = self.blocks[index]
+        code = block.code
+        test = None
+        if block.cond is not None:
+            test, folded = self.test(block)
+            if folded:
+                code = code[:-1]
+        for instr in code:
+            lines.append(indent + _statement(instr))
+        if code and code[-1].opcode == tac.RETURN:
+            return None
+        if block.cond is None:
+            if not block.succs:
+                lines.append(indent + "return None")
+                return None
+            return block.succs[0]
+
+        true, false = block.fallthrough, block.jump
+        if loop is not None and true != false:
+            # A test that only leaves the loop body needs no else
+            for leave, stay, negate in ((false, true, True), (true, false, False)):
+                if leave == loop.exit or leave == loop.header:
+                    jump = "break" if leave == loop.exit else "continue"
+                    lines.append(f"{indent}if {'not (' + test + ')' if negate else test}:")
+                    lines.append(f"{indent}    {jump}")
+                    return stay
+
+        join = self.ipdom[index]
+        if join == self.exit or join == -1:
+            join = None
+        elif loop is not None and (join == loop.header or join not in loop.body):
+            join = None
+        inner_stop = stop if join is None else join
+        inner_tail = tail and join is None
+        inner = indent + "    "
+        if false == join:
+            lines.append(f"{indent}if {test}:")
+            self.region(true, inner_stop, loop, inner_tail, inner, lines)
+        elif true == join:
+            lines.append(f"{indent}if not ({test}):")
+            self.region(false, inner_stop, loop, inner_tail, inner, lines)
+        else:
+            lines.append(f"{indent}if {test}:")
+            self.region(true, inner_stop, loop, inner_tail, inner, lines)
+            lines.append(f"{indent}else:")
+            self.region(false, inner_stop, loop, inner_tail, inner, lines)
+        return join
+
+
+def _dispatch_loop(func, indent, lines):
+    """Fallback for any control flow: one `if` arm per basic block."""
+    cfg = build_cfg(func)
+    lines.append(f"{indent}pc = 0")
+    lines.append(f"{indent}while True:")
+    for block in cfg.blocks:
+        keyword = "if" if block.index == 0 else "elif"
+        lines.append(f"{indent}    {keyword} pc == {block.index}:")
+        arm = indent + "        "
+        for instr in block.code:
+            lines.append(arm + _statement(instr))
+        if block.code and block.code[-1].opcode == tac.RETURN:
+            continue
+        if block.cond is not None:
+            lines.append(f"{arm}pc = {block.fallthrough} if {_name(block.cond)} else {block.jump}")
+        elif block.succs:
+            lines.append(f"{arm}pc = {block.succs[0]}")
+        else:
+            lines.append(f"{arm}return None")
+
+
+def function_source(func: tac.Function):
+    params = ', '.join(map(_name, func.params))
+    lines = [f"def {_function_name(func.name)}({params}):"]
+    body = []
+    try:
+        _Structurer(build_cfg(func)).function("    ", body)
+    except _Unstructured:
+        body = []
+        _dispatch_loop(func, "    ", body)
+    lines.extend(body)
+    return "\n".join(lines) + "\n"
+
+
+def generate_python(module: tac.Module):
+    return "\n\n".join(function_source(func) for func in module.functions)
+
+
+@functools.lru_cache(maxsize=64)
+def _compile(source):
+    return compile(source, "<minilang>", "exec")
+
+
+def _divide(left, right):
+    # tac.evaluate('/') without the opcode dispatch
+    if left.__class__ is int and right.__class__ is int:
+        quotient = abs(left) // abs(right)
+        return quotient if (left < 0) == (right < 0) else -quotient
+    return left / right
+
+
+class PythonProgram:
+    """A module's TAC compiled to Python functions; run() mirrors VM.run."""
+
+    def __init__(self, module: tac.Module):
+        self.source = generate_python(module)
+        namespace = {'_div': _divide}
+        try:
+            exec(_compile(self.source), namespace)
+        except (SyntaxError, RecursionError, MemoryError) as e:
+            raise VMError(f"Cannot compile to Python: {e}") from None
+        self.functions = {func.name: namespace[_function_name(func.name)] for func in module.functions}
+
+    def run(self, entry='main', args=()):
+        function = self.functions.get(entry)
+        if function is None:
+            raise VMError(f"No function named '{entry}'")
+        started = time.perf_counter()
+        try:
+            value = function(*args)
+        except ZeroDivisionError:
+            raise VMError("Division by zero") from None
+        except (NameError, TypeError):
+            raise VMError("Use of an undefined value") from None
+        except RecursionError:
+            raise VMError("Call depth exceeded") from None
+        except OverflowError:
+            raise VMError("Numeric overflow") from None
+        return RunResult(value, None, time.perf_counter() - started)
+
+
+def compile_module(module):
+    return PythonProgram(module)
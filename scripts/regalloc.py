@@ -0,0 +1,139 @@
+import heapq
+import re
+from dataclasses import dataclass
+
+from scripts import tac
+from scripts.cfg import build_cfg, flatten, liveness
+from scripts.ssa import rename_uses
+from scripts.tac import is_constant, uses, defines
+
+# Temps ("t<N>", or "t<N>.<V>" after the SSA passes) hold one expression
+# value each, so their live ranges are short. The allocator maps them onto
+# as few reusable registers as possible; registers are named like temps
+# ("t0", "t1", ...) so the rewritten TAC stays in the same namespace.
+# Variables and parameters are left alone.
+
+TEMP_NAME = re.compile(r't\d+(\.\d+)?')
+
+
+def is_temp(name):
+    return TEMP_NAME.fullmatch(name) is not None
+
+
+@dataclass
+class FrameSummary:
+    function: str
+    variables: int      # Parameters and named locals, one slot each
+    temps: int          # Distinct temps before allocation
+    registers: int      # Registers the temps were packed into
+
+    @property
+    def slots(self):
+        return self.variables + self.registers
+
+
+def live_intervals(cfg):
+    """[first, last] position of every temp in layout order. Each
+    instruction takes two positions, reads at the even one and writes at
+    the odd one, so a temp that dies in an instruction can hand its
+    register to the temp the same instruction defines. Ranges cover every
+    block the temp is live through, including loop back edges."""
+    live_in, live_out = liveness(cfg)
+    intervals = {}
+
+    def touch(name, position):
+        if is_constant(name) or not is_temp(name):
+            return
+        interval = intervals.get(name)
+        if interval is None:
+            intervals[name] = [position, position]
+        elif position < interval[0]:
+            interval[0] = position
+        elif position > interval[1]:
+            interval[1] = position
+
+    position = 0
+    for index in cfg.layout:
+        block = cfg.blocks[index]
+        for name in live_in[index]:
+            touch(name, position)
+        for instr in block.code:
+            for operand in uses(instr):
+                touch(operand, position)
+            dest = defines(instr)
+            if dest is not None:
+                touch(dest, position + 1)
+            position += 2
+        if block.cond is not None:
+            touch(block.cond, position)
+            position += 2
+        for name in live_out[index]:
+            touch(name, position)
+    return intervals
+
+
+def linear_scan(intervals):
+    """Assign registers to intervals in order of their start, reusing the
+    lowest-numbered register whose interval has ended. Without spilling
+    this uses exactly as many registers as the most temps live at once."""
+    assignment = {}
+    active = []      # (end, register)
+    free = []        # Heap of released register numbers
+    count = 0
+    for name, (start, end) in sorted(intervals.items(), key=lambda item: (item[1][0], item[0])):
+        while active and active[0][0] < start:
+            heapq.heappush(free, heapq.heappop(active)[1])
+        if free:
+            register = heapq.heappop(free)
+        else:
+            register = count
+            count += 1
+        assignment[name] = register
+        heapq.heappush(active, (end, register))
+    return assignment, count
+
+
+def allocate_registers(func: tac.Function):
+    """Rewrite `func` so its temps use the registers linear_scan picked and
+    return the function's FrameSummary."""
+    cfg = build_cfg(func)
+    intervals = live_intervals(cfg)
+    assignment, count = linear_scan(intervals)
+    registers = {name: f"t{register}" for name, register in assignment.items()}
+
+    def rename(operand):
+        return registers.get(operand, operand)
+
+    variables = set(func.params)
+    for block in cfg.blocks:
+        code = []
+        for instr in block.code:
+            rename_uses(instr, rename)
+            dest = defines(instr)
+            if dest is not None:
+                if dest not in registers:
+                    variables.add(dest)
+                instr.dest = rename(dest)
+                if instr.opcode == tac.COPY and instr.src1 == instr.dest:
+                    continue
+            code.append(instr)
+        block.code = code
+        if block.cond is not None:
+            block.cond = rename(block.cond)
+    func.code = flatten(cfg)
+    return FrameSummary(func.name, len(variables), len(intervals), count)
+
+
+def allocate_module(module: tac.Module):
+    return [allocate_registers(func) for func in module.functions]
+
+
+def format_frames(frames):
+    lines = [f"  {'function':<16} {'vars':>6} {'temps':>7} {'regs':>6} {'slots':>7}"]
+    for frame in frames:
+        lines.append(f"  {frame.function:<16} {frame.variables:>6} {frame.temps:>7} "
+                     f"{frame.registers:>6} {frame.slots:>7}")
+    if frames:
+        heaviest = max(frames, key=lambda frame: frame.registers)
+        lines.append(f"  max register pressure: {heaviest.registers} in {heaviest.function}")
+    return "\n".join(lines)
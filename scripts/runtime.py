@@ -0,0 +1,20 @@
+"""Result and error types shared by the execution backends (scripts.vm and
+scripts.pycodegen). They live apart from both so `python -m scripts.vm`,
+which runs vm.py as __main__, still raises and catches the same classes."""
+from dataclasses import dataclass
+from typing import Optional
+
+
+class VMError(RuntimeError):
+    pass
+
+
+@dataclass
+class RunResult:
+    value: object
+    instructions: Optional[int]     # Not counted by the Python backend
+    seconds: float
+
+    @property
+    def rate(self):
+        return self.instructions / self.seconds if self.instructions and self.seconds else 0.0
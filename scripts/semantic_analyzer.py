@@ -1,162 +1,196 @@
-from scripts.symbol_table import SymbolTable
-from scripts.ast import *
-
-def analyze(ast: Program):
-    print("Semantic analysis in progress...")
-    symtab = SymbolTable()
-    function_signatures = {}
-    had_error = False
-
-    for func in ast.functions:
-        try:
-            symtab.declare(func.name, func.return_type)
-            param_types = [p.param_type for p in func.params]
-            function_signatures[func.name] = (param_types, func.return_type)
-        except Exception as e:
-            print(e)
-            had_error = True
-
-    for func in ast.functions:
-        symtab.enter_scope()
-        for param in func.params:
-            try:
-                symtab.declare(param.name, param.param_type)
-            except Exception as e:
-                print(e)
-                had_error = True
-        for stmt in func.body:
-            if analyze_statement(stmt, symtab, func.return_type, function_signatures):
-                had_error = True
-        symtab.exit_scope()
-
-    if not had_error:
-        print("✅ Semantic analysis completed successfully.")
-    else:
-        print("❌ Semantic analysis completed with errors.")
-
-def analyze_statement(stmt: Statement, symtab: SymbolTable, expected_return_type=None, function_signatures=None):
-    error = False
-
-    if stmt.value.startswith("declare"):
-        parts = stmt.value.split()
-        if len(parts) < 3:
-            print(f"❌ Invalid declaration statement: {stmt.value}")
-            return True
-        _, var_type, name = parts
-        try:
-            symtab.declare(name, var_type)
-        except Exception as e:
-            print(e)
-            error = True
-
-        if stmt.expression:
-            if isinstance(stmt.expression, str):
-                if var_type == "int" and "." in stmt.expression:
-                    print(f"❌ Type mismatch: assigning float to int variable '{name}'.")
-                    error = True
-
-    elif stmt.value.startswith("expr"):
-        parts = stmt.value.split()
-        if len(parts) < 3:
-            print(f"❌ Invalid assignment statement: {stmt.value}")
-            return True
-        _, left, _ = parts
-
-        if stmt.expression:
-            try:
-                _ = symtab.lookup(left)
-            except Exception as e:
-                print(e)
-                error = True
-
-    elif stmt.value.startswith("return"):
-        if stmt.expression:
-            ret_type = None
-            if isinstance(stmt.expression, str):
-                if stmt.expression.replace(".", "", 1).isdigit():
-                    ret_type = "float" if "." in stmt.expression else "int"
-                else:
-                    try:
-                        ret_type = symtab.lookup(stmt.expression)
-                    except Exception as e:
-                        print(e)
-                        return True
-            else:
-                ret_type = expected_return_type
-
-            if expected_return_type and ret_type != expected_return_type:
-                print(f"❌ Return type mismatch: function expects {expected_return_type}, but returning {ret_type}")
-                error = True
-
-    elif stmt.func_call:
-        func = stmt.func_call
-        if func.name not in function_signatures:
-            print(f"❌ Function '{func.name}' is not declared.")
-            return True
-
-        expected_params, return_type = function_signatures[func.name]
-        left_var = stmt.value.split()[1]
-
-        if not symtab.exists(left_var):
-            try:
-                symtab.declare(left_var, return_type)
-            except Exception as e:
-                print(e)
-                error = True
-
-        if len(func.args) != len(expected_params):
-            print(f"❌ Argument count mismatch in call to '{func.name}': expected {len(expected_params)}, got {len(func.args)}")
-            return True
-
-        for i, arg in enumerate(func.args):
-            try:
-                arg_type = symtab.lookup(arg)
-                if arg_type != expected_params[i]:
-                    print(f"❌ Argument type mismatch in call to '{func.name}': expected {expected_params[i]}, got {arg_type}")
-                    error = True
-            except Exception as e:
-                print(f"❌ Argument '{arg}' in call to '{func.name}' is not declared.")
-                error = True
-
-    elif stmt.if_stmt:
-        cond = stmt.if_stmt.condition
-        try:
-            cond_type = symtab.lookup(cond) if isinstance(cond, str) else 'int'
-            if cond_type not in ['int', 'bool']:
-                print(f"❌ Condition must be int or bool, got {cond_type}")
-                error = True
-        except Exception:
-            print(f"❌ Condition variable in if-statement is not declared.")
-            error = True
-
-        symtab.enter_scope()
-        for s in stmt.if_stmt.true_branch:
-            if analyze_statement(s, symtab, expected_return_type, function_signatures):
-                error = True
-        symtab.exit_scope()
-
-        if stmt.if_stmt.false_branch:
-            symtab.enter_scope()
-            for s in stmt.if_stmt.false_branch:
-                if analyze_statement(s, symtab, expected_return_type, function_signatures):
-                    error = True
-            symtab.exit_scope()
-
-    elif stmt.while_stmt:
-        cond = stmt.while_stmt.condition
-        try:
-            cond_type = symtab.lookup(cond) if isinstance(cond, str) else 'int'
-            if cond_type not in ['int', 'bool']:
-                print(f"❌ Condition must be int or bool, got {cond_type}")
-                error = True
-        except Exception:
-            print(f"❌ Condition variable in while-loop is not declared.")
-            error = True
-
-        symtab.enter_scope()
-        for s in stmt.while_stmt.body:
-            if analyze_statement(s, symtab, expected_return_type, function_signatures):
-                error = True
-        symtab.exit_scope()
-
-    return error
+from scripts.context import CompilationContext
+from scripts.symbol_table import SymbolTable
+from scripts.ast import *
+from scripts.diagnostics import (
+    UNDECLARED_VARIABLE, REDECLARED_SYMBOL, TYPE_MISMATCH, RETURN_TYPE_MISMATCH,
+    CONDITION_TYPE, UNDECLARED_FUNCTION, ARGUMENT_COUNT, ARGUMENT_TYPE, located,
+)
+
+COMPARISON_OPS = {'<', '>', '='}
+
+def analyze(ast: Program, ctx=None, externals=None):
+    """Check `ast` and return the diagnostics it produced.
+
+    Findings go to ctx.diagnostics as structured records. When the
+    collector's error cap is reached the analyzer stops at the next
+    statement boundary. `externals` maps functions defined in other
+    modules to their (param_types, return_type).
+    """
+    ctx = ctx or CompilationContext(echo=True)
+    ctx.log("Semantic analysis in progress...")
+    first = len(ctx.diagnostics)
+    analyzer = SemanticAnalyzer(ctx)
+    if externals:
+        analyzer.declare_externals(externals)
+    analyzer.visit(ast)
+    if ctx.metrics is not None:
+        ctx.metrics.count('symbols_declared', analyzer.symtab.declared)
+        ctx.metrics.count('max_scope_depth', analyzer.symtab.max_depth)
+
+    if not analyzer.had_error:
+        ctx.log("✅ Semantic analysis completed successfully.")
+    else:
+        ctx.log("❌ Semantic analysis completed with errors.")
+    return ctx.diagnostics.items[first:]
+
+
+def analyze_function(node, symtab, signatures, ctx):
+    """Check one Function body against the global scope `symtab` and the
+    `signatures` of a finished SemanticAnalyzer.declare_functions pass.
+    Returns the analyzer; `symtab` is left as it was found."""
+    analyzer = SemanticAnalyzer(ctx)
+    analyzer.symtab = symtab
+    analyzer.function_signatures = signatures
+    analyzer.visit(node)
+    return analyzer
+
+
+class SemanticAnalyzer(NodeVisitor):
+    """Statement visitors return nothing; expression visitors return the
+    inferred type ('int', 'float', 'bool') or None when it is unknown."""
+
+    def __init__(self, ctx):
+        self.ctx = ctx
+        self.diagnostics = ctx.diagnostics
+        self.symtab = SymbolTable()
+        self.function_signatures = {}
+        self.expected_return_type = None
+        self.had_error = False
+
+    def error(self, code, message, node):
+        self.diagnostics.error(code, located(message, node.line, node.column), node.line, node.column)
+        self.had_error = True
+
+    def declare(self, node, name, type_, kind):
+        if self.symtab.declare(name, type_, kind, node.line, node.column) is None:
+            self.error(REDECLARED_SYMBOL, f"❌ Variable '{name}' already declared in this scope", node)
+
+    def visit_Program(self, node):
+        self.declare_functions(node)
+        for func in node.functions:
+            if self.diagnostics.full:
+                break
+            self.visit(func)
+
+    def declare_functions(self, node):
+        """The signature pass: every function body may call every function."""
+        for func in node.functions:
+            self.declare_function(func)
+
+    def declare_externals(self, signatures):
+        """Functions from other modules, known only by their signatures."""
+        for name, (param_types, return_type) in signatures.items():
+            self.symtab.declare(name, return_type, 'function')
+            self.function_signatures[name] = (list(param_types), return_type)
+
+    def declare_function(self, func):
+        self.declare(func, func.name, func.return_type, 'function')
+        param_types = [p.param_type for p in func.params]
+        self.function_signatures[func.name] = (param_types, func.return_type)
+
+    def visit_Function(self, node):
+        self.expected_return_type = node.return_type
+        self.symtab.enter_scope()
+        for param in node.params:
+            self.declare(param, param.name, param.param_type, 'param')
+        self.visit_block(node.body, new_scope=False)
+        self.symtab.exit_scope()
+
+    def visit_block(self, stmts, new_scope=True):
+        if new_scope:
+            self.symtab.enter_scope()
+        diagnostics = self.diagnostics
+        for stmt in stmts:
+            if diagnostics.full:
+                break
+            self.visit(stmt)
+        if new_scope:
+            self.symtab.exit_scope()
+
+    # Statements
+
+    def visit_VarDecl(self, node):
+        value_type = self.visit(node.value)
+        self.declare(node, node.name, node.var_type, 'variable')
+        if node.var_type == "int" and value_type == "float":
+            self.error(TYPE_MISMATCH, f"❌ Type mismatch: assigning float to int variable '{node.name}'", node)
+
+    def visit_Assign(self, node):
+        value_type = self.visit(node.value)
+        symbol = self.symtab.lookup(node.name)
+        if symbol is None:
+            self.error(UNDECLARED_VARIABLE, f"❌ Variable '{node.name}' is not declared", node)
+        elif symbol.type == "int" and value_type == "float":
+            self.error(TYPE_MISMATCH, f"❌ Type mismatch: assigning float to int variable '{node.name}'", node)
+
+    def visit_Return(self, node):
+        ret_type = self.visit(node.value)
+        if ret_type and self.expected_return_type and ret_type != self.expected_return_type:
+            self.error(RETURN_TYPE_MISMATCH, f"❌ Return type mismatch: function expects {self.expected_return_type}, but returning {ret_type}", node)
+
+    def visit_If(self, node):
+        self.check_condition(node.condition, "if-statement")
+        self.visit_block(node.then_body)
+        if node.else_body:
+            self.visit_block(node.else_body)
+
+    def visit_While(self, node):
+        self.check_condition(node.condition, "while-loop")
+        self.visit_block(node.body)
+
+    def check_condition(self, cond, where):
+        cond_type = self.visit(cond)
+        if cond_type and cond_type not in ['int', 'bool']:
+            self.error(CONDITION_TYPE, f"❌ Condition in {where} must be int or bool, got {cond_type}", cond)
+
+    # Expressions
+
+    def visit_Name(self, node):
+        symbol = self.symtab.lookup(node.id)
+        if symbol is None:
+            self.error(UNDECLARED_VARIABLE, f"❌ Variable '{node.id}' is not declared", node)
+            return None
+        return symbol.type
+
+    def visit_Literal(self, node):
+        return node.type
+
+    def visit_BinOp(self, node):
+        # Post-order walk with an explicit stack, like TACGenerator.visit_BinOp,
+        # so long operator chains do not recurse
+        types = []
+        stack = [(node, False)]
+        while stack:
+            expr, operands_done = stack.pop()
+            if expr.__class__ is not BinOp:
+                types.append(self.visit(expr))
+            elif operands_done:
+                right = types.pop()
+                left = types[-1]
+                if expr.op in COMPARISON_OPS:
+                    types[-1] = 'bool'
+                elif left is None or right is None:
+                    types[-1] = None
+                else:
+                    types[-1] = 'float' if 'float' in (left, right) else 'int'
+            else:
+                stack.append((expr, True))
+                stack.append((expr.right, False))
+                stack.append((expr.left, False))
+        return types[0]
+
+    def visit_Call(self, node):
+        arg_types = [self.visit(arg) for arg in node.args]
+        if node.name not in self.function_signatures:
+            self.error(UNDECLARED_FUNCTION, f"❌ Function '{node.name}' is not declared", node)
+            return None
+
+        expected_params, return_type = self.function_signatures[node.name]
+        if len(arg_types) != len(expected_params):
+            self.error(ARGUMENT_COUNT, f"❌ Argument count mismatch in call to '{node.name}': expected {len(expected_params)}, got {len(arg_types)}", node)
+            return return_type
+
+        for arg, expected, arg_type in zip(node.args, expected_params, arg_types):
+            if arg_type and arg_type != expected:
+                self.error(ARGUMENT_TYPE, f"❌ Argument type mismatch in call to '{node.name}': expected {expected}, got {arg_type}", arg)
+        return return_type
@@ -0,0 +1,369 @@
+"""Compact binary format for ASTs and TAC modules.
+
+    data = dump_ast(program)          reader = load_ast(data)
+    data = dump_module(module)        reader = load_module(data)
+
+A file is a header (magic, format version, payload kind), a table of
+section offsets and lengths, then the sections, each 4-byte aligned:
+
+    strings   every identifier, type, operator and literal once: a u32
+              offset per string (plus one past the end) and a UTF-8 blob
+    AST       a pre-order node table as parallel columns: kind, line,
+              column and four slots holding string ids, node indices or
+              list positions per LAYOUTS; lists are stored as [count,
+              item, ...] runs in a u32 `lists` section
+    TAC       opcode and dest/src1/src2 string ids per instruction, CALL
+              and PHI operand tuples as [count, id, ...] runs in a u32
+              section, and a (name, params, first instruction, count) u32
+              row per function
+
+Each per-node and per-instruction column is stored as u8, u16 or u32,
+whichever is narrowest for its largest value; the reader tells which from
+the section length, since the kind and opcode columns give the count.
+
+String id 0 stands for None and absent nodes and lists are NONE.
+Integers are little-endian; on little-endian hosts the columns are
+memoryview casts straight over the input, so loading copies nothing. Readers decode a function (and the strings it uses) on
+first access, and program()/module() decode everything. A node's subtree
+is contiguous in pre-order, so a function is rebuilt by one backwards
+sweep over its range, children before parents, without recursion.
+"""
+import gc
+import struct
+import sys
+from array import array
+
+from scripts import tac
+from scripts.ast import (Program, Function, Param, Name, Literal, BinOp, Call,
+                         VarDecl, Assign, Return, If, While, walk)
+
+MAGIC = b'MLPB'
+FORMAT_VERSION = 1
+AST_PAYLOAD = 1
+TAC_PAYLOAD = 2
+NONE = 0xFFFFFFFF
+
+_HEADER = struct.Struct('<4sHHI')     # magic, version, payload, section count
+_SECTION = struct.Struct('<II')       # offset, length
+_LITTLE = sys.byteorder == 'little'
+
+STR, NODE, LIST = range(3)
+SLOTS = 4
+
+# Slot layout per node class; the fields are the class's own, in order, so
+# a node is rebuilt as cls(*slots, line, column)
+LAYOUTS = {
+    Function: (STR, STR, LIST, LIST),      # return_type, name, params, body
+    Param: (STR, STR),                     # param_type, name
+    Name: (STR,),                          # id
+    Literal: (STR, STR),                   # value, type
+    BinOp: (STR, NODE, NODE),              # op, left, right
+    Call: (STR, LIST),                     # name, args
+    VarDecl: (STR, STR, NODE),             # var_type, name, value
+    Assign: (STR, NODE),                   # name, value
+    Return: (NODE,),                       # value
+    If: (NODE, LIST, LIST),                # condition, then_body, else_body
+    While: (NODE, LIST),                   # condition, body
+}
+NODE_CLASSES = tuple(LAYOUTS)
+_NODE_KINDS = {cls: kind for kind, cls in enumerate(NODE_CLASSES)}
+_FIELDS = {cls: tuple(cls.__dataclass_fields__)[:len(layout)] for cls, layout in LAYOUTS.items()}
+
+OPCODES = (tac.COPY, tac.CALL, tac.RETURN, tac.LABEL, tac.GOTO, tac.IF_FALSE, tac.PHI) + tuple(
+    sorted(tac.BINARY_OPS))
+_OPCODE_CODES = {opcode: code for code, opcode in enumerate(OPCODES)}
+_TUPLE_OPCODES = frozenset(_OPCODE_CODES[opcode] for opcode in (tac.CALL, tac.PHI))
+
+
+# Writing
+
+class _Strings:
+    def __init__(self):
+        self.index = {None: 0}
+
+    def id(self, text):
+        number = self.index.get(text)
+        if number is None:
+            number = self.index[text] = len(self.index)
+        return number
+
+    def sections(self):
+        blob = bytearray()
+        offsets = array('I', [0])
+        for text in self.index:      # Insertion order is id order
+            if text is not None:
+                blob += text.encode('utf-8')
+            offsets.append(len(blob))
+        return [_u32_bytes(offsets), bytes(blob)]
+
+
+_WIDTHS = (('B', 0xFF), ('H', 0xFFFF), ('I', 0xFFFFFFFF))
+_WIDTH_CODES = {1: 'B', 2: 'H', 4: 'I'}
+
+
+def _u32_bytes(values):
+    if not _LITTLE:
+        values = array('I', values)
+        values.byteswap()
+    return values.tobytes()
+
+
+def _column_bytes(values):
+    """`values` in the narrowest unsigned width that holds all of them."""
+    top = max(values, default=0)
+    typecode = next(typecode for typecode, limit in _WIDTHS if top <= limit)
+    packed = array(typecode, values)
+    if not _LITTLE:
+        packed.byteswap()
+    return packed.tobytes()
+
+
+def _pack(payload, sections):
+    out = bytearray(_HEADER.pack(MAGIC, FORMAT_VERSION, payload, len(sections)))
+    table = len(out)
+    out += bytes(_SECTION.size * len(sections))
+    for number, section in enumerate(sections):
+        out += bytes(-len(out) % 4)
+        _SECTION.pack_into(out, table + number * _SECTION.size, len(out), len(section))
+        out += section
+    return bytes(out)
+
+
+def dump_ast(program):
+    """Encode a Program as bytes."""
+    strings = _Strings()
+    nodes = []
+    index = {}
+    for func in program.functions:
+        for node in walk(func):
+            index[id(node)] = len(nodes)
+            nodes.append(node)
+
+    lists = array('I')
+
+    def list_ref(items):
+        if items is None:
+            return NONE
+        position = len(lists)
+        lists.append(len(items))
+        lists.extend([index[id(item)] for item in items])
+        return position
+
+    kinds = bytearray(len(nodes))
+    lines = array('I', [0]) * len(nodes)
+    columns = array('I', lines)
+    slots = [array('I', [NONE]) * len(nodes) for _ in range(SLOTS)]
+    for number, node in enumerate(nodes):
+        cls = node.__class__
+        kinds[number] = _NODE_KINDS[cls]
+        lines[number] = node.line
+        columns[number] = node.column
+        for slot, (kind, name) in enumerate(zip(LAYOUTS[cls], _FIELDS[cls])):
+            value = getattr(node, name)
+            if kind == STR:
+                slots[slot][number] = strings.id(value)
+            elif kind == NODE:
+                slots[slot][number] = NONE if value is None else index[id(value)]
+            else:
+                slots[slot][number] = list_ref(value)
+    functions = list_ref(program.functions)
+    return _pack(AST_PAYLOAD, strings.sections() + [
+        bytes(kinds), _column_bytes(lines), _column_bytes(columns), *map(_column_bytes, slots),
+        _u32_bytes(lists), _u32_bytes(array('I', [functions]))])
+
+
+def dump_module(module):
+    """Encode a tac.Module as bytes."""
+    strings = _Strings()
+    string_id = strings.id
+    opcodes = bytearray()
+    dest, src1, src2 = array('I'), array('I'), array('I')
+    tuples = array('I')
+    functions = array('I')
+
+    def tuple_ref(items):
+        position = len(tuples)
+        tuples.append(len(items))
+        tuples.extend([string_id(item) for item in items])
+        return position
+
+    for function in module.functions:
+        functions.extend((string_id(function.name), tuple_ref(function.params), len(opcodes), len(function.code)))
+        for instr in function.code:
+            code = _OPCODE_CODES[instr.opcode]
+            opcodes.append(code)
+            dest.append(string_id(instr.dest))
+            src1.append(string_id(instr.src1))
+            src2.append(tuple_ref(instr.src2) if code in _TUPLE_OPCODES else string_id(instr.src2))
+    return _pack(TAC_PAYLOAD, strings.sections() + [
+        bytes(opcodes), _column_bytes(dest), _column_bytes(src1), _column_bytes(src2),
+        _u32_bytes(tuples), _u32_bytes(functions)])
+
+
+# Reading
+
+def _u32_view(view, typecode='I'):
+    if _LITTLE:
+        return view.cast(typecode)
+    values = array(typecode, view.tobytes())
+    values.byteswap()
+    return values
+
+
+def _column_view(view, count):
+    width = len(view) // count if count else 1
+    typecode = _WIDTH_CODES.get(width)
+    if typecode is None or len(view) != width * count:
+        raise ValueError("Binary file is corrupt")
+    return _u32_view(view, typecode)
+
+
+class _Texts(dict):
+    """String id -> str, decoding each string on first lookup."""
+
+    def __init__(self, offsets, blob):
+        super().__init__({0: None})
+        self.offsets = offsets
+        self.blob = blob
+
+    def __missing__(self, number):
+        offsets = self.offsets
+        text = self[number] = str(self.blob[offsets[number]:offsets[number + 1]], 'utf-8')
+        return text
+
+
+class _Reader:
+    """Header, sections and lazily decoded strings of one buffer."""
+
+    def __init__(self, data, payload, section_count):
+        view = memoryview(data).cast('B')
+        if len(view) < _HEADER.size or view[:4] != MAGIC:
+            raise ValueError("Not a MiniLang++ binary file")
+        _, version, found, count = _HEADER.unpack_from(view)
+        if version != FORMAT_VERSION:
+            raise ValueError(f"Unsupported binary format version {version} (expected {FORMAT_VERSION})")
+        if found != payload or count != section_count:
+            raise ValueError("Binary file holds a different payload")
+        self.sections = []
+        for number in range(count):
+            offset, length = _SECTION.unpack_from(view, _HEADER.size + number * _SECTION.size)
+            if offset + length > len(view):
+                raise ValueError("Binary file is truncated")
+            self.sections.append(view[offset:offset + length])
+        self.texts = _Texts(_u32_view(self.sections[0]), self.sections[1])
+
+    def function(self, number):
+        """The function at position `number`, decoded on first access."""
+        function = self._functions[number]
+        if function is None:
+            function = self._functions[number] = self._decode(number)
+        return function
+
+
+class AstReader(_Reader):
+    """Lazy view of a dump_ast() buffer."""
+
+    def __init__(self, data):
+        super().__init__(data, AST_PAYLOAD, 11)
+        sections = self.sections
+        self.kinds = sections[2]
+        count = len(self.kinds)
+        self.lines, self.columns = _column_view(sections[3], count), _column_view(sections[4], count)
+        self.slots = [_column_view(section, count) for section in sections[5:5 + SLOTS]]
+        self.lists = _u32_view(sections[9])
+        self._top = _u32_view(sections[10])[0]
+        self._functions = [None] * len(self)
+
+    def __len__(self):
+        return self.lists[self._top]
+
+    def names(self):
+        """Function names in source order, decoding nothing else."""
+        first, name_slot = self._top + 1, self.slots[1]
+        return [self.texts[name_slot[self.lists[first + number]]] for number in range(len(self))]
+
+    def program(self):
+        return Program([self.function(number) for number in range(len(self))])
+
+    def _decode(self, number):
+        lists, first = self.lists, self._top + 1
+        start = lists[first + number]
+        end = lists[first + number + 1] if number + 1 < len(self) else len(self.kinds)
+        kinds, lines, columns, slots = self.kinds, self.lines, self.columns, self.slots
+        texts = self.texts
+        built = [None] * (end - start)
+        collecting = gc.isenabled()
+        gc.disable()
+        try:
+            for index in range(end - 1, start - 1, -1):   # Children come after their parent
+                cls = NODE_CLASSES[kinds[index]]
+                values = []
+                for slot, kind in enumerate(LAYOUTS[cls]):
+                    value = slots[slot][index]
+                    if kind == STR:
+                        values.append(texts[value])
+                    elif value == NONE:
+                        values.append(None)
+                    elif kind == NODE:
+                        values.append(built[value - start])
+                    else:
+                        values.append([built[lists[item] - start] for item in range(value + 1, value + 1 + lists[value])])
+                built[index - start] = cls(*values, lines[index], columns[index])
+        finally:
+            if collecting:
+                gc.enable()
+        return built[0]
+
+
+class ModuleReader(_Reader):
+    """Lazy view of a dump_module() buffer."""
+
+    def __init__(self, data):
+        super().__init__(data, TAC_PAYLOAD, 8)
+        sections = self.sections
+        self.opcodes = sections[2]
+        self.dest, self.src1, self.src2 = (_column_view(section, len(self.opcodes)) for section in sections[3:6])
+        self.tuples = _u32_view(sections[6])
+        self.table = _u32_view(sections[7])
+        self._functions = [None] * len(self)
+
+    def __len__(self):
+        return len(self.table) // 4
+
+    def names(self):
+        return [self.texts[self.table[4 * number]] for number in range(len(self))]
+
+    def module(self):
+        return tac.Module([self.function(number) for number in range(len(self))])
+
+    def _tuple(self, position):
+        count = self.tuples[position]
+        return tuple(map(self.texts.__getitem__, self.tuples[position + 1:position + 1 + count].tolist()))
+
+    def _decode(self, number):
+        name, params, first, count = self.table[4 * number:4 * number + 4].tolist()
+        end = first + count
+        text = self.texts.__getitem__
+        opcodes = self.opcodes[first:end].tolist()
+        second = [self._tuple(value) if opcode in _TUPLE_OPCODES else text(value)
+                  for opcode, value in zip(opcodes, self.src2[first:end].tolist())]
+        collecting = gc.isenabled()
+        gc.disable()
+        try:
+            code = list(map(tac.Instr, map(OPCODES.__getitem__, opcodes), map(text, self.dest[first:end].tolist()),
+                            map(text, self.src1[first:end].tolist()), second))
+        finally:
+            if collecting:
+                gc.enable()
+        return tac.Function(text(name), list(self._tuple(params)), code)
+
+
+def load_ast(data):
+    """An AstReader over `data` (bytes, bytearray, mmap or memoryview);
+    raises ValueError for anything dump_ast() of this version did not write."""
+    return AstReader(data)
+
+
+def load_module(data):
+    """A ModuleReader over `data`; raises ValueError as load_ast() does."""
+    return ModuleReader(data)
@@ -0,0 +1,220 @@
+"""Long-lived compile server on a Unix socket.
+
+    python -m scripts.server --socket PATH [-j WORKERS] [--cache-dir DIR]
+                             [--memory-entries N]
+
+Requests and responses are JSON objects, one per line. A compile request
+names a `source` string or a `path`, plus optional `options` (optimize,
+allocate, max_errors) and an `id` that is echoed back:
+
+    {"id": 1, "path": "test/sample1", "options": {"optimize": true}}
+
+and is answered with
+
+    {"id": 1, "ok": true, "cached": false, "tokens": [[kind, value, line,
+     column], ...], "diagnostics": [{...}], "tac": "...", "seconds": ...}
+
+`{"command": "stats"}` reports request and cache counters and
+`{"command": "shutdown"}` stops the server. Malformed requests get
+`{"id": ..., "error": "..."}`.
+
+Connections are served concurrently by asyncio and compiles run in a pool
+of worker processes that stay up, so each request skips interpreter
+startup, imports and regex compilation. Responses are also kept in an
+in-memory LRU keyed like scripts.cache, and workers share the on-disk
+artifact cache when --cache-dir is given. Requests on one connection may be
+answered out of order; match them up by `id`.
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import sys
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from pathlib import Path
+
+from scripts import compiler, tac
+from scripts.cache import ArtifactCache
+from scripts.context import CompilationContext
+
+OPTIONS = ('optimize', 'allocate', 'max_errors')
+DEFAULT_MEMORY_ENTRIES = 256
+MAX_REQUEST_BYTES = 64 * 1024 * 1024
+
+_caches = {}   # Per worker process: cache_dir -> ArtifactCache
+
+
+def compile_request(source, path, options, cache_dir):
+    """Worker entry point: compile and return the JSON-ready response."""
+    cache = None
+    if cache_dir:
+        cache = _caches.get(cache_dir)
+        if cache is None:
+            cache = _caches[cache_dir] = ArtifactCache(cache_dir)
+    started = time.perf_counter()
+    result = compiler.compile_source(source, CompilationContext(**options), path, cache)
+    stream = result.tokens
+    return {
+        'ok': result.ok,
+        'cached': result.cached,
+        'tokens': [[kind, value, *stream.position(index)] for index, (kind, value) in enumerate(stream)],
+        'diagnostics': [{'severity': d.severity, 'code': d.code, 'message': d.message,
+                         'line': d.span.line if d.span else 0, 'column': d.span.column if d.span else 0}
+                        for d in result.diagnostics],
+        'tac': tac.format_module(result.module),
+        'seconds': time.perf_counter() - started,
+    }
+
+
+class RequestError(Exception):
+    pass
+
+
+class CompileServer:
+    def __init__(self, socket_path, workers=None, cache_dir=None, memory_entries=DEFAULT_MEMORY_ENTRIES):
+        self.socket_path = str(socket_path)
+        # workers=0 compiles on threads in this process (for tests and tiny inputs)
+        self.pool = (ThreadPoolExecutor(max_workers=1) if workers == 0
+                     else ProcessPoolExecutor(max_workers=workers or os.cpu_count() or 1))
+        self.cache_dir = cache_dir
+        self.memory = OrderedDict()
+        self.memory_entries = memory_entries
+        self.stats = {'requests': 0, 'errors': 0, 'memory_hits': 0, 'compiles': 0}
+        self.server = None
+        self.stopped = None
+        self.connections = {}   # Handler task -> its writer
+
+    async def serve(self):
+        self.stopped = asyncio.Event()
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)   # Left over from a server that did not shut down cleanly
+        self.server = await asyncio.start_unix_server(self.handle, path=self.socket_path,
+                                                      limit=MAX_REQUEST_BYTES)
+        try:
+            await self.stopped.wait()
+        finally:
+            self.server.close()
+            # Closing a connection ends its handler at the next read
+            for writer in self.connections.values():
+                writer.close()
+            await asyncio.gather(*self.connections, return_exceptions=True)
+            await self.server.wait_closed()
+            self.pool.shutdown(cancel_futures=True)
+            if os.path.exists(self.socket_path):
+                os.unlink(self.socket_path)
+
+    async def handle(self, reader, writer):
+        lock = asyncio.Lock()
+        tasks = set()
+        self.connections[asyncio.current_task()] = writer
+        try:
+            while not reader.at_eof():
+                line = await reader.readline()
+                if not line.strip():
+                    continue
+                task = asyncio.create_task(self.respond(line, writer, lock))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+            if tasks:
+                await asyncio.gather(*tasks)
+        except (ConnectionError, ValueError):
+            pass   # Client went away or sent a line over the limit
+        finally:
+            del self.connections[asyncio.current_task()]
+            writer.close()
+
+    async def respond(self, line, writer, lock):
+        request_id = None
+        try:
+            request = json.loads(line)
+            if not isinstance(request, dict):
+                raise RequestError("request must be a JSON object")
+            request_id = request.get('id')
+            response = await self.dispatch(request)
+        except (RequestError, json.JSONDecodeError, OSError) as e:
+            self.stats['errors'] += 1
+            response = {'error': str(e)}
+        except Exception as e:
+            self.stats['errors'] += 1
+            response = {'error': f"internal error: {type(e).__name__}: {e}"}
+        response = {'id': request_id, **response}
+        async with lock:
+            writer.write(json.dumps(response).encode() + b"\n")
+            await writer.drain()
+        if response.get('stopping'):
+            self.stopped.set()
+
+    async def dispatch(self, request):
+        command = request.get('command', 'compile')
+        if command == 'stats':
+            return {**self.stats, 'memory_entries': len(self.memory)}
+        if command == 'shutdown':
+            return {'stopping': True}   # respond() stops once this is sent
+        if command != 'compile':
+            raise RequestError(f"unknown command '{command}'")
+        self.stats['requests'] += 1
+
+        options = request.get('options') or {}
+        unknown = set(options) - set(OPTIONS)
+        if unknown:
+            raise RequestError(f"unknown options: {', '.join(sorted(unknown))}")
+        # Unset flags share the entry of no options; max_errors=0 is a real cap
+        options = {name: value for name, value in options.items() if value is not None and value is not False}
+        path = request.get('path')
+        if 'source' in request:
+            source = request['source']
+            if not isinstance(source, str):
+                raise RequestError("source must be a string")
+        elif isinstance(path, str):
+            data = await asyncio.get_running_loop().run_in_executor(None, Path(path).read_bytes)
+            source = data.decode('utf-8', 'replace')
+        else:
+            raise RequestError("request needs a source or a path")
+
+        key = _memory_key(source, options)
+        response = self.memory.get(key)
+        if response is not None:
+            self.memory.move_to_end(key)
+            self.stats['memory_hits'] += 1
+            return {**response, 'cached': True, 'seconds': 0.0}
+
+        self.stats['compiles'] += 1
+        loop = asyncio.get_running_loop()
+        response = await loop.run_in_executor(self.pool, compile_request, source, path, options, self.cache_dir)
+        self.memory[key] = response
+        if len(self.memory) > self.memory_entries:
+            self.memory.popitem(last=False)
+        return response
+
+
+def _memory_key(source, options):
+    hasher = hashlib.sha256(compiler.COMPILER_VERSION.encode())
+    hasher.update(b"\0" + repr(sorted(options.items())).encode() + b"\0")
+    hasher.update(source.encode('utf-8', 'surrogatepass'))
+    return hasher.digest()
+
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(description="Serve MiniLang++ compiles over a Unix socket.")
+    arg_parser.add_argument("--socket", required=True, help="path of the Unix socket to listen on")
+    arg_parser.add_argument("-j", "--workers", type=int, help="worker processes (default: CPU count)")
+    arg_parser.add_argument("--cache-dir", help="share compiled artifacts through this directory")
+    arg_parser.add_argument("--memory-entries", type=int, default=DEFAULT_MEMORY_ENTRIES,
+                            help="responses kept in memory (default: %(default)s)")
+    args = arg_parser.parse_args(argv)
+
+    server = CompileServer(args.socket, args.workers, args.cache_dir, args.memory_entries)
+    print(f"🛰️ Listening on {args.socket}", flush=True)
+    try:
+        asyncio.run(server.serve())
+    except KeyboardInterrupt:
+        pass
+    print("✅ Server stopped.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,210 @@
+from scripts.cfg import (
+    dominators, dominator_tree, dominance_frontiers, block_uses, liveness,
+)
+from scripts.tac import Instr, COPY, CALL, PHI, BINARY_OPS, is_constant, uses, defines
+
+# SSA names are "<name>.<version>"; '.' never appears in a source
+# identifier or a temp. A name without a version is the value the original
+# variable had on function entry (a parameter, or undefined).
+
+
+class SSANames:
+    def __init__(self):
+        self.versions = {}
+        self.base = {}   # SSA name -> original name
+
+    def new(self, name):
+        version = self.versions.get(name, 0) + 1
+        self.versions[name] = version
+        ssa_name = f"{name}.{version}"
+        self.base[ssa_name] = name
+        return ssa_name
+
+
+def rename_uses(instr, rename):
+    """Rewrite every operand `instr` reads through the function `rename`."""
+    op = instr.opcode
+    if op in BINARY_OPS:
+        instr.src1 = rename(instr.src1)
+        instr.src2 = rename(instr.src2)
+    elif op == CALL:
+        instr.src2 = tuple(map(rename, instr.src2))
+    elif op == PHI:
+        instr.src2 = list(map(rename, instr.src2))
+    elif instr.src1 is not None:
+        instr.src1 = rename(instr.src1)
+
+
+def to_ssa(cfg):
+    """Put `cfg` into semi-pruned SSA form: phi nodes are placed on the
+    iterated dominance frontier of the definitions of every name that is
+    read in some block before being written there, then all names are
+    renamed along the dominator tree. Returns the SSANames used."""
+    blocks = cfg.blocks
+    idom = dominators(cfg)
+    children = dominator_tree(idom)
+    frontiers = dominance_frontiers(cfg, idom)
+
+    def_sites = {}
+    crossing = set()
+    for block in blocks:
+        gen, kill = block_uses(block)
+        crossing |= gen
+        for name in kill:
+            def_sites.setdefault(name, []).append(block.index)
+
+    for name in sorted(crossing):
+        sites = def_sites.get(name)
+        if not sites:
+            continue
+        has_phi = set()
+        queued = set(sites)
+        work = list(sites)
+        while work:
+            for index in sorted(frontiers[work.pop()]):
+                if index in has_phi:
+                    continue
+                has_phi.add(index)
+                block = blocks[index]
+                block.phis.append(Instr(PHI, name, name, [name] * len(block.preds)))
+                if index not in queued:
+                    queued.add(index)
+                    work.append(index)
+
+    names = SSANames()
+    stacks = {}
+
+    def current(operand):
+        versions = stacks.get(operand)
+        return versions[-1] if versions else operand
+
+    def define(name, pushed):
+        ssa_name = names.new(name)
+        stacks.setdefault(name, []).append(ssa_name)
+        pushed.append(name)
+        return ssa_name
+
+    # Dominator-tree walk with an explicit stack; a second visit pops the
+    # versions the block pushed
+    work = [(0, None)]
+    while work:
+        index, pushed = work.pop()
+        if pushed is not None:
+            for name in pushed:
+                stacks[name].pop()
+            continue
+        block = blocks[index]
+        pushed = []
+        for phi in block.phis:
+            phi.dest = define(phi.src1, pushed)
+        for instr in block.code:
+            rename_uses(instr, current)
+            if defines(instr) is not None:
+                instr.dest = define(instr.dest, pushed)
+        if block.cond is not None:
+            block.cond = current(block.cond)
+        for succ in block.succs:
+            successor = blocks[succ]
+            position = successor.preds.index(index)
+            for phi in successor.phis:
+                phi.src2[position] = current(phi.src1)
+        work.append((index, pushed))
+        for child in reversed(children[index]):
+            work.append((child, None))
+    return names
+
+
+def from_ssa(cfg, names):
+    """Replace phi nodes by copies at the end of each predecessor. Critical
+    edges are split first so the copies only run on their own edge."""
+    blocks = cfg.blocks
+    for block in list(blocks):
+        for position, pred in enumerate(list(block.preds)):
+            if len(blocks[pred].succs) > 1 and any(phi.dest != phi.src2[position] for phi in block.phis):
+                cfg.split_edge(pred, block.index)
+    for block in blocks:
+        if not block.phis:
+            continue
+        for position, pred in enumerate(block.preds):
+            copies = [(phi.dest, phi.src2[position]) for phi in block.phis
+                      if phi.dest != phi.src2[position]]
+            blocks[pred].code.extend(_sequentialize(copies, names))
+        block.phis = []
+
+
+def _sequentialize(copies, names):
+    """Order a set of simultaneous copies, breaking cycles with a temp."""
+    pending = dict(copies)   # dest -> source
+    code = []
+    while pending:
+        read = set(pending.values())
+        ready = [dest for dest in pending if dest not in read]
+        if ready:
+            for dest in ready:
+                code.append(Instr(COPY, dest, pending.pop(dest)))
+            continue
+        dest = next(iter(pending))
+        temp = names.new(names.base.get(dest, dest))
+        code.append(Instr(COPY, temp, dest))
+        for other, source in pending.items():
+            if source == dest:
+                pending[other] = temp
+    return code
+
+
+def restore_names(cfg, names):
+    """Give SSA names back their original name wherever that cannot change
+    the program: versions of a name are merged greedily unless one is
+    written while another is live (a copy between them does not count).
+    Versions that interfere keep their SSA name. Self copies are dropped."""
+    base_of = names.base
+    _, live_out = liveness(cfg)
+    interference = {}
+
+    for block in cfg.blocks:
+        live = {}
+        for name in live_out[block.index]:
+            live.setdefault(base_of.get(name, name), set()).add(name)
+        if block.cond is not None and not is_constant(block.cond):
+            live.setdefault(base_of.get(block.cond, block.cond), set()).add(block.cond)
+        for instr in reversed(block.code):
+            dest = defines(instr)
+            if dest is not None:
+                group = live.get(base_of.get(dest, dest))
+                if group:
+                    group.discard(dest)
+                    for other in group:
+                        if instr.opcode != COPY or instr.src1 != other:
+                            interference.setdefault(dest, set()).add(other)
+                            interference.setdefault(other, set()).add(dest)
+            for operand in uses(instr):
+                if not is_constant(operand):
+                    live.setdefault(base_of.get(operand, operand), set()).add(operand)
+
+    merged = {}
+    for base in names.versions:
+        members = {base}
+        for version in range(1, names.versions[base] + 1):
+            ssa_name = f"{base}.{version}"
+            if not interference.get(ssa_name, set()) & members:
+                members.add(ssa_name)
+                merged[ssa_name] = base
+
+    if not merged:
+        return
+
+    def rename(operand):
+        return merged.get(operand, operand)
+
+    for block in cfg.blocks:
+        code = []
+        for instr in block.code:
+            rename_uses(instr, rename)
+            if defines(instr) is not None:
+                instr.dest = rename(instr.dest)
+                if instr.opcode == COPY and instr.src1 == instr.dest:
+                    continue
+            code.append(instr)
+        block.code = code
+        if block.cond is not None:
+            block.cond = rename(block.cond)
@@ -1,29 +1,72 @@
-class SymbolTable:
-    def __init__(self):
-        self.scopes = [{}]  # Stack of scopes
-
-    def enter_scope(self):
-        self.scopes.append({})
-
-    def exit_scope(self):
-        self.scopes.pop()
-
-    def exists(self, name: str) -> bool:
-        for scope in reversed(self.scopes):
-            if name in scope:
-                return True
-        return False
-
-    def declare(self, name, type_):
-        if name in self.scopes[-1]:
-            raise Exception(f"❌ Variable '{name}' already declared in this scope.")
-        self.scopes[-1][name] = type_
-
-    def lookup(self, name):
-        for scope in reversed(self.scopes):
-            if name in scope:
-                return scope[name]
-        raise Exception(f"❌ Variable '{name}' is not declared.")
-
-    def current_scope(self):
-        return self.scopes[-1]
+from dataclasses import dataclass
+
+
+@dataclass(slots=True)
+class Symbol:
+    name: str
+    type: str
+    kind: str = 'variable'  # 'function', 'param' or 'variable'
+    line: int = 0
+    column: int = 0
+    depth: int = 0  # Scope depth it was declared at (0 = global)
+
+
+class SymbolTable:
+    """Flat symbol table with constant-time lookup.
+
+    `symbols` maps each name to a stack of the Symbols currently visible
+    under it, innermost last, so lookup never walks scopes. Neither declare
+    nor lookup raises; both signal failure by returning None. Each open scope
+    keeps an undo log of the names it declared, and exit_scope pops exactly
+    those, so leaving a scope costs the number of symbols it declared.
+    """
+
+    def __init__(self):
+        self.symbols = {}
+        self.undo_log = [[]]  # One list of declared names per open scope
+        self.declared = 0     # Successful declarations, for metrics
+        self.max_depth = 0
+
+    @property
+    def depth(self):
+        return len(self.undo_log) - 1
+
+    def enter_scope(self):
+        self.undo_log.append([])
+        if len(self.undo_log) > self.max_depth + 1:
+            self.max_depth = len(self.undo_log) - 1
+
+    def exit_scope(self):
+        symbols = self.symbols
+        for name in self.undo_log.pop():
+            shadowed = symbols[name]
+            shadowed.pop()
+            if not shadowed:
+                del symbols[name]
+
+    def exists(self, name: str) -> bool:
+        return name in self.symbols
+
+    def declare(self, name, type_, kind='variable', line=0, column=0):
+        """Declare `name` in the innermost scope and return its Symbol, or
+        None if the scope already declares it."""
+        shadowed = self.symbols.get(name)
+        depth = len(self.undo_log) - 1
+        if shadowed and shadowed[-1].depth == depth:
+            return None
+        symbol = Symbol(name, type_, kind, line, column, depth)
+        if shadowed is None:
+            self.symbols[name] = [symbol]
+        else:
+            shadowed.append(symbol)
+        self.undo_log[-1].append(name)
+        self.declared += 1
+        return symbol
+
+    def lookup(self, name):
+        """Return the innermost visible Symbol for `name`, or None."""
+        shadowed = self.symbols.get(name)
+        return shadowed[-1] if shadowed else None
+
+    def current_scope(self):
+        return {name: self.symbols[name][-1] for name in self.undo_log[-1]}
@@ -0,0 +1,131 @@
+from dataclasses import dataclass, field
+from typing import List, Optional, Tuple, Union
+
+# Opcodes. Binary operations use the operator itself as the opcode.
+COPY = 'copy'            # dest = src1
+CALL = 'call'            # dest = call src1, *src2
+RETURN = 'return'        # return src1
+LABEL = 'label'          # dest:
+GOTO = 'goto'            # goto dest
+IF_FALSE = 'if_false'    # if_false src1 goto dest
+PHI = 'phi'              # dest = phi *src2 (SSA only, src1 = original name)
+
+BINARY_OPS = {'+', '-', '*', '/', '<', '>', '='}
+
+# Operands are variable/temp names or numeric literals kept as text;
+# folded constants may be negative ("-3") or in exponent form ("1e+20").
+def is_constant(operand):
+    first = operand[0]
+    return first.isdigit() or first == '-'
+
+
+def parse_constant(text):
+    return float(text) if '.' in text or 'e' in text else int(text)
+
+
+def format_constant(value):
+    return repr(value)
+
+
+def evaluate(op, left, right):
+    """Apply a binary opcode with MiniLang++ semantics: int / int truncates
+    toward zero, comparisons give 1 or 0. Raises ZeroDivisionError."""
+    if op == '+':
+        return left + right
+    if op == '-':
+        return left - right
+    if op == '*':
+        return left * right
+    if op == '/':
+        if isinstance(left, int) and isinstance(right, int):
+            quotient = abs(left) // abs(right)
+            return quotient if (left < 0) == (right < 0) else -quotient
+        return left / right
+    if op == '<':
+        return int(left < right)
+    if op == '>':
+        return int(left > right)
+    if op == '=':
+        return int(left == right)
+    raise ValueError(f"Unknown TAC opcode: {op}")
+
+
+def uses(instr):
+    """Operands read by an instruction."""
+    op = instr.opcode
+    if op in BINARY_OPS:
+        return (instr.src1, instr.src2)
+    if op == COPY or op == RETURN or op == IF_FALSE:
+        return (instr.src1,)
+    if op == CALL or op == PHI:
+        return instr.src2
+    return ()
+
+
+def defines(instr):
+    """Name written by an instruction, or None."""
+    op = instr.opcode
+    if op in BINARY_OPS or op == COPY or op == CALL or op == PHI:
+        return instr.dest
+    return None
+
+
+@dataclass(slots=True)
+class Instr:
+    opcode: str
+    dest: Optional[str] = None
+    src1: Optional[str] = None
+    src2: Union[str, Tuple[str, ...], None] = None
+
+
+@dataclass(slots=True)
+class Function:
+    name: str
+    params: List[str]
+    code: List[Instr] = field(default_factory=list)
+
+
+@dataclass(slots=True)
+class Module:
+    functions: List[Function] = field(default_factory=list)
+
+    def function(self, name):
+        for func in self.functions:
+            if func.name == name:
+                return func
+        return None
+
+
+def format_instr(instr: Instr) -> str:
+    op = instr.opcode
+    if op in BINARY_OPS:
+        return f"{instr.dest} = {instr.src1} {op} {instr.src2}"
+    if op == COPY:
+        return f"{instr.dest} = {instr.src1}"
+    if op == CALL:
+        return f"{instr.dest} = call {', '.join((instr.src1,) + instr.src2)}"
+    if op == RETURN:
+        return f"return {instr.src1}"
+    if op == LABEL:
+        return f"{instr.dest}:"
+    if op == GOTO:
+        return f"goto {instr.dest}"
+    if op == IF_FALSE:
+        return f"if_false {instr.src1} goto {instr.dest}"
+    if op == PHI:
+        return f"{instr.dest} = phi {', '.join(instr.src2)}"
+    raise ValueError(f"Unknown TAC opcode: {op}")
+
+
+def format_module(module: Module) -> str:
+    lines = []
+    for func in module.functions:
+        lines.append(f"# Function: {func.name}")
+        lines.extend(map(format_instr, func.code))
+    lines.append("")
+    return "\n".join(lines)
+
+
+def write_module(module: Module, out):
+    """Serialize the whole module with a single write to `out`."""
+    out.write(format_module(module))
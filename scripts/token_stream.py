@@ -0,0 +1,109 @@
+from array import array
+from bisect import bisect_right
+
+TOKEN_KINDS = (
+    'EOF', 'NUMBER', 'ID', 'OP', 'LPAREN', 'RPAREN', 'LBRACE', 'RBRACE', 'SEMI', 'COMMA',
+    'INT', 'FLOAT', 'BOOL', 'IF', 'ELSE', 'WHILE', 'RETURN',
+)
+
+KIND_CODES = {name: code for code, name in enumerate(TOKEN_KINDS)}
+
+(EOF, NUMBER, ID, OP, LPAREN, RPAREN, LBRACE, RBRACE, SEMI, COMMA,
+ INT, FLOAT, BOOL, IF, ELSE, WHILE, RETURN) = range(len(TOKEN_KINDS))
+
+
+class TokenStream:
+    """Struct-of-arrays token storage.
+
+    Token kinds are small integer codes, offsets index into the source and
+    each distinct token text is stored once in `values`. The stream always
+    ends with an EOF entry, so `kinds[i]` can be read one past the last real
+    token without bounds checks.
+    """
+
+    __slots__ = ('kinds', 'starts', 'ends', 'value_ids', 'values',
+                 '_value_index', '_line_numbers', '_line_offsets')
+
+    def __init__(self):
+        self.kinds = array('B')
+        self.starts = array('I')
+        self.ends = array('I')
+        self.value_ids = array('I')
+        self.values = []
+        self._value_index = {}
+        self._line_numbers = array('I')
+        self._line_offsets = array('I')
+
+    @classmethod
+    def from_tokens(cls, tokens):
+        """Build a stream from lexer Tokens or plain (kind, value) pairs."""
+        stream = cls()
+        append = stream.append
+        for tok in tokens:
+            if len(tok) == 2:
+                append(tok[0], tok[1])
+            else:
+                append(tok[0], tok[1], tok[4], tok[2], tok[3])
+        stream.close()
+        return stream
+
+    def append(self, kind, value, offset=0, line=0, column=0):
+        value_id = self._value_index.get(value)
+        if value_id is None:
+            value_id = self._value_index[value] = len(self.values)
+            self.values.append(value)
+        self.kinds.append(KIND_CODES[kind])
+        self.starts.append(offset)
+        self.ends.append(offset + len(value))
+        self.value_ids.append(value_id)
+        if line and (not self._line_numbers or self._line_numbers[-1] != line):
+            self._line_numbers.append(line)
+            self._line_offsets.append(offset - column + 1)
+
+    def extend(self, other, offset=0, lines=0):
+        """Append the tokens of closed stream `other`, without its EOF,
+        moving their offsets by `offset` and their lines by `lines`.
+        `other` must start on a line of its own."""
+        count = len(other)
+        index = self._value_index
+        values = self.values
+        remap = []
+        for value in other.values[:other.value_ids[count]]:   # EOF's '' comes last
+            value_id = index.get(value)
+            if value_id is None:
+                value_id = index[value] = len(values)
+                values.append(value)
+            remap.append(value_id)
+        self.kinds.extend(other.kinds[:count])
+        self.starts.extend(map(offset.__add__, other.starts[:count]))
+        self.ends.extend(map(offset.__add__, other.ends[:count]))
+        self.value_ids.extend(map(remap.__getitem__, other.value_ids[:count]))
+        self._line_numbers.extend(map(lines.__add__, other._line_numbers))
+        self._line_offsets.extend(map(offset.__add__, other._line_offsets))
+
+    def close(self):
+        end = self.ends[-1] if self.ends else 0
+        self.append('EOF', '', end)
+        self._value_index = None
+
+    def __len__(self):
+        return len(self.kinds) - 1
+
+    def __getitem__(self, index):
+        return TOKEN_KINDS[self.kinds[index]], self.values[self.value_ids[index]]
+
+    def __iter__(self):
+        values = self.values
+        for kind, value_id in zip(self.kinds[:-1], self.value_ids[:-1]):
+            yield TOKEN_KINDS[kind], values[value_id]
+
+    def value(self, index):
+        return self.values[self.value_ids[index]]
+
+    def position(self, index):
+        """Return the (line, column) of a token, or (0, 0) if unknown."""
+        offset = self.starts[index]
+        row = bisect_right(self._line_offsets, offset) - 1
+        if row < 0:
+            return 0, 0
+        return self._line_numbers[row], offset - self._line_offsets[row] + 1
@@ -0,0 +1,216 @@
+"""Run the TAC of a MiniLang++ program.
+
+    python -m scripts.vm SOURCE [--entry NAME] [-O] [--allocate] [--repeat N]
+                                [--backend vm|python]
+
+Each function is loaded once: labels become instruction indices, every
+name and constant gets a fixed slot, and instructions become tuples of
+small ints. A call copies the callee's slot template (constants already
+in place) and the dispatch loop keeps its own call stack, so deep
+MiniLang++ recursion never recurses in Python. `--backend python` runs the
+same TAC through scripts.pycodegen instead.
+"""
+import argparse
+import sys
+import time
+
+from scripts import compiler, tac
+from scripts.context import CompilationContext
+from scripts.runtime import VMError, RunResult
+from scripts.tac import is_constant, parse_constant
+
+# VM opcodes, roughly in order of how often generated code executes them
+COPY, ADD, SUB, MUL, DIV, LT, GT, EQ, GOTO, IF_FALSE, CALL, RETURN = range(12)
+
+BINARY_OPCODES = {'+': ADD, '-': SUB, '*': MUL, '/': DIV, '<': LT, '>': GT, '=': EQ}
+
+
+class LoadedFunction:
+    __slots__ = ('name', 'arity', 'code', 'template', 'slot_names')
+
+    def __init__(self, name, arity, code, template, slot_names):
+        self.name = name
+        self.arity = arity
+        self.code = code            # List of (opcode, dest, a, b)
+        self.template = template    # Initial slot values
+        self.slot_names = slot_names
+
+
+def load_function(func: tac.Function, function_index):
+    slots = {name: i for i, name in enumerate(func.params)}
+    template = [None] * len(func.params)
+
+    def slot(operand):
+        index = slots.get(operand)
+        if index is None:
+            index = slots[operand] = len(template)
+            try:
+                template.append(parse_constant(operand) if is_constant(operand) else None)
+            except ValueError:
+                raise VMError(f"Constant {operand[:20]}... is too long to load in {func.name}") from None
+        return index
+
+    labels = {}
+    body = []
+    for instr in func.code:
+        if instr.opcode == tac.LABEL:
+            labels[instr.dest] = len(body)
+        else:
+            body.append(instr)
+
+    code = []
+    for instr in body:
+        op = instr.opcode
+        if op in BINARY_OPCODES:
+            code.append((BINARY_OPCODES[op], slot(instr.dest), slot(instr.src1), slot(instr.src2)))
+        elif op == tac.COPY:
+            code.append((COPY, slot(instr.dest), slot(instr.src1), 0))
+        elif op == tac.GOTO:
+            code.append((GOTO, labels[instr.dest], 0, 0))
+        elif op == tac.IF_FALSE:
+            code.append((IF_FALSE, labels[instr.dest], slot(instr.src1), 0))
+        elif op == tac.CALL:
+            callee = function_index.get(instr.src1)
+            if callee is None:
+                raise VMError(f"Call to unknown function '{instr.src1}' in {func.name}")
+            args = tuple(slot(arg) for arg in instr.src2)
+            code.append((CALL, slot(instr.dest), callee, args))
+        elif op == tac.RETURN:
+            code.append((RETURN, 0, slot(instr.src1), 0))
+        else:
+            raise VMError(f"Cannot execute TAC opcode '{op}' in {func.name}")
+    # Falling off the end returns nothing
+    template.append(None)
+    code.append((RETURN, 0, len(template) - 1, 0))
+    names = [None] * len(template)
+    for name, index in slots.items():
+        names[index] = name
+    return LoadedFunction(func.name, len(func.params), code, template, names)
+
+
+class VM:
+    def __init__(self, module: tac.Module):
+        index = {func.name: i for i, func in enumerate(module.functions)}
+        self.index = index
+        self.functions = [load_function(func, index) for func in module.functions]
+        for func, loaded in zip(module.functions, self.functions):
+            for op, _, callee, args in loaded.code:
+                if op == CALL and len(args) != self.functions[callee].arity:
+                    raise VMError(f"{func.name} calls {self.functions[callee].name} with {len(args)} "
+                                  f"arguments, expected {self.functions[callee].arity}")
+
+    def run(self, entry='main', args=(), max_instructions=None):
+        if entry not in self.index:
+            raise VMError(f"No function named '{entry}'")
+        functions = self.functions
+        func = functions[self.index[entry]]
+        if len(args) != func.arity:
+            raise VMError(f"{entry} expects {func.arity} arguments, got {len(args)}")
+        code = func.code
+        slots = func.template[:]
+        slots[:len(args)] = args
+        stack = []
+        limit = max_instructions or 0   # Checked on jumps and calls only
+        pc = 0
+        count = 0
+        started = time.perf_counter()
+        try:
+            while True:
+                op, dest, a, b = code[pc]
+                pc += 1
+                count += 1
+                if op == COPY:
+                    slots[dest] = slots[a]
+                elif op == ADD:
+                    slots[dest] = slots[a] + slots[b]
+                elif op == SUB:
+                    slots[dest] = slots[a] - slots[b]
+                elif op == MUL:
+                    slots[dest] = slots[a] * slots[b]
+                elif op == LT:
+                    slots[dest] = 1 if slots[a] < slots[b] else 0
+                elif op == GT:
+                    slots[dest] = 1 if slots[a] > slots[b] else 0
+                elif op == IF_FALSE:
+                    if not slots[a]:
+                        pc = dest
+                        if 0 < limit < count:
+                            raise VMError(f"Instruction limit of {limit} reached")
+                elif op == GOTO:
+                    pc = dest
+                    if 0 < limit < count:
+                        raise VMError(f"Instruction limit of {limit} reached")
+                elif op == EQ:
+                    slots[dest] = 1 if slots[a] == slots[b] else 0
+                elif op == DIV:
+                    slots[dest] = tac.evaluate('/', slots[a], slots[b])
+                elif op == CALL:
+                    callee = functions[a]
+                    frame = callee.template[:]
+                    for i, arg in enumerate(b):
+                        frame[i] = slots[arg]
+                    stack.append((func, code, slots, pc, dest))
+                    func, code, slots, pc = callee, callee.code, frame, 0
+                    if 0 < limit < count:
+                        raise VMError(f"Instruction limit of {limit} reached")
+                else:  # RETURN
+                    value = slots[a]
+                    if not stack:
+                        break
+                    func, code, slots, pc, dest = stack.pop()
+                    slots[dest] = value
+        except ZeroDivisionError:
+            raise VMError(f"Division by zero in {func.name}") from None
+        except TypeError:
+            raise VMError(f"Use of an undefined value in {func.name}") from None
+        except OverflowError:
+            raise VMError(f"Numeric overflow in {func.name}") from None
+        return RunResult(value, count, time.perf_counter() - started)
+
+
+def run_module(module, entry='main', args=(), max_instructions=None):
+    return VM(module).run(entry, args, max_instructions)
+
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(description="Compile and run a MiniLang++ program.")
+    arg_parser.add_argument("source")
+    arg_parser.add_argument("--entry", default="main", help="function to call (default: main)")
+    arg_parser.add_argument("-O", "--optimize", action="store_true", help="optimize the generated TAC")
+    arg_parser.add_argument("--allocate", action="store_true", help="reuse temp names across live ranges")
+    arg_parser.add_argument("--repeat", type=int, default=1, help="run N times and report the fastest")
+    arg_parser.add_argument("--backend", choices=("vm", "python"), default="vm",
+                            help="interpret the TAC or compile it to Python (default: vm)")
+    args = arg_parser.parse_args(argv)
+
+    options = {}
+    if args.optimize:
+        options["optimize"] = True
+    if args.allocate:
+        options["allocate"] = True
+    result = compiler.compile_file(args.source, CompilationContext(**options))
+    if not result.ok:
+        for message in result.diagnostics:
+            print(message)
+        return 1
+
+    try:
+        if args.backend == "python":
+            from scripts import pycodegen
+            program = pycodegen.compile_module(result.module)
+        else:
+            program = VM(result.module)
+        best = min((program.run(args.entry) for _ in range(max(args.repeat, 1))), key=lambda run: run.seconds)
+    except VMError as e:
+        print(f"❌ Runtime Error: {e}")
+        return 1
+    print(f"✅ {args.entry} returned {best.value}")
+    if best.instructions is None:
+        print(f"⏱️ {best.seconds:.4f}s")
+    else:
+        print(f"⏱️ {best.instructions} instructions in {best.seconds:.4f}s ({best.rate:,.0f} instructions/s)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
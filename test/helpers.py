@@ -0,0 +1,104 @@
+"""Shared helpers for the test modules."""
+import copy
+import random
+
+from scripts import optimizer, pycodegen, vm
+from scripts.compiler import compile_source
+from scripts.context import CompilationContext
+from scripts.tac import Function, Instr, format_instr
+
+
+def compile_module(source, **options):
+    result = compile_source(source, CompilationContext(**options))
+    assert result.ok, result.diagnostics
+    return result.module
+
+
+def outcome(module, entry='main'):
+    """('ok', value) or ('error', message without the function name)."""
+    try:
+        return 'ok', vm.run_module(module, entry, max_instructions=10 ** 6).value
+    except vm.VMError as e:
+        return 'error', str(e).split(' in ')[0]
+
+
+def python_outcome(module, entry='main'):
+    """outcome() on the Python backend."""
+    try:
+        return 'ok', pycodegen.compile_module(module).run(entry).value
+    except vm.VMError as e:
+        return 'error', str(e).split(' in ')[0]
+
+
+def run(source, **options):
+    return outcome(compile_module(source, **options))
+
+
+def function(code, params=()):
+    """A tac.Function from (opcode, dest, src1, src2) tuples."""
+    return Function('f', list(params), [Instr(*instr) for instr in code])
+
+
+def listing(func):
+    return [format_instr(instr) for instr in func.code]
+
+
+def optimized(module):
+    module = copy.deepcopy(module)
+    optimizer.optimize(module)
+    return module
+
+
+def random_program(seed):
+    """A small program with branches, loops, calls and divisions whose
+    values stay small: multiplication and division only take constants
+    on the right. Some programs divide by zero."""
+    rng = random.Random(seed)
+    counter = [0]
+
+    def operand(names):
+        return rng.choice(names) if names and rng.random() < 0.7 else str(rng.randint(0, 5))
+
+    def expression(names, depth=0):
+        if depth > 1 or rng.random() < 0.3:
+            return operand(names)
+        op = rng.choice('+-*/+-')
+        right = str(rng.randint(0, 4)) if op in '*/' else expression(names, depth + 1)
+        return f"({expression(names, depth + 1)} {op} {right})"
+
+    def block(names, depth, indent):
+        lines = []
+        local = list(names)
+        for _ in range(rng.randint(1, 4)):
+            choice = rng.random()
+            if choice < 0.3 or not local:
+                counter[0] += 1
+                name = f"v{counter[0]}"
+                lines.append(f"{indent}int {name} = {expression(local)};")
+                local.append(name)
+            elif choice < 0.55:
+                lines.append(f"{indent}{rng.choice(local)} = {expression(local)};")
+            elif choice < 0.75 and depth < 3:
+                lines.append(f"{indent}if ({expression(local)} {rng.choice('<>=')} {expression(local)}) {{")
+                lines += block(local, depth + 1, indent + "  ")
+                if rng.random() < 0.5:
+                    lines.append(f"{indent}}} else {{")
+                    lines += block(local, depth + 1, indent + "  ")
+                lines.append(f"{indent}}}")
+            elif depth < 3:
+                counter[0] += 1
+                loop = f"i{counter[0]}"
+                lines.append(f"{indent}int {loop} = 0;")
+                lines.append(f"{indent}while ({loop} < {rng.randint(0, 3)}) {{")
+                lines.append(f"{indent}  {loop} = {loop} + 1;")
+                lines += block(local + [loop], depth + 1, indent + "  ")
+                lines.append(f"{indent}}}")
+            else:
+                lines.append(f"{indent}{rng.choice(local)} = g({expression(local)}, {expression(local)});")
+        return lines
+
+    lines = ["int g(int a, int b) {", "  if (a > b) { return a - b; }", "  return b / 2;", "}",
+             "int main() {", "  int p = 3;"]
+    lines += block(['p'], 0, "  ")
+    lines += ["  return p;", "}"]
+    return "\n".join(lines)
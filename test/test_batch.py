@@ -0,0 +1,30 @@
+from scripts import batch, compiler
+from scripts.diagnostics import INTERNAL_ERROR, IO_ERROR
+
+
+def test_compile_directory_writes_tac(tmp_path):
+    source = tmp_path / "src"
+    (source / "nested").mkdir(parents=True)
+    (source / "a.ml").write_text("int main() { return 1 + 2; }")
+    (source / "nested" / "b.ml").write_text("int main() { return x; }")
+    out = tmp_path / "out"
+    results = batch.compile_directory(source, out, workers=2)
+    assert [diagnostics == [] for _, _, diagnostics, _ in results] == [True, False]
+    assert (out / "a.ml.tac").read_text().startswith("# Function: main")
+    assert (out / "nested" / "b.ml.tac").exists()
+
+
+def test_unreadable_file_becomes_a_diagnostic(tmp_path):
+    path, text, diagnostics, cached = batch.compile_path(tmp_path / "missing.ml")
+    assert text is None and not cached
+    assert [d.code for d in diagnostics] == [IO_ERROR]
+
+
+def test_compiler_crash_becomes_a_diagnostic(tmp_path, monkeypatch):
+    def crash(*args):
+        raise RecursionError("maximum recursion depth exceeded")
+    monkeypatch.setattr(compiler, 'compile_file', crash)
+    path, text, diagnostics, _ = batch.compile_path(tmp_path / "deep.ml")
+    assert text is None
+    assert [d.code for d in diagnostics] == [INTERNAL_ERROR]
+    assert "RecursionError" in diagnostics[0].message
@@ -0,0 +1,95 @@
+import json
+
+from scripts import build
+from scripts.build import Interface
+
+LIB = "int add(int a, int b) { return a + b; }\nfloat half(int x) { return x / 2.0; }\n"
+MAIN = "int main() { int s = add(1, 2); return s; }\n"
+OTHER = "float quarter(int x) { return half(x) / 2.0; }\n"
+
+
+def write_tree(root, **files):
+    for name, text in files.items():
+        path = root / name.replace('__', '/')
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(text)
+
+
+def analyzed(results):
+    return sorted(result.name for result in results if result.analyzed)
+
+
+def test_first_build_then_nothing_to_do(tmp_path):
+    src, out = tmp_path / "src", tmp_path / "out"
+    write_tree(src, lib__math="" + LIB, main=MAIN, other=OTHER)
+    results = build.build(src, out)
+    assert analyzed(results) == ["lib/math", "main", "other"]
+    assert all(result.ok for result in results)
+    main = next(result for result in results if result.name == "main")
+    assert main.dependencies == {"lib/math": main.dependencies["lib/math"]}
+    assert (out / "main.tac").read_text().startswith("# Function: main")
+    interface = Interface.from_json((out / "lib/math.iface").read_text())
+    assert interface.functions == {"add": (["int", "int"], "int"), "half": (["int"], "float")}
+    assert interface.hash == json.loads((out / "manifest.json").read_text())["modules"]["lib/math"]["interface_hash"]
+    assert analyzed(build.build(src, out)) == []
+
+
+def test_body_edit_keeps_dependents(tmp_path):
+    src, out = tmp_path / "src", tmp_path / "out"
+    write_tree(src, lib__math=LIB, main=MAIN, other=OTHER)
+    build.build(src, out)
+    write_tree(src, lib__math=LIB.replace("a + b", "b + a"))
+    assert analyzed(build.build(src, out)) == ["lib/math"]
+
+
+def test_signature_change_rechecks_dependents_from_the_interface(tmp_path):
+    src, out = tmp_path / "src", tmp_path / "out"
+    write_tree(src, lib__math=LIB, main=MAIN, other=OTHER, solo="int one() { return 1; }\n")
+    build.build(src, out)
+    write_tree(src, lib__math=LIB.replace("int add(int a", "int add(float a"))
+    results = results_of(build.build(src, out))
+    assert sorted(name for name, result in results.items() if result.analyzed) == ["lib/math", "main", "other"]
+    assert [d.code for d in results["main"].diagnostics] == ["S008"]
+    # Diagnostics of a reused module come from the manifest
+    assert [d.code for d in results_of(build.build(src, out))["main"].diagnostics] == ["S008"]
+
+
+def results_of(results):
+    return {result.name: result for result in results}
+
+
+def test_undefined_and_duplicate_functions(tmp_path):
+    src, out = tmp_path / "src", tmp_path / "out"
+    write_tree(src, a="int f() { return g(); }\n", b="int f() { return 2; }\n")
+    results = results_of(build.build(src, out))
+    assert [d.code for d in results["a"].diagnostics] == ["S006"]
+    assert [d.message for d in results["b"].diagnostics] == ["❌ Function 'f' is already defined in a."]
+    write_tree(src, c="int g() { return 1; }\n")
+    results = results_of(build.build(src, out))
+    assert results["a"].analyzed and results["a"].ok
+    assert not results["b"].analyzed and not results["b"].ok
+
+
+def test_changed_options_rebuild_everything(tmp_path):
+    src, out = tmp_path / "src", tmp_path / "out"
+    write_tree(src, lib__math=LIB, main=MAIN)
+    build.build(src, out)
+    assert analyzed(build.build(src, out, options={'optimize': True})) == ["lib/math", "main"]
+
+
+def test_build_dir_inside_the_source_tree_is_skipped(tmp_path):
+    write_tree(tmp_path, main=MAIN, lib=LIB)
+    build.build(tmp_path, tmp_path / "build")
+    assert [result.name for result in build.build(tmp_path, tmp_path / "build")] == ["lib", "main"]
+
+
+def test_deleted_sources_lose_their_outputs(tmp_path):
+    src, out = tmp_path / "src", tmp_path / "out"
+    write_tree(src, lib__math=LIB, main=MAIN, other=OTHER)
+    build.build(src, out)
+    (src / "lib/math").unlink()
+    (src / "other").unlink()
+    results = build.build(src, out, options={'optimize': True})
+    assert [result.name for result in results] == ["main"]
+    assert sorted(path.relative_to(out).as_posix() for path in out.rglob("*")) == [
+        "main.iface", "main.tac", "manifest.json"]
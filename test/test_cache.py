@@ -0,0 +1,94 @@
+import subprocess
+import sys
+from pathlib import Path
+
+from scripts.cache import ArtifactCache, SIZE_FILE
+from scripts.compiler import compile_source
+from scripts.context import CompilationContext
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def count_scans(cache, monkeypatch):
+    scans = []
+    entries = cache._entries
+    monkeypatch.setattr(cache, '_entries', lambda: scans.append(1) or entries())
+    return scans
+
+
+def test_get_returns_what_put_stored(tmp_path):
+    cache = ArtifactCache(tmp_path)
+    key = cache.key(b"source", {'optimize': True})
+    assert cache.get(key) is None
+    cache.put(key, {'value': 1})
+    assert cache.get(key) == {'value': 1}
+    assert (cache.stats.hits, cache.stats.misses, cache.stats.stores) == (1, 1, 1)
+
+
+def test_keys_depend_on_options_and_version(tmp_path):
+    cache = ArtifactCache(tmp_path)
+    assert cache.key(b"x", {'optimize': True}) != cache.key(b"x")
+    assert ArtifactCache(tmp_path, version="old").key(b"x") != cache.key(b"x")
+
+
+def test_put_tracks_the_size_without_scanning(tmp_path, monkeypatch):
+    ArtifactCache(tmp_path).put("00first", b"x" * 100)   # No size file yet: one scan
+    cache = ArtifactCache(tmp_path)
+    scans = count_scans(cache, monkeypatch)
+    for i in range(20):
+        cache.put(f"{i:02d}entry", b"x" * 100)
+    assert not scans
+    assert int((tmp_path / SIZE_FILE).read_text()) == cache.total_size()
+
+
+def test_replacing_an_entry_counts_only_the_new_size(tmp_path):
+    cache = ArtifactCache(tmp_path)
+    cache.put("00other", b"x" * 50)
+    cache.put("00same", b"x" * 300)
+    cache.put("00same", b"x" * 100)
+    cache.put("00same", b"x" * 200)
+    assert int((tmp_path / SIZE_FILE).read_text()) == cache.total_size()
+
+
+def test_size_file_is_rebuilt_when_missing_or_corrupt(tmp_path):
+    cache = ArtifactCache(tmp_path)
+    cache.put("00a", b"x" * 100)
+    (tmp_path / SIZE_FILE).write_text("garbage")
+    cache.put("00b", b"x" * 100)
+    assert int((tmp_path / SIZE_FILE).read_text()) == cache.total_size()
+
+
+def test_eviction_removes_the_oldest_entries(tmp_path):
+    cache = ArtifactCache(tmp_path, max_bytes=2000)
+    for i in range(10):
+        cache.put(f"{i:02d}entry", b"x" * 400)
+    assert cache.stats.evictions > 0
+    assert cache.total_size() <= 2000
+    assert int((tmp_path / SIZE_FILE).read_text()) == cache.total_size()
+    assert cache.get("09entry") is not None
+
+
+def test_unreadable_entry_is_a_miss(tmp_path):
+    cache = ArtifactCache(tmp_path)
+    cache.put("00bad", 1)
+    cache._entry_path("00bad").write_bytes(b"not a pickle")
+    assert cache.get("00bad") is None
+    assert not cache._entry_path("00bad").exists()
+
+
+def test_compile_source_uses_the_cache(tmp_path):
+    cache = ArtifactCache(tmp_path)
+    source = "int main() { return 1 + 2; }"
+    first = compile_source(source, CompilationContext(optimize=True), cache=cache)
+    second = compile_source(source, CompilationContext(optimize=True), cache=cache)
+    assert not first.cached and second.cached
+    assert second.pass_stats == first.pass_stats
+
+
+def test_main_prints_the_pass_report_on_a_cache_hit(tmp_path):
+    command = [sys.executable, "main.py", "test/sample1", "-O", "--cache-dir", str(tmp_path)]
+    first = subprocess.run(command, cwd=ROOT, capture_output=True, text=True, check=True).stdout
+    second = subprocess.run(command, cwd=ROOT, capture_output=True, text=True, check=True).stdout
+    assert "Using cached artifacts" in second
+    assert "Optimization passes" in first and "Optimization passes" in second
+    assert second.split("Optimization passes")[1] == first.split("Optimization passes")[1]
@@ -0,0 +1,143 @@
+from helpers import compile_module, function, listing, optimized, outcome, python_outcome
+from scripts import optimizer
+from scripts.cfg import build_cfg, dominators, flatten, liveness, post_dominators
+from scripts.ssa import from_ssa, restore_names, to_ssa
+from scripts.tac import COPY, GOTO, IF_FALSE, LABEL, RETURN
+
+LOOP = """
+int f(int n) {
+  int s = 0;
+  int i = 0;
+  while (i < n) {
+    if (i > 2) { s = s + i; } else { s = s - 1; }
+    i = i + 1;
+  }
+  return s;
+}
+int main() { return f(6); }
+"""
+
+
+def loop_function():
+    return compile_module(LOOP).functions[0]
+
+
+def test_build_cfg_splits_blocks_and_links_edges():
+    cfg = build_cfg(loop_function())
+    assert [block.succs for block in cfg.blocks] == [[1], [2, 6], [3, 4], [5], [5], [1], []]
+    assert [sorted(block.preds) for block in cfg.blocks] == [[], [0, 5], [1], [2], [2], [3, 4], [1]]
+
+
+def test_flatten_round_trips_the_code():
+    func = loop_function()
+    assert flatten(build_cfg(func)) == func.code
+
+
+def test_build_cfg_drops_unreachable_blocks():
+    func = function([(GOTO, 'L1'), ('+', 't1', 'x', '1'), (LABEL, 'L1'), (RETURN, None, 'x')], params=['x'])
+    func.code = flatten(build_cfg(func))
+    assert listing(func) == ['return x']
+
+
+def test_dominators_and_post_dominators():
+    cfg = build_cfg(loop_function())
+    assert dominators(cfg) == [0, 0, 1, 2, 2, 2, 1]
+    # Index 7 is the virtual exit
+    assert post_dominators(cfg) == [1, 6, 5, 5, 5, 1, 7, 7]
+
+
+def test_post_dominators_of_an_endless_loop():
+    func = function([(LABEL, 'L1'), ('+', 'x', 'x', '1'), (GOTO, 'L1')], params=['x'])
+    cfg = build_cfg(func)
+    assert post_dominators(cfg)[-2] == -1
+
+
+def test_liveness_carries_loop_variables_around_the_back_edge():
+    cfg = build_cfg(loop_function())
+    live_in, live_out = liveness(cfg)
+    assert live_in[1] == {'i', 'n', 's'}
+    assert live_out[5] == {'i', 'n', 's'}
+    assert live_in[6] == {'s'}
+
+
+def test_ssa_round_trip_keeps_behaviour():
+    module = compile_module(LOOP)
+    expected = outcome(module)
+    func = module.functions[0]
+    cfg = build_cfg(func)
+    names = to_ssa(cfg)
+    assert any(block.phis for block in cfg.blocks)
+    from_ssa(cfg, names)
+    restore_names(cfg, names)
+    func.code = flatten(cfg)
+    assert outcome(module) == expected
+    assert not any('.' in (instr.dest or '') for instr in func.code)
+
+
+def test_sccp_folds_a_branch_on_a_constant_variable():
+    func = function([(COPY, 'x', '1'), (LABEL, 'L1'), (IF_FALSE, 'L2', 'x'), (RETURN, None, '10'),
+                     (LABEL, 'L2'), (RETURN, None, '20')])
+    assert optimizer.propagate_constants_globally(func)
+    assert listing(func) == ['return 10']
+
+
+def test_sccp_does_not_fold_an_overflowing_value():
+    func = function([(COPY, 'x', '9' * 400), (LABEL, 'L1'), ('*', 'y', 'x', '1.5'),
+                     (IF_FALSE, 'L2', 'y'), (RETURN, None, 'y'), (LABEL, 'L2'), (RETURN, None, '0')])
+    optimizer.propagate_constants_globally(func)
+    assert any(instr.opcode == '*' for instr in func.code)
+
+
+def test_licm_hoists_invariants_but_not_division_by_a_variable():
+    module = compile_module("""
+int f(int n, int d) {
+  int s = 0;
+  int i = 0;
+  while (i < n) {
+    s = s + n * 3 + n / d;
+    i = i + 1;
+  }
+  return s;
+}
+int main() { return f(0, 0); }
+""")
+    func = module.functions[0]
+    assert optimizer.hoist_loop_invariants(func)
+    code = listing(func)
+    loop = code.index(next(line for line in code if line.endswith(':')))
+    assert any(line.endswith('n * 3') for line in code[:loop])
+    assert not any(line.endswith('n / d') for line in code[:loop])
+    # The loop never runs, so the division by zero must not either
+    assert outcome(module, 'main') == ('ok', 0)
+
+
+def test_licm_does_not_hoist_an_overflow_out_of_a_zero_trip_loop():
+    source = f"""
+int f(int n, int x) {{
+  int s = 0;
+  float y = 0.0;
+  int i = 0;
+  while (i < n) {{
+    s = s + n * 3;
+    y = x * 1.5;
+    i = i + 1;
+  }}
+  return s;
+}}
+int main() {{ return f(0, {'9' * 400}); }}
+"""
+    module = compile_module(source)
+    func = module.functions[0]
+    assert optimizer.hoist_loop_invariants(func)
+    code = listing(func)
+    loop = code.index(next(line for line in code if line.endswith(':')))
+    assert any(line.endswith('n * 3') for line in code[:loop])
+    assert not any(line.endswith('x * 1.5') for line in code[:loop])
+    assert outcome(module) == python_outcome(module) == ('ok', 0)
+    module = optimized(compile_module(source))
+    assert outcome(module) == python_outcome(module) == ('ok', 0)
+
+
+def test_global_passes_share_one_step():
+    manager = optimizer.PassManager(('fold', 'sccp', 'licm', 'dce'))
+    assert manager.steps == [('fold',), ('sccp', 'licm'), ('dce',)]
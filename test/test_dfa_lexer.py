@@ -0,0 +1,60 @@
+import random
+
+import pytest
+
+from scripts import dfa_lexer, lexer
+from scripts.compiler import compile_file, compile_source
+from scripts.context import CompilationContext
+from scripts.tac import format_module
+
+PIECES = ["int", "int5", "float", "floaty", "return", "returned", "x1", "_y", "// note / here", "\n",
+          "  ", "12.5", "7", "3.", ".5", "+", "/", "==", "=", "!=", "<=", "&&", "\t\n", "\xa0", "٣",
+          "{", "}", "(", ")", ";", ",", "é", "🙂", "@", " "]
+
+
+def scan(tokenize, source):
+    ctx = CompilationContext()
+    tokens = list(tokenize(source, ctx))
+    return tokens, [d.message for d in ctx.diagnostics.items]
+
+
+@pytest.mark.parametrize('seed', range(50))
+def test_matches_the_regex_scanner(seed):
+    rng = random.Random(seed)
+    source = "".join(rng.choice(PIECES) for _ in range(120))
+    assert scan(dfa_lexer.tokenize_iter, source) == scan(lexer.tokenize_iter, source)
+    data = source.encode('utf-8')
+    assert (scan(dfa_lexer.tokenize_bytes, data)
+            == scan(lambda buf, ctx: lexer.tokenize_buffer(buf, 7, ctx), data))
+
+
+def test_keywords_are_states_not_lookups():
+    tokens = list(dfa_lexer.tokenize_iter("int int5 intx while whiles"))
+    assert [(tok.kind, tok.value) for tok in tokens] == [
+        ('INT', 'int'), ('ID', 'int5'), ('ID', 'intx'), ('WHILE', 'while'), ('ID', 'whiles')]
+
+
+def test_tables_are_compressed():
+    tables = dfa_lexer.TABLES
+    assert tables.class_count < 64
+    assert len(tables.transitions) == tables.state_count * tables.class_count
+    assert len(tables.classes) == 256
+    # Every non-ASCII byte is one symbol
+    assert len(set(tables.classes[128:])) == 1
+
+
+def test_unsupported_pattern_is_rejected():
+    with pytest.raises(ValueError, match="Unbalanced"):
+        dfa_lexer.build_tables([('BAD', '(a')], ())
+
+
+def test_compile_with_the_dfa_lexer(tmp_path):
+    source = "int main() {\n  int x = 2; // two\n  return x * 3;\n}\n"
+    path = tmp_path / "prog.ml"
+    path.write_text(source)
+    for compile_ in (lambda ctx: compile_source(source, ctx), lambda ctx: compile_file(path, ctx)):
+        regex = compile_(CompilationContext())
+        dfa = compile_(CompilationContext(lexer='dfa'))
+        assert dfa.ok
+        assert list(dfa.tokens) == list(regex.tokens)
+        assert format_module(dfa.module) == format_module(regex.module)
@@ -0,0 +1,63 @@
+from scripts import semantic_analyzer
+from scripts.context import CompilationContext
+from scripts.diagnostics import ERROR, WARNING, Diagnostic, DiagnosticCollector, SourceMap, Span, located
+from scripts.lexer import tokenize
+from scripts.parser import Parser
+
+
+def test_collector_caps_errors_and_counts_the_rest():
+    collector = DiagnosticCollector(max_errors=2)
+    assert collector.error('S001', "one") and not collector.full
+    collector.error('S001', "two")
+    assert collector.full
+    assert collector.error('S001', "three") is None
+    collector.error('S001', "four")
+    assert [d.message for d in collector] == ["one", "two"]
+    assert (collector.error_count, collector.dropped) == (2, 2)
+
+
+def test_warnings_do_not_count_toward_the_cap():
+    collector = DiagnosticCollector(max_errors=1)
+    collector.warning('W001', "first warning")
+    collector.error('S001', "error")
+    collector.warning('W001', "late warning")
+    assert [d.severity for d in collector] == [WARNING, ERROR, WARNING]
+    assert collector.errors()[0].message == "error" and collector.dropped == 0
+
+
+def test_uncapped_collector_is_never_full():
+    collector = DiagnosticCollector()
+    for i in range(100):
+        collector.error('S001', str(i))
+    assert not collector.full and len(collector) == 100 and collector.dropped == 0
+
+
+def test_analyzer_stops_once_the_collector_is_full():
+    body = " ".join(f"x{i} = 1;" for i in range(50))
+    ast = Parser(tokenize(f"int main() {{ {body} return 0; }} int g() {{ y = 1; return 0; }}")).parse()
+    ctx = CompilationContext(max_errors=3)
+    found = semantic_analyzer.analyze(ast, ctx)
+    assert [d.message.split(" at ")[0] for d in found] == [
+        f"❌ Variable 'x{i}' is not declared" for i in range(3)]
+    # Statements after the cap are never checked, so nothing was dropped
+    assert ctx.diagnostics.full and ctx.diagnostics.dropped == 0
+
+
+def test_source_map_positions():
+    text = "ab\n\ncd\ne"
+    source_map = SourceMap(text)
+    assert source_map.line_count == 4
+    assert [source_map.position(offset) for offset in range(len(text))] == [
+        (1, 1), (1, 2), (1, 3), (2, 1), (3, 1), (3, 2), (3, 3), (4, 1)]
+    assert [source_map.offset(line) for line in range(1, 5)] == [0, 3, 4, 7]
+    assert source_map.offset(3, 2) == 5
+    assert SourceMap(text.encode()).starts == source_map.starts
+
+
+def test_moved_rewrites_the_position_in_the_message():
+    diagnostic = Diagnostic(ERROR, 'P001', located("❌ Syntax Error: oops", 3, 7), Span(3, 7))
+    moved = diagnostic.moved(10)
+    assert moved.message == "❌ Syntax Error: oops at line 13, column 7" and moved.span == Span(13, 7)
+    assert diagnostic.moved(0) is diagnostic
+    plain = Diagnostic(ERROR, 'E001', "❌ Function 'f' is already defined in a.", Span(3, 1))
+    assert plain.moved(2).message == plain.message and plain.moved(2).span == Span(5, 1)
@@ -0,0 +1,73 @@
+import random
+
+import pytest
+
+from benchmarks.program_generator import ProgramShape, generate_program
+from scripts import lexer
+from scripts.compiler import compile_source
+from scripts.context import CompilationContext
+from scripts.incremental import Document
+
+SNIPPETS = ["}", "{", "int ", "float", "x", "(", ")", ";", "\n", "// c", "/", "1.5", " ", "@", "é",
+            "return 1;", "int f(int a) {\n", "while (x < 3) {", "g(1, 2);", "\n\n", "=", "*"]
+
+
+def assert_like_full_compile(document):
+    text = document.text
+    result = compile_source(text, CompilationContext())
+    assert list(document.tokens()) == list(lexer.tokenize_iter(text, CompilationContext()))
+    assert document.program() == result.ast
+    assert document.diagnostics() == result.diagnostics
+
+
+@pytest.mark.parametrize('seed', range(8))
+def test_random_edits_match_a_full_compile(seed):
+    rng = random.Random(seed)
+    document = Document(generate_program(ProgramShape(functions=rng.randint(1, 5), depth=2, statements=3), seed))
+    assert_like_full_compile(document)
+    for _ in range(12):
+        size = len(document.text)
+        offset = rng.randint(0, size)
+        removed = min(rng.choice([0, 0, 1, 2, 5, 30]), size - offset)
+        document.edit(offset, removed, rng.choice(SNIPPETS) if rng.random() < 0.8 else "")
+        assert_like_full_compile(document)
+
+
+FUNCTIONS = "".join(f"int f{n}(int a) {{\n  int b = a + {n};\n  return b;\n}}\n" for n in range(50))
+
+
+def test_an_edit_in_a_body_touches_only_nearby_functions():
+    document = Document(FUNCTIONS)
+    offset = document.text.index("return b", document.text.index("int f30")) + len("return ")
+    stats = document.edit(offset, 1, "q")
+    assert stats.reparsed == 2 and stats.rechecked == 2
+    assert stats.relexed < len(FUNCTIONS) // 10
+    assert [d.message for d in document.diagnostics()] == ["❌ Variable 'q' is not declared at line 123, column 10"]
+    assert document.diagnostics()[0].span.line == 123
+    assert_like_full_compile(document)
+
+
+def test_a_signature_change_rechecks_the_callers():
+    document = Document(FUNCTIONS + "int main() {\n  return f7(1);\n}\n")
+    offset = document.text.index("int a", document.text.index("int f7("))
+    stats = document.edit(offset, 3, "float")
+    assert stats.rechecked == 3   # f6, f7 and main
+    assert [d.code for d in document.diagnostics()] == ['S003', 'S008']
+    assert_like_full_compile(document)
+
+
+def test_edits_that_join_and_split_functions():
+    document = Document(FUNCTIONS)
+    closing = document.text.index("}\n", document.text.index("int f10"))
+    document.edit(closing, 1, "")     # f10 now runs into f11
+    assert_like_full_compile(document)
+    document.edit(closing, 0, "}")
+    assert document.text == FUNCTIONS
+    assert_like_full_compile(document)
+    document.edit(0, len(FUNCTIONS), "")
+    assert list(document.tokens()) == [] and document.diagnostics() == []
+
+
+def test_edit_outside_the_text():
+    with pytest.raises(ValueError, match="outside the text"):
+        Document("int main() { return 0; }").edit(20, 10, "")
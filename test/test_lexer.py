@@ -0,0 +1,80 @@
+import random
+
+import pytest
+
+from scripts import lexer
+from scripts.context import CompilationContext
+
+PIECES = ["int", "x1", "return", "// note / here", "\n", "  ", "12.5", "7", "+", "/", "\t\n",
+          "\xa0", "٣", "{", "}", ";", "é", " "]
+
+
+def scan_text(source):
+    ctx = CompilationContext()
+    tokens = [(tok.kind, tok.value, tok.line, tok.offset) for tok in lexer.tokenize_iter(source, ctx)]
+    return tokens, [d.message.split(' at ')[0] for d in ctx.diagnostics.items]
+
+
+def scan_bytes(source, chunk_size):
+    ctx = CompilationContext()
+    data = source.encode('utf-8')
+    # Byte offsets converted back to character offsets for comparison
+    tokens = [(tok.kind, tok.value, tok.line, len(data[:tok.offset].decode('utf-8')))
+              for tok in lexer.tokenize_buffer(data, chunk_size, ctx)]
+    return tokens, [d.message.split(' at ')[0] for d in ctx.diagnostics.items]
+
+
+def test_tokens_and_positions():
+    tokens = list(lexer.tokenize_iter("int x = 10;\n  // comment\n  return x;"))
+    assert [(tok.kind, tok.value, tok.line, tok.column) for tok in tokens] == [
+        ('INT', 'int', 1, 1), ('ID', 'x', 1, 5), ('OP', '=', 1, 7), ('NUMBER', '10', 1, 9),
+        ('SEMI', ';', 1, 11), ('RETURN', 'return', 3, 3), ('ID', 'x', 3, 10), ('SEMI', ';', 3, 11)]
+
+
+@pytest.mark.parametrize('char', ["\xa0", "٣", " "])
+def test_unicode_whitespace_and_digits_are_invalid_in_both_scanners(char):
+    source = f"int x = 1{char}2;"
+    assert scan_text(source) == scan_bytes(source, 4)
+    assert scan_text(source)[1] == [f"❌ Lexical Error: Invalid character '{char}'"]
+
+
+@pytest.mark.parametrize('seed', range(50))
+def test_chunked_scanner_matches_the_text_scanner(seed):
+    rng = random.Random(seed)
+    source = " ".join(rng.choice(PIECES) for _ in range(80))
+    expected = scan_text(source)
+    for chunk_size in (1, 2, 3, 7, 64):
+        assert scan_bytes(source, chunk_size) == expected
+
+
+def test_comment_and_blank_runs_longer_than_a_chunk():
+    source = "// " + "c" * 5000 + "\n" + " \n" * 3000 + "int x;"
+    assert scan_bytes(source, 16) == scan_text(source)
+    assert scan_text(source)[0][0] == ('INT', 'int', 3002, 5000 + 4 + 6000)
+
+
+def test_a_run_of_invalid_characters_is_one_error():
+    source = "int x = 1 @#$ + 2;\n y é€;@\n"
+    ctx = CompilationContext()
+    list(lexer.tokenize_iter(source, ctx))
+    assert [d.message for d in ctx.diagnostics.items] == [
+        "❌ Lexical Error: Invalid characters '@#$' at line 1, column 11",
+        "❌ Lexical Error: Invalid characters 'é€' at line 2, column 4",
+        "❌ Lexical Error: Invalid character '@' at line 2, column 7",
+    ]
+    for chunk_size in (1, 2, 3, 64):
+        assert scan_bytes(source, chunk_size) == scan_text(source)
+
+
+def test_long_runs_are_shown_cut_short():
+    source = "int x;" + "@" * 100000 + "\nint y;"
+    tokens, messages = scan_text(source)
+    assert messages == ["❌ Lexical Error: Invalid characters '" + "@" * lexer.MAX_SHOWN + "...'"]
+    assert scan_bytes(source, 7) == (tokens, messages)
+
+
+def test_errors_past_max_errors_are_counted_not_kept():
+    ctx = CompilationContext(max_errors=3)
+    tokens = list(lexer.tokenize_iter("x @ " * 100, ctx))
+    assert len(tokens) == 100
+    assert len(ctx.diagnostics.items) == 3 and ctx.diagnostics.dropped == 97
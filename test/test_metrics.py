@@ -0,0 +1,67 @@
+import json
+
+from scripts.cache import ArtifactCache
+from scripts.compiler import compile_source
+from scripts.context import CompilationContext
+from scripts.metrics import Metrics
+
+SOURCE = """
+int f(int a) {
+  int b = a * 2;
+  if (a > 1) { int c = b + 1; return c; }
+  return b;
+}
+int main() { return f(3); }
+"""
+
+
+def test_no_metrics_by_default():
+    ctx = CompilationContext()
+    compile_source(SOURCE, ctx)
+    assert ctx.metrics is None
+
+
+def test_phases_and_counters():
+    metrics = Metrics()
+    compile_source(SOURCE, CompilationContext(metrics=metrics, optimize=True))
+    assert list(metrics.phases) == ['lex', 'parse', 'semantic', 'tac', 'optimize']
+    assert all(timing.calls == 1 and timing.wall >= 0 for timing in metrics.phases.values())
+    counters = metrics.counters
+    assert counters['symbols_declared'] == 5      # f, main, a, b and c
+    assert counters['max_scope_depth'] == 2
+    assert counters['temps'] == 4 and counters['labels'] == 2
+    assert counters['errors'] == 0
+    assert metrics.node_kinds['Function'] == 2
+    assert counters['ast_nodes'] == sum(metrics.node_kinds.values())
+
+
+def test_metrics_do_not_change_the_cache_key(tmp_path):
+    cache = ArtifactCache(tmp_path)
+    compile_source(SOURCE, CompilationContext(), cache=cache)
+    metrics = Metrics()
+    result = compile_source(SOURCE, CompilationContext(metrics=metrics), cache=cache)
+    assert result.cached
+    assert list(metrics.phases) == ['cache'] and metrics.counters['tokens'] == len(result.tokens)
+
+
+def test_cache_hit_reports_only_what_the_result_holds(tmp_path):
+    cache = ArtifactCache(tmp_path)
+    fresh = Metrics()
+    compile_source(SOURCE, CompilationContext(metrics=fresh), cache=cache)
+    cached = Metrics()
+    assert compile_source(SOURCE, CompilationContext(metrics=cached), cache=cache).cached
+    assert fresh.counters['temps'] == 4
+    # The hit generated no TAC, so it has no temp or label counts to give
+    assert 'temps' not in cached.counters and 'labels' not in cached.counters
+    for name in ('tokens', 'ast_nodes', 'instructions', 'diagnostics', 'errors'):
+        assert cached.counters[name] == fresh.counters[name]
+
+
+def test_memory_and_profile_reports():
+    metrics = Metrics(profile=True, trace_memory=True)
+    compile_source(SOURCE, CompilationContext(metrics=metrics))
+    assert all(timing.peak_bytes is not None for timing in metrics.phases.values())
+    document = json.loads(metrics.to_json())
+    assert set(document) == {'phases', 'counters', 'node_kinds', 'profile'}
+    assert document['profile'] and 'cumulative_seconds' in document['profile'][0]
+    assert "slowest phase:" in metrics.format_text()
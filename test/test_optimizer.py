@@ -0,0 +1,119 @@
+import pytest
+
+from helpers import compile_module, function, listing, optimized, outcome, python_outcome, random_program, run
+from scripts import optimizer
+from scripts.tac import COPY, GOTO, IF_FALSE, LABEL, RETURN
+
+
+def test_fold_constants_evaluates_and_applies_identities():
+    func = function([('+', 't1', '2', '3'), ('*', 't2', 'x', '1'), ('/', 't3', '7', '-2'),
+                     ('<', 't4', '1', '2'), (RETURN, None, 't1')], params=['x'])
+    assert optimizer.fold_constants(func)
+    assert listing(func) == ['t1 = 5', 't2 = x', 't3 = -3', 't4 = 1', 'return t1']
+
+
+def test_fold_constants_resolves_constant_branches():
+    func = function([(IF_FALSE, 'L1', '1'), (IF_FALSE, 'L2', '0'), (LABEL, 'L1'), (LABEL, 'L2')])
+    assert optimizer.fold_constants(func)
+    assert listing(func) == ['goto L2', 'L1:', 'L2:']
+
+
+@pytest.mark.parametrize('left, op, right', [
+    ('1', '/', '0'),                    # Division by zero is left for run time
+    ('9' * 400, '*', '1.5'),            # OverflowError converting to float
+    ('9' * 5000, '+', '1'),             # Literal past the int conversion limit
+])
+def test_fold_constants_leaves_what_it_cannot_evaluate(left, op, right):
+    func = function([(op, 't1', left, right), (RETURN, None, 't1')])
+    assert not optimizer.fold_constants(func)
+    assert func.code[0].opcode == op
+
+
+def test_propagate_copies_rewrites_uses():
+    func = function([('+', 't1', 'a', 'b'), (COPY, 'x', 't1'), (COPY, 'y', 'x'),
+                     ('*', 't2', 'y', 'y'), (RETURN, None, 't2')], params=['a', 'b'])
+    assert optimizer.propagate_copies(func)
+    assert listing(func) == ['t1 = a + b', 'x = t1', 'y = t1', 't2 = t1 * t1', 'return t2']
+
+
+def test_propagate_copies_folds_single_use_temps():
+    func = function([('+', 't1', 'a', 'b'), (COPY, 'x', 't1'), (LABEL, 'L1'), (RETURN, None, 'x')],
+                    params=['a', 'b'])
+    assert optimizer.propagate_copies(func)
+    assert listing(func) == ['x = a + b', 'L1:', 'return x']
+
+
+def test_propagate_copies_stops_at_labels_and_redefinitions():
+    func = function([(COPY, 'x', 'a'), (LABEL, 'L1'), (COPY, 'y', 'x'),
+                     (COPY, 'a', '1'), (RETURN, None, 'y')], params=['a'])
+    optimizer.propagate_copies(func)
+    assert listing(func)[2] == 'y = x'
+
+
+def test_cse_reuses_commutative_expressions():
+    func = function([('+', 't1', 'a', 'b'), ('+', 't2', 'b', 'a'), ('*', 't3', 't1', 't2'),
+                     (RETURN, None, 't3')], params=['a', 'b'])
+    assert optimizer.eliminate_common_subexpressions(func)
+    assert listing(func)[1] == 't2 = t1'
+
+
+def test_cse_forgets_values_whose_holder_was_overwritten():
+    func = function([('+', 'x', 'a', 'b'), (COPY, 'x', '0'), ('+', 't1', 'a', 'b'),
+                     (RETURN, None, 't1')], params=['a', 'b'])
+    assert not optimizer.eliminate_common_subexpressions(func)
+
+
+def test_dce_removes_unused_results_and_unreachable_code():
+    func = function([('+', 't1', 'a', '1'), ('*', 't2', 't1', '2'), (GOTO, 'L1'), (COPY, 'x', '3'),
+                     (LABEL, 'L1'), (RETURN, None, 'a')], params=['a'])
+    assert optimizer.eliminate_dead_code(func)
+    assert listing(func) == ['return a']
+
+
+def test_dce_keeps_divisions_that_may_fail():
+    func = function([('/', 't1', '5', 'z'), ('/', 't2', 'a', '0'), ('/', 't3', 'a', '4'),
+                     (RETURN, None, '1')], params=['a', 'z'])
+    optimizer.eliminate_dead_code(func)
+    assert listing(func) == ['t1 = 5 / z', 't2 = a / 0', 'return 1']
+
+
+def test_dce_keeps_arithmetic_that_may_overflow():
+    huge = '9' * 400
+    func = function([('*', 't1', 'x', '1.5'), ('+', 't2', 'x', 'y'), ('-', 't3', 'x', huge),
+                     ('*', 't4', 'x', '3'), ('<', 't5', 'x', '1.5'), (RETURN, None, '1')], params=['x', 'y'])
+    optimizer.eliminate_dead_code(func)
+    assert listing(func) == ['t1 = x * 1.5', 't2 = x + y', f't3 = x - {huge}', 'return 1']
+
+
+def test_unused_overflow_still_traps_under_O():
+    source = f"int main() {{ int x = {'9' * 400}; int i = x; float y = i * 1.5; return 1; }}"
+    module = compile_module(source)
+    assert outcome(module) == python_outcome(module) == ('error', 'Numeric overflow')
+    module = optimized(module)
+    assert outcome(module) == python_outcome(module) == ('error', 'Numeric overflow')
+
+
+def test_unused_division_by_zero_still_traps_under_O():
+    source = "int main() { int z = 0; int x = 5 / z; return 1; }"
+    assert run(source) == ('error', 'Division by zero')
+    assert run(source, optimize=True) == ('error', 'Division by zero')
+
+
+def test_pass_manager_rejects_unknown_passes():
+    with pytest.raises(ValueError):
+        optimizer.PassManager(('fold', 'nope'))
+
+
+def test_optimize_reports_each_pass():
+    module = compile_module("int main() { int x = 2 + 3; int y = x * 1; return y; }")
+    stats = optimizer.optimize(module)
+    steps = ['+'.join(step) for step in optimizer.PassManager().steps]
+    assert [stat.name for stat in stats[:len(steps)]] == steps
+    assert '+'.join(steps).split('+') == list(optimizer.DEFAULT_PIPELINE)
+    assert stats[-1].after < stats[0].before
+
+
+@pytest.mark.parametrize('seed', range(60))
+def test_optimized_programs_behave_the_same(seed):
+    module = compile_module(random_program(seed))
+    assert outcome(optimized(module)) == outcome(module)
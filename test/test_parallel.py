@@ -0,0 +1,57 @@
+from benchmarks.program_generator import ProgramShape, generate_program
+from scripts import parallel
+from scripts.compiler import compile_source
+from scripts.context import CompilationContext
+from scripts.metrics import Metrics
+from scripts.tac import format_module
+
+# Shadowing, variables spelled like temps and labels, a function named like
+# a temp, calls across functions and semantic errors in several bodies
+EDGE_CASES = """
+int t1(int L1) { int t2 = L1 + 1; if (t2 > 0) { int L1 = t2 * 2; return L1; } return t2; }
+float half(int x) { return x / 2.0; }
+int bad(int a) { return nope + a; }
+int main() {
+  int i = 0;
+  while (i < 3) { if (i > 1) { i = i + t1(i); } else { i = i + 1; } }
+  float h = half(i);
+  return undefined(i, missing);
+}
+"""
+
+
+def compile_both(source, jobs=2, **options):
+    serial_metrics, parallel_metrics = Metrics(), Metrics()
+    serial_ctx = CompilationContext(metrics=serial_metrics, **options)
+    parallel_ctx = CompilationContext(metrics=parallel_metrics, jobs=jobs, **options)
+    serial = compile_source(source, serial_ctx)
+    split = compile_source(source, parallel_ctx)
+    assert 'functions' in parallel_metrics.phases
+    assert format_module(split.module) == format_module(serial.module)
+    assert split.diagnostics == serial.diagnostics
+    assert (parallel_ctx.temp_count, parallel_ctx.label_count) == (serial_ctx.temp_count, serial_ctx.label_count)
+    # A serial compile stops analyzing at max_errors, so it may declare fewer symbols
+    for name in ('symbols_declared', 'max_scope_depth') if 'max_errors' not in options else ():
+        assert parallel_metrics.counters[name] == serial_metrics.counters[name]
+    return serial
+
+
+def test_generated_program_matches_serial():
+    source = generate_program(ProgramShape(functions=40), seed=3)
+    assert compile_both(source, jobs=3).ok
+
+
+def test_edge_cases_and_errors_match_serial():
+    # Pad with enough functions that the pool is used
+    source = EDGE_CASES + "".join(f"int pad{n}(int t3) {{ return t3 * {n}; }}\n"
+                                  for n in range(2 * parallel.MIN_FUNCTIONS_PER_JOB))
+    result = compile_both(source)
+    assert [d.code for d in result.diagnostics] == ['S001', 'S001', 'S006']
+    assert [d.code for d in compile_both(source, max_errors=2).diagnostics] == ['S001', 'S001']
+
+
+def test_small_programs_stay_serial():
+    metrics = Metrics()
+    compile_source(EDGE_CASES, CompilationContext(metrics=metrics, jobs=4))
+    assert 'functions' not in metrics.phases
+    assert 'semantic' in metrics.phases
@@ -0,0 +1,80 @@
+import pytest
+
+from benchmarks.program_generator import ProgramShape, generate_program
+from scripts import lexer, parallel_lexer
+from scripts.compiler import compile_file
+from scripts.context import CompilationContext
+from scripts.tac import format_module
+from scripts.token_stream import TokenStream
+
+# Braces in comments, a stray `}`, invalid runs and multi-byte characters
+TRICKY = """
+int f(int a) { // } closes nothing {
+  if (a > 1) { return a; } else { return 0; }
+}
+} @@ é€
+float g() { return 1.5; }  // {{{
+int x = 1 # 2;
+"""
+
+SPLITTERS = ['bytes.find', pytest.param('numpy', marks=pytest.mark.skipif(
+    parallel_lexer.np is None, reason="NumPy is not installed"))]
+
+
+@pytest.fixture(params=SPLITTERS)
+def splitter(request, monkeypatch):
+    if request.param == 'bytes.find':
+        monkeypatch.setattr(parallel_lexer, 'np', None)
+    return request.param
+
+
+def snapshot(tokens, ctx):
+    return ([(tokens[i], tokens.starts[i], tokens.ends[i], tokens.position(i)) for i in range(len(tokens) + 1)],
+            tokens.values, list(tokens.value_ids), ctx.diagnostics.items, ctx.diagnostics.dropped)
+
+
+def source_file(tmp_path, source):
+    path = tmp_path / "big.mlpp"
+    path.write_bytes(source.encode('utf-8'))
+    return path
+
+
+@pytest.mark.parametrize('options', [{}, {'lexer': 'dfa'}, {'max_errors': 2}])
+@pytest.mark.parametrize('jobs', [2, 3, 8])
+def test_matches_the_serial_lexer(tmp_path, splitter, options, jobs):
+    source = (generate_program(ProgramShape(functions=12), seed=jobs) + TRICKY) * 3
+    path = source_file(tmp_path, source)
+    serial_ctx, split_ctx = CompilationContext(**options), CompilationContext(**options)
+    serial = TokenStream.from_tokens(lexer.tokenize_file(path, ctx=serial_ctx))
+    split = parallel_lexer.tokenize_file(path, split_ctx, jobs)
+    assert snapshot(split, split_ctx) == snapshot(serial, serial_ctx)
+
+
+def test_cuts_follow_newlines(splitter):
+    data = (generate_program(ProgramShape(functions=30), seed=1) + TRICKY).encode('utf-8')
+    for parts in (2, 5, 16):
+        cuts = parallel_lexer.split_points(data, parts)
+        assert 0 < len(cuts) < parts and cuts == sorted(set(cuts))
+        assert all(data[cut - 1:cut] == b'\n' for cut in cuts)
+    assert parallel_lexer.split_points(b"no newline at all", 4) == []
+
+
+@pytest.mark.skipif(parallel_lexer.np is None, reason="NumPy is not installed")
+def test_cuts_land_between_functions():
+    data = TRICKY.encode('utf-8')
+    boundaries = [int(point) for point in parallel_lexer._function_boundaries(data)]
+    assert [data[:point].decode().rstrip().splitlines()[-1] for point in boundaries] == [
+        "}", "} @@ é€", "float g() { return 1.5; }  // {{{"]
+    program = generate_program(ProgramShape(functions=40), seed=2).encode('utf-8')
+    for cut in parallel_lexer.split_points(program, 4):
+        assert program[cut:].startswith((b'int ', b'float ', b'bool '))
+
+
+def test_compile_file_lexes_large_files_in_pieces(tmp_path, monkeypatch):
+    path = source_file(tmp_path, generate_program(ProgramShape(functions=30), seed=4) + TRICKY)
+    monkeypatch.setattr(parallel_lexer, 'MIN_BYTES_PER_JOB', 1024)
+    serial = compile_file(path, CompilationContext())
+    split = compile_file(path, CompilationContext(jobs=3))
+    assert list(split.tokens) == list(serial.tokens)
+    assert split.ast == serial.ast and split.diagnostics == serial.diagnostics
+    assert format_module(split.module) == format_module(serial.module)
@@ -0,0 +1,66 @@
+import pytest
+
+from scripts.ast import BinOp, to_source
+from scripts.context import CompilationContext
+from scripts.lexer import tokenize, tokenize_iter
+from scripts.parser import Parser
+from scripts.semantic_analyzer import SemanticAnalyzer
+from scripts.token_stream import TokenStream
+
+
+def parse(source):
+    parser = Parser(tokenize(source))
+    return parser.parse(), parser.errors
+
+
+def test_precedence_and_associativity():
+    program, errors = parse("int main() { return 1 - 2 - 3 * 4 < 5; }")
+    assert not errors
+    expr = program.functions[0].body[0].value
+    assert isinstance(expr, BinOp) and expr.op == '<'
+    assert to_source(expr) == "((1 - 2) - (3 * 4)) < 5"
+
+
+@pytest.mark.parametrize('source, functions, found', [
+    ("int main() { return 0; } }", ['main'], 'RBRACE'),
+    ("x = 1; int main() { return 0; }", ['main'], 'ID'),
+    ("int f() { return 1; } ; int main() { return 0; }", ['f', 'main'], 'SEMI'),
+    ("int main() { return 0; } else", ['main'], 'ELSE'),
+])
+def test_stray_top_level_tokens_are_skipped(source, functions, found):
+    program, errors = parse(source)
+    assert [func.name for func in program.functions] == functions
+    assert errors == [f"❌ Parse Error: Expected return type (INT/FLOAT/BOOL), got {found}"]
+
+
+def test_a_long_run_of_stray_tokens_reports_one_error():
+    program, errors = parse("} ; ; x = 1 ; }" * 1000 + " int main() { return 0; }")
+    assert [func.name for func in program.functions] == ['main']
+    assert len(errors) == 1
+
+
+def test_statement_errors_do_not_stop_the_function():
+    program, errors = parse("int main() { x = ; return 0; } int g() { return 1; }")
+    assert [func.name for func in program.functions] == ['main', 'g']
+    assert errors
+
+
+@pytest.mark.parametrize('expr, operands', [
+    ("(" * 500 + "1" + " + 1)" * 500, 501),
+    (" + ".join(["1.5"] * 20000), 20000),
+], ids=['nested', 'chain'])
+def test_deep_and_long_expressions_do_not_recurse(expr, operands):
+    program, errors = parse(f"float main() {{ return {expr}; }}")
+    assert not errors
+    value = program.functions[0].body[0].value
+    assert SemanticAnalyzer(CompilationContext()).visit(value) == ('int' if operands == 501 else 'float')
+    text = to_source(value)
+    assert text.count(" + ") == operands - 1 and text.count("(") == text.count(")")
+
+
+def test_messages_end_with_the_position():
+    tokens = TokenStream.from_tokens(tokenize_iter("int main() {\n  int x = ;\n  return 0;\n}"))
+    parser = Parser(tokens)
+    parser.parse()
+    assert parser.errors == ["❌ Unexpected token: SEMI (';') at line 2, column 11",
+                             "❌ Syntax Error: Expected SEMI but got RETURN ('return') at line 3, column 3"]
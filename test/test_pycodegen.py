@@ -0,0 +1,71 @@
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+from helpers import compile_module, optimized, outcome, python_outcome, random_program
+from scripts import pycodegen
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def nested_loops(depth):
+    lines = ["int main() {", "int s = 0;"]
+    for i in range(depth):
+        lines += [f"int i{i} = 0;", f"while (i{i} < 1) {{", f"i{i} = i{i} + 1;"]
+    lines += ["s = s + 1;"] + ["}"] * depth + ["return s;", "}"]
+    return "\n".join(lines)
+
+
+@pytest.mark.parametrize('seed', range(40))
+def test_python_backend_matches_the_vm(seed):
+    module = compile_module(random_program(seed))
+    assert python_outcome(module) == outcome(module)
+    module = optimized(module)
+    assert python_outcome(module) == outcome(module)
+
+
+def test_structured_output_has_no_dispatch_loop():
+    module = compile_module("""
+int main() {
+  int s = 0;
+  int i = 0;
+  while (i < 10) {
+    if (i > 4) { s = s + i; } else { s = s - 1; }
+    i = i + 1;
+  }
+  return s;
+}
+""")
+    source = pycodegen.generate_python(module)
+    assert "pc = 0" not in source and "while v_i < 10:" in source
+    assert python_outcome(module) == ('ok', 30)
+
+
+@pytest.mark.parametrize('depth', [20, 25])
+def test_deep_loop_nesting_still_compiles(depth):
+    module = compile_module(nested_loops(depth))
+    source = pycodegen.generate_python(module)
+    assert ("pc = 0" in source) == (depth > pycodegen.MAX_LOOPS)
+    assert python_outcome(module) == ('ok', 1)
+
+
+@pytest.mark.parametrize('source, message', [
+    ("int main() { int z = 0; return 1 / z; }", "Division by zero"),
+    ("int main() { int x = 10; int i = 0; while (i < 12) { x = x * x; i = i + 1; } float y = x / 1.5; return 0; }",
+     "Numeric overflow"),
+    ("int f(int n) { return f(n + 1); } int main() { return f(0); }", "Call depth exceeded"),
+])
+def test_runtime_errors(source, message):
+    assert python_outcome(compile_module(source)) == ('error', message)
+
+
+def test_command_line_reports_runtime_errors(tmp_path):
+    path = tmp_path / "div.ml"
+    path.write_text("int main() { int z = 0; return 1 / z; }\n")
+    for backend in ("vm", "python"):
+        run = subprocess.run([sys.executable, "-m", "scripts.vm", str(path), "--backend", backend],
+                             cwd=ROOT, capture_output=True, text=True)
+        assert run.returncode == 1
+        assert "Runtime Error: Division by zero" in run.stdout
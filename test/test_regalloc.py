@@ -0,0 +1,71 @@
+import copy
+
+import pytest
+
+from helpers import compile_module, function, listing, outcome, random_program
+from scripts import regalloc
+from scripts.cache import ArtifactCache
+from scripts.cfg import build_cfg
+from scripts.compiler import CompilationResult, compile_source
+from scripts.context import CompilationContext
+from scripts.tac import RETURN
+
+
+def test_is_temp():
+    assert regalloc.is_temp('t1') and regalloc.is_temp('t12.3')
+    assert not regalloc.is_temp('total') and not regalloc.is_temp('x')
+
+
+def test_linear_scan_reuses_registers_of_ended_intervals():
+    assignment, count = regalloc.linear_scan({'t1': [0, 3], 't2': [1, 5], 't3': [4, 7]})
+    assert count == 2
+    assert assignment == {'t1': 0, 't2': 1, 't3': 0}
+
+
+def test_temp_dying_in_an_instruction_hands_its_register_to_the_result():
+    func = function([('+', 't1', 'x', '1'), ('*', 't2', 't1', '2'), ('-', 't3', 't2', '3'),
+                     (RETURN, None, 't3')], params=['x'])
+    frame = regalloc.allocate_registers(func)
+    assert (frame.temps, frame.registers, frame.variables) == (3, 1, 1)
+    assert listing(func) == ['t0 = x + 1', 't0 = t0 * 2', 't0 = t0 - 3', 'return t0']
+
+
+def test_intervals_cover_loop_back_edges():
+    module = compile_module("""
+int main() {
+  int s = 0;
+  int i = 0;
+  while (i < 5) { s = s + i * 2; i = i + 1; }
+  return s;
+}
+""")
+    intervals = regalloc.live_intervals(build_cfg(module.functions[0]))
+    assert intervals and all(start <= end for start, end in intervals.values())
+
+
+@pytest.mark.parametrize('seed', range(40))
+def test_allocated_programs_behave_the_same(seed):
+    module = compile_module(random_program(seed))
+    expected = outcome(module)
+    allocated = copy.deepcopy(module)
+    frames = regalloc.allocate_module(allocated)
+    assert outcome(allocated) == expected
+    assert all(frame.registers <= frame.temps for frame in frames)
+
+
+def test_format_frames_names_the_heaviest_function():
+    frames = [regalloc.FrameSummary('f', 2, 5, 3), regalloc.FrameSummary('main', 1, 2, 1)]
+    report = regalloc.format_frames(frames)
+    assert report.splitlines()[-1] == "  max register pressure: 3 in f"
+
+
+def test_cached_result_of_an_older_shape_is_a_miss(tmp_path):
+    cache = ArtifactCache(tmp_path)
+    source = "int main() { return 1; }"
+    ctx = CompilationContext(allocate=True)
+    stale = compile_source(source, ctx)
+    del stale.__dict__['frames']   # As pickled before `frames` existed
+    cache.put(cache.key(source.encode(), ctx.options), stale)
+    result = compile_source(source, CompilationContext(allocate=True), cache=cache)
+    assert not result.cached and result.frames
+    assert isinstance(cache.get(cache.key(source.encode(), ctx.options)), CompilationResult)
@@ -0,0 +1,103 @@
+import struct
+
+import pytest
+
+from helpers import function
+from benchmarks.program_generator import ProgramShape, generate_program
+from scripts import serialize, tac
+from scripts.compiler import compile_source
+from scripts.context import CompilationContext
+
+SOURCE = """
+int f(int a, float b) {
+  if (a > 0) { a = a - 1; } else { b = b * 2.5; }
+  if (a = 1) { return g(a, b, 3); }
+  while (a < 10) { int c = a + 1; a = c; }
+  return a;
+}
+int g(int x, float y, int z) { float w = y / x; return x + z; }
+int main() { return f(1, 2.0); }
+"""
+
+
+def compile_ok(source, **options):
+    result = compile_source(source, CompilationContext(**options))
+    assert result.ok, result.diagnostics
+    return result
+
+
+@pytest.mark.parametrize("seed", range(4))
+def test_generated_programs_round_trip(seed):
+    result = compile_ok(generate_program(ProgramShape(functions=12), seed=seed), optimize=True)
+    assert serialize.load_ast(serialize.dump_ast(result.ast)).program() == result.ast
+    assert serialize.load_module(serialize.dump_module(result.module)).module() == result.module
+
+
+def test_optional_fields_keep_none_and_empty_lists_apart():
+    ast = compile_ok(SOURCE).ast
+    program = serialize.load_ast(serialize.dump_ast(ast)).program()
+    assert program == ast
+    first_if, second_if = program.functions[0].body[:2]
+    assert first_if.else_body and second_if.else_body is None
+    assert program.functions[2].params == []
+
+
+def test_functions_decode_lazily_and_once():
+    reader = serialize.load_ast(serialize.dump_ast(compile_ok(SOURCE).ast))
+    assert len(reader) == 3
+    assert reader.names() == ['f', 'g', 'main']
+    assert reader._functions == [None, None, None]
+    g = reader.function(1)
+    assert g.name == 'g' and [param.name for param in g.params] == ['x', 'y', 'z']
+    assert reader.function(1) is g
+    assert reader._functions[0] is None and reader._functions[2] is None
+
+    module = compile_ok(SOURCE).module
+    tac_reader = serialize.load_module(serialize.dump_module(module))
+    assert tac_reader.names() == ['f', 'g', 'main']
+    assert tac_reader.function(2) == module.functions[2]
+
+
+def test_call_and_phi_operand_tuples():
+    module = tac.Module([
+        function([('call', 't1', 'g', ()), ('call', 't2', 'g', ('a', '1.5', 't1')),
+                  ('phi', 'x2', 'x', ('x0', 'x1')), ('label', 'L1', None, None), ('return', None, 't2', None)],
+                 params=('a',)),
+        function([]),
+    ])
+    loaded = serialize.load_module(serialize.dump_module(module)).module()
+    assert loaded == module
+    assert loaded.functions[0].code[0].src2 == ()
+
+
+def test_wide_columns():
+    ast = compile_ok(SOURCE).ast
+    ast.functions[0].line = 70000
+    ast.functions[0].body[0].column = 300
+    assert serialize.load_ast(serialize.dump_ast(ast)).program() == ast
+
+
+def test_empty_payloads():
+    empty = compile_ok("").ast
+    assert serialize.load_ast(serialize.dump_ast(empty)).program() == empty
+    assert serialize.load_module(serialize.dump_module(tac.Module())).module() == tac.Module()
+
+
+def test_loads_from_a_memoryview_slice():
+    module = compile_ok(SOURCE).module
+    data = b'xx' + serialize.dump_module(module)
+    assert serialize.load_module(memoryview(data)[2:]).module() == module
+
+
+def test_rejects_foreign_and_mismatched_data():
+    data = serialize.dump_ast(compile_ok(SOURCE).ast)
+    with pytest.raises(ValueError, match="Not a MiniLang"):
+        serialize.load_ast(b'\x80\x04' + data)
+    newer = bytearray(data)
+    struct.pack_into('<H', newer, 4, serialize.FORMAT_VERSION + 1)
+    with pytest.raises(ValueError, match="version"):
+        serialize.load_ast(newer)
+    with pytest.raises(ValueError, match="different payload"):
+        serialize.load_module(data)
+    with pytest.raises(ValueError, match="truncated"):
+        serialize.load_ast(data[:len(data) // 2])
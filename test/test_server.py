@@ -0,0 +1,97 @@
+import asyncio
+import os
+import threading
+import time
+
+import pytest
+
+from scripts.client import CompileClient, ServerError
+from scripts.server import CompileServer
+
+
+@pytest.fixture
+def server(tmp_path):
+    """A server compiling on threads, running on its own event loop."""
+    compile_server = CompileServer(tmp_path / "compile.sock", workers=0, memory_entries=2)
+    thread = threading.Thread(target=asyncio.run, args=(compile_server.serve(),))
+    thread.start()
+    deadline = time.monotonic() + 10
+    while not os.path.exists(compile_server.socket_path):
+        assert time.monotonic() < deadline, "server did not start"
+        time.sleep(0.01)
+    yield compile_server
+    if thread.is_alive():
+        with CompileClient(compile_server.socket_path, timeout=10) as client:
+            client.request({'command': 'shutdown'})
+    thread.join(10)
+    assert not thread.is_alive()
+
+
+def test_compile_source_and_path(server, tmp_path):
+    path = tmp_path / "prog.ml"
+    path.write_text("int main() { int x = 2; return x * 3; }")
+    with CompileClient(server.socket_path, timeout=10) as client:
+        response = client.compile(path=path, optimize=True)
+        assert response['ok'] and not response['cached']
+        assert response['tokens'][0] == ['INT', 'int', 1, 1]
+        assert "return 6" in response['tac']
+        response = client.compile(source="int main() { return y; }")
+        assert not response['ok']
+        assert response['diagnostics'][0]['code'] == 'S001'
+
+
+def test_repeated_request_is_answered_from_memory(server):
+    with CompileClient(server.socket_path, timeout=10) as client:
+        first = client.compile(source="int main() { return 1; }")
+        second = client.compile(source="int main() { return 1; }")
+        assert second['cached'] and second['tac'] == first['tac']
+        # Different options are a different entry
+        assert not client.compile(source="int main() { return 1; }", optimize=True)['cached']
+        stats = client.request({'command': 'stats'})
+    assert (stats['compiles'], stats['memory_hits'], stats['memory_entries']) == (2, 1, 2)
+
+
+def test_false_flags_share_an_entry_but_zero_is_kept(server):
+    source = "int main() { return y; }"
+    with CompileClient(server.socket_path, timeout=10) as client:
+        uncapped = client.compile(source=source)
+        assert client.compile(source=source, optimize=False, max_errors=None)['cached']
+        capped = client.compile(source=source, max_errors=0)
+    assert not capped['cached'] and uncapped['diagnostics']
+    assert not [d for d in capped['diagnostics'] if d['severity'] == 'error']
+
+
+def test_bad_requests_get_errors_and_keep_the_connection(server):
+    with CompileClient(server.socket_path, timeout=10) as client:
+        with pytest.raises(ServerError, match="needs a source or a path"):
+            client.request({})
+        with pytest.raises(ServerError, match="unknown options"):
+            client.compile(source="int main() { return 1; }", fast=True)
+        with pytest.raises(ServerError, match="No such file"):
+            client.compile(path="/nonexistent/file.ml")
+        assert client.compile(source="int main() { return 1; }")['ok']
+
+
+def test_concurrent_clients(server):
+    results = []
+
+    def work(n):
+        with CompileClient(server.socket_path, timeout=10) as client:
+            for i in range(5):
+                results.append(client.compile(source=f"int main() {{ return {n * 10 + i}; }}")['tac'])
+
+    threads = [threading.Thread(target=work, args=(n,)) for n in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert sorted(results) == sorted(f"# Function: main\nreturn {n}\n" for n in range(40) if n % 10 < 5)
+
+
+def test_shutdown_removes_the_socket(server):
+    with CompileClient(server.socket_path, timeout=10) as client:
+        assert client.request({'command': 'shutdown'})['stopping']
+    deadline = time.monotonic() + 10
+    while os.path.exists(server.socket_path):
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
@@ -0,0 +1,52 @@
+from scripts.symbol_table import SymbolTable
+
+
+def test_lookup_finds_the_innermost_declaration():
+    table = SymbolTable()
+    outer = table.declare('x', 'int')
+    table.enter_scope()
+    inner = table.declare('x', 'float', line=3)
+    assert table.lookup('x') is inner
+    assert (inner.type, inner.depth, inner.line) == ('float', 1, 3)
+    table.exit_scope()
+    assert table.lookup('x') is outer
+    assert table.lookup('y') is None
+
+
+def test_exit_scope_undoes_exactly_that_scope():
+    table = SymbolTable()
+    table.declare('a', 'int')
+    table.enter_scope()
+    table.declare('b', 'int')
+    table.enter_scope()
+    table.declare('a', 'bool')
+    table.declare('c', 'int')
+    assert table.current_scope().keys() == {'a', 'c'}
+    table.exit_scope()
+    assert table.lookup('a').type == 'int' and table.lookup('b') is not None
+    assert not table.exists('c')
+    assert table.current_scope().keys() == {'b'}
+    table.exit_scope()
+    assert table.symbols.keys() == {'a'} and table.depth == 0
+
+
+def test_redeclaring_in_the_same_scope_returns_none():
+    table = SymbolTable()
+    first = table.declare('x', 'int')
+    assert table.declare('x', 'float') is None
+    assert table.lookup('x') is first
+    table.enter_scope()
+    assert table.declare('x', 'float') is not None
+
+
+def test_counters():
+    table = SymbolTable()
+    table.declare('f', 'int', kind='function')
+    for _ in range(3):
+        table.enter_scope()
+        table.declare('x', 'int')
+    table.declare('x', 'int')   # Rejected: not counted
+    for _ in range(3):
+        table.exit_scope()
+    table.enter_scope()
+    assert (table.declared, table.max_depth, table.depth) == (4, 3, 1)
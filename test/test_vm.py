@@ -0,0 +1,98 @@
+import pytest
+
+from helpers import compile_module, listing, run
+from scripts import vm
+from scripts.tac import Function, Instr, Module, RETURN
+
+
+@pytest.mark.parametrize('source, expected', [
+    ("int main() { return 7 / 2; }", 3),
+    ("int main() { return 0 - 7 / 2; }", -3),
+    ("int main() { int a = 0 - 7; return a / 2; }", -3),
+    ("int main() { int r = 0; if (3 < 4) { r = 1; } return r; }", 1),
+    ("int main() { int r = 0; if (3 = 4) { r = 1; } return r; }", 0),
+    ("int main() { int s = 0; int i = 0; while (i < 5) { s = s + i; i = i + 1; } return s; }", 10),
+    ("int f(int n) { if (n < 2) { return n; } return f(n - 1) + f(n - 2); } int main() { return f(15); }", 610),
+])
+def test_programs(source, expected):
+    assert run(source) == ('ok', expected)
+
+
+def test_deep_recursion_does_not_use_python_frames():
+    source = "int f(int n) { if (n < 1) { return 0; } return 1 + f(n - 1); } int main() { return f(20000); }"
+    assert run(source) == ('ok', 20000)
+
+
+@pytest.mark.parametrize('source, message', [
+    ("int main() { int z = 0; return 1 / z; }", "Division by zero"),
+    ("int main() { int x = 10; int i = 0; while (i < 12) { x = x * x; i = i + 1; } float y = x / 1.5; return 0; }",
+     "Numeric overflow"),
+    ("int main() { return " + "9" * 5000 + "; }", "Constant 99999999999999999999... is too long to load"),
+])
+def test_runtime_errors(source, message):
+    assert run(source) == ('error', message)
+
+
+def test_instruction_limit():
+    module = compile_module("int main() { int i = 0; while (1) { i = i + 1; } return i; }")
+    with pytest.raises(vm.VMError, match="Instruction limit"):
+        vm.run_module(module, max_instructions=1000)
+
+
+def test_entry_and_arity_are_checked():
+    module = compile_module("int f(int a) { return a; } int main() { return f(1); }")
+    with pytest.raises(vm.VMError, match="No function named"):
+        vm.run_module(module, 'g')
+    with pytest.raises(vm.VMError, match="expects 1 arguments"):
+        vm.run_module(module, 'f')
+    assert vm.run_module(module, 'f', (5,)).value == 5
+
+
+def test_unknown_callee_is_reported_at_load_time():
+    module = Module([Function('main', [], [Instr('call', 't1', 'g', ()), Instr(RETURN, src1='t1')])])
+    with pytest.raises(vm.VMError, match="unknown function 'g'"):
+        vm.VM(module)
+
+
+# The TAC namespace is flat, so block scopes and temp-like names are renamed
+
+def test_inner_declaration_does_not_clobber_the_outer_variable():
+    assert run("int main() { int x = 1; if (1) { int x = 2; } return x; }") == ('ok', 1)
+
+
+def test_inner_declaration_is_visible_until_its_block_ends():
+    source = """
+int main() {
+  int y = 100;
+  int s = 0;
+  int x = 1;
+  while (x < 4) {
+    int y = x * 10;
+    if (1) { int y = 3; s = s + y; }
+    s = s + y;
+    x = x + 1;
+  }
+  return s + y;
+}
+"""
+    assert run(source) == ('ok', 169)
+
+
+def test_variable_named_like_a_temp_keeps_its_value():
+    assert run("int main() { int t1 = 5; int x = t1 + 2 * 3; return x; }") == ('ok', 11)
+
+
+def test_fresh_names_avoid_every_identifier_in_the_function():
+    module = compile_module("""
+int f(int t1, int x) {
+  int x_1 = 3;
+  if (1) { int x = t1 + x_1; return x; }
+  return x;
+}
+int main() { return f(1, 2); }
+""")
+    func = module.functions[0]
+    assert func.params == ['t1_1', 'x']
+    assert 'x_2 = t1' in listing(func)
+    assert run("int f(int t1, int x) { int x_1 = 3; if (1) { int x = t1 + x_1; return x; } return x; }"
+               " int main() { return f(1, 2); }") == ('ok', 4)